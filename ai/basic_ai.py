@@ -0,0 +1,252 @@
+# ai/basic_ai.py
+"""
+Базовый ИИ фракции с планировщиком, укладывающимся в бюджет времени.
+
+План хода строится по юнитам. Для каждого юнита перебираются клетки,
+достижимые за 0, 1, 2, ... шагов (итеративное углубление по числу шагов),
+и каждая клетка оценивается по ожидаемому урону с неё, числу врагов,
+которые её видят, и расстоянию до ближайшего врага. Лучший вариант
+запоминается сразу, поэтому когда бюджет исчерпан, готовый план уже есть
+(anytime-поиск) и ход ИИ никогда не подвешивает игровой цикл.
+
+Действия плана:
+    ('move', unit_index, dx, dy)
+    ('reload', unit_index)
+    ('shoot', unit_index, target_index)
+где индексы - позиции юнитов в game_map.units на момент планирования.
+"""
+import math
+import time
+from core.constants import MAX_VISION_RANGE
+from core.exceptions import GameException
+from core.field_of_view import compute_fov
+from core.log import get_logger
+
+log = get_logger('ai')
+
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+# Веса оценки клетки
+KILL_BONUS = 40.0        # За ожидаемое убийство
+EXPOSURE_PENALTY = 3.0   # За каждого врага, который видит клетку
+APPROACH_WEIGHT = 0.5    # За каждый шаг до ближайшего врага
+
+def hit_probability(accuracy, distance):
+    """
+    Estimate the chance to hit a unit at distance with the accuracy cone of Bullet.
+    Отношение углового радиуса круга попадания к половине угла разброса.
+    """
+    if distance <= 0:
+        return 1.0
+    max_error_deg = (100 - accuracy) / 10 * max(1.0, distance / 5.0)
+    if max_error_deg <= 0:
+        return 1.0
+    return min(1.0, math.degrees(math.atan2(0.3, distance)) / max_error_deg)
+
+class BasicAI:
+    def __init__(self, faction="enemy", time_budget=0.05, vision_range=MAX_VISION_RANGE):
+        """
+        Args:
+            faction: Фракция, за которую играет ИИ
+            time_budget: Бюджет на планирование хода в секундах
+            vision_range: Дальность обзора (как у движка видимости)
+        """
+        self.faction = faction
+        self.time_budget = time_budget
+        self.vision_range = vision_range
+        self.last_stats = {}  # Статистика последнего планирования (для отладки и тестов)
+
+    # ===== PLANNING =====
+
+    def plan_turn(self, game_map, time_budget=None):
+        """Build the action list for the whole turn within the time budget."""
+        started = time.perf_counter()
+        deadline = started + (self.time_budget if time_budget is None else time_budget)
+        self.last_stats = {'tiles': 0, 'depth': 0, 'timed_out': False}
+
+        units = game_map.units
+        index = {unit: i for i, unit in enumerate(units)}
+        own = [unit for unit in units if unit.faction == self.faction and unit.hp > 0]
+        enemies = [unit for unit in units if unit.faction != self.faction and unit.hp > 0]
+        if not own or not enemies:
+            return []
+
+        # Поле зрения симметрично: враг виден с клетки, если клетка в поле зрения врага
+        enemy_fov = {enemy: compute_fov(game_map, enemy.x, enemy.y, self.vision_range) for enemy in enemies}
+        occupied = {(unit.x, unit.y) for unit in units if unit.hp > 0}
+        expected_hp = {enemy: enemy.hp for enemy in enemies}
+
+        actions = []
+        for n, unit in enumerate(own):
+            # Оставшееся время делим поровну между ещё не спланированными юнитами
+            now = time.perf_counter()
+            unit_deadline = now + max(0.0, deadline - now) / (len(own) - n)
+            occupied.discard((unit.x, unit.y))
+            plan, end_pos, damage = self._plan_unit(game_map, unit, enemies, enemy_fov,
+                                                    occupied, expected_hp, index, unit_deadline)
+            occupied.add(end_pos)
+            for target, amount in damage.items():
+                expected_hp[target] -= amount
+            actions.extend(plan)
+
+        self.last_stats['elapsed'] = time.perf_counter() - started
+        return actions
+
+    def _plan_unit(self, game_map, unit, enemies, enemy_fov, occupied, expected_hp, index, deadline):
+        """Iterative deepening over move count; returns (actions, final position, expected damage)."""
+        start = (unit.x, unit.y)
+        parents = {start: None}
+        best_score, best_pos, best_shots = self._evaluate(unit, start, unit.energy, enemies,
+                                                          enemy_fov, expected_hp)
+        frontier = [start]
+        depth = 0
+        while frontier and depth < unit.energy:
+            if time.perf_counter() >= deadline:
+                self.last_stats['timed_out'] = True
+                break
+            depth += 1
+            next_frontier = []
+            for x, y in frontier:
+                for dx, dy in DIRECTIONS:
+                    pos = (x + dx, y + dy)
+                    if pos in parents or pos in occupied or not game_map.is_walkable(*pos):
+                        continue
+                    parents[pos] = (x, y, dx, dy)
+                    next_frontier.append(pos)
+                    score, _, shots = self._evaluate(unit, pos, unit.energy - depth, enemies,
+                                                     enemy_fov, expected_hp)
+                    self.last_stats['tiles'] += 1
+                    if score > best_score:
+                        best_score, best_pos, best_shots = score, pos, shots
+            frontier = next_frontier
+            self.last_stats['depth'] = max(self.last_stats['depth'], depth)
+
+        # Восстанавливаем путь до лучшей клетки
+        moves = []
+        pos = best_pos
+        while parents[pos] is not None:
+            x, y, dx, dy = parents[pos]
+            moves.append(('move', index[unit], dx, dy))
+            pos = (x, y)
+        moves.reverse()
+
+        actions = moves
+        damage = {}
+        reload, targets = best_shots
+        if reload:
+            actions.append(('reload', index[unit]))
+        for target, count, amount in targets:
+            actions.extend([('shoot', index[unit], index[target])] * count)
+            damage[target] = amount
+        return actions, best_pos, damage
+
+    def _evaluate(self, unit, pos, energy, enemies, enemy_fov, expected_hp):
+        """
+        Score standing at pos with energy left.
+        Возвращает (оценка, pos, (нужна ли перезарядка, [(цель, выстрелов, ожидаемый урон)])).
+        """
+        x, y = pos
+        weapon = unit.equipped_weapon
+        exposure = 0
+        nearest = None
+        in_sight = []
+        for enemy in enemies:
+            distance = abs(enemy.x - x) + abs(enemy.y - y)
+            nearest = distance if nearest is None else min(nearest, distance)
+            if pos in enemy_fov[enemy]:
+                exposure += 1
+                if weapon and expected_hp[enemy] > 0 and distance <= weapon.max_range:
+                    in_sight.append((enemy, distance))
+
+        reload = False
+        shots_left = 0
+        if weapon:
+            ammo = weapon.ammo
+            if ammo <= 0 and energy > 0 and in_sight and self._find_ammo(unit):
+                reload = True
+                energy -= 1
+                ammo = weapon.max_ammo
+            shots_left = min(energy, ammo)
+
+        # Сначала добиваем тех, кого можно убить меньшим числом выстрелов
+        options = []
+        for enemy, distance in in_sight:
+            per_shot = hit_probability((unit.accuracy + weapon.accuracy) / 2, distance) * \
+                max(0, weapon.damage - enemy.armor)
+            if per_shot > 0:
+                options.append((math.ceil(expected_hp[enemy] / per_shot), per_shot, enemy))
+        options.sort(key=lambda option: option[0])
+
+        score = 0.0
+        targets = []
+        for shots_to_kill, per_shot, enemy in options:
+            if shots_left <= 0:
+                break
+            count = min(shots_left, shots_to_kill)
+            shots_left -= count
+            amount = min(expected_hp[enemy], count * per_shot)
+            score += amount
+            if count == shots_to_kill:
+                score += KILL_BONUS
+            targets.append((enemy, count, amount))
+
+        score -= EXPOSURE_PENALTY * exposure
+        score -= APPROACH_WEIGHT * (nearest or 0)
+        return score, pos, (reload and bool(targets), targets)
+
+    def _find_ammo(self, unit):
+        """Check if unit carries a magazine for its weapon (как в Unit.reload_weapon)."""
+        weapon = unit.equipped_weapon
+        return any(getattr(item, 'ammo_type', None) == weapon.ammo_type and
+                   getattr(item, 'ammo_count', 0) > 0 for item in unit.inventory)
+
+    # ===== EXECUTION =====
+
+    def resolve_actions(self, units, actions):
+        """
+        Replace unit indices with unit objects from units (game_map.units на момент планирования).
+        Индексы сдвигаются, когда юниты гибнут, а ссылки на объекты - нет.
+        """
+        resolved = []
+        for action in actions:
+            if action[0] == 'shoot':
+                resolved.append(('shoot', units[action[1]], units[action[2]]))
+            else:
+                resolved.append((action[0], units[action[1]]) + tuple(action[2:]))
+        return resolved
+
+    def apply_action(self, game_manager, action):
+        """
+        Apply one resolved action through Unit.move / Unit.reload_weapon / CombatSystem.create_bullet.
+        Возвращает False, если действие уже невозможно (цель мертва, путь занят и т.п.).
+        """
+        kind, unit = action[0], action[1]
+        game_map = game_manager.current_map
+        if unit.hp <= 0 or unit not in game_map.units:
+            return False
+        try:
+            if kind == 'move':
+                if not unit.move(action[2], action[3], game_map):
+                    return False
+            elif kind == 'reload':
+                unit.reload_weapon()
+            elif kind == 'shoot':
+                target = action[2]
+                if target.hp <= 0 or target not in game_map.units:
+                    return False
+                game_manager.can_attack_target(unit, target)
+                if not game_manager.combat_system.create_bullet(unit, target, unit.equipped_weapon):
+                    return False
+        except (GameException, ValueError) as e:
+            log.debug("ИИ пропускает действие %s: %s", kind, e)
+            return False
+        game_manager.update_line_of_sight()
+        return True
+
+    def take_turn(self, game_manager):
+        """Plan and play the whole turn at once, resolving bullets immediately (headless use)."""
+        game_map = game_manager.current_map
+        for action in self.resolve_actions(list(game_map.units), self.plan_turn(game_map)):
+            self.apply_action(game_manager, action)
+            while game_manager.combat_system.has_active_bullets():
+                game_manager.combat_system.update_bullets(game_map)
@@ -0,0 +1,132 @@
+# ai/turn_executor.py
+"""
+Планирование хода ИИ в фоновом потоке.
+
+Главный поток снимает неизменяемый снимок карты (MapView) и отдаёт его
+рабочему потоку вместе с ИИ. Поток строит план по снимку и кладёт его
+в очередь результатов; главный поток забирает готовый план в update()
+и применяет действия сам, так что игровое состояние меняет только он.
+Отмена (загрузка, сохранение, выход) увеличивает номер поколения -
+планы устаревших поколений молча выбрасываются.
+"""
+import queue
+import threading
+from typing import List, Optional, Tuple
+from core.constants import FLOOR_TILE
+from core.log import get_logger
+
+log = get_logger('ai')
+
+class ItemView:
+    """Read-only copy of an inventory item (только поля, нужные планировщику)."""
+    __slots__ = ('ammo_type', 'ammo_count')
+
+    def __init__(self, item):
+        self.ammo_type = getattr(item, 'ammo_type', None)
+        self.ammo_count = getattr(item, 'ammo_count', 0)
+
+class WeaponView:
+    """Read-only copy of a weapon."""
+    __slots__ = ('name', 'damage', 'accuracy', 'max_range', 'ammo', 'max_ammo', 'ammo_type')
+
+    def __init__(self, weapon):
+        for name in self.__slots__:
+            setattr(self, name, getattr(weapon, name))
+
+class UnitView:
+    """Read-only copy of a unit."""
+    __slots__ = ('unit_type', 'faction', 'x', 'y', 'hp', 'max_hp', 'energy', 'max_energy',
+                 'accuracy', 'armor', 'equipped_weapon', 'inventory')
+
+    def __init__(self, unit):
+        for name in self.__slots__[:-2]:
+            setattr(self, name, getattr(unit, name))
+        self.equipped_weapon = WeaponView(unit.equipped_weapon) if unit.equipped_weapon else None
+        self.inventory = tuple(ItemView(item) for item in unit.inventory)
+
+class MapView:
+    """
+    Immutable snapshot of a TestMap for planning.
+    Сетка копируется и помечается только для чтения; юниты - в том же порядке,
+    что и в game_map.units, поэтому индексы в плане совпадают с живыми юнитами.
+    """
+    def __init__(self, game_map):
+        self.width = game_map.width
+        self.height = game_map.height
+        self.grid = game_map.grid.copy()
+        self.grid.flags.writeable = False
+        self.units = tuple(UnitView(unit) for unit in game_map.units)
+
+    def is_walkable(self, x, y):
+        """Check if position is walkable"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return bool(self.grid[y, x] == FLOOR_TILE)
+        return False
+
+class AITurnExecutor:
+    def __init__(self):
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="ai-planner", daemon=True)
+            self._thread.start()
+
+    def submit(self, ai, game_map) -> int:
+        """Snapshot game_map on the calling (main) thread and queue a planning job."""
+        view = MapView(game_map)
+        live_units = list(game_map.units)
+        with self._lock:
+            generation = self._generation
+        self._ensure_thread()
+        self._requests.put((generation, ai, view, live_units))
+        return generation
+
+    def poll(self) -> Optional[List[Tuple]]:
+        """Return the resolved action list of the current job if it is ready, else None."""
+        while True:
+            try:
+                generation, actions = self._results.get_nowait()
+            except queue.Empty:
+                return None
+            if generation == self._generation:
+                return actions
+
+    def cancel(self) -> None:
+        """Discard queued and running jobs."""
+        with self._lock:
+            self._generation += 1
+        while True:
+            try:
+                self._requests.get_nowait()
+            except queue.Empty:
+                break
+
+    def shutdown(self, timeout=1.0) -> None:
+        """Cancel everything and stop the worker thread."""
+        self.cancel()
+        if self._thread is not None and self._thread.is_alive():
+            self._requests.put(None)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            job = self._requests.get()
+            if job is None:
+                return
+            generation, ai, view, live_units = job
+            if generation != self._generation:
+                continue
+            try:
+                actions = ai.plan_turn(view)
+            except Exception as e:
+                # Ошибка планирования не должна ронять игру: ИИ просто пропустит ход
+                log.exception("ИИ не смог спланировать ход: %s", e)
+                actions = []
+            # Индексы снимка -> живые юниты на момент снимка
+            self._results.put((generation, ai.resolve_actions(live_units, actions)))
@@ -0,0 +1,71 @@
+"""
+Общие данные бенчмарков: синтетические карты 15x15, 100x100 и 500x500.
+
+Простой `pytest` их не запускает (pytest.ini: testpaths = tests), каталог
+указывается явно. Запуск и сравнение между коммитами (результаты - JSON в .benchmarks/):
+    python -m pytest benchmarks --benchmark-autosave
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:10%
+Без установленного pytest-benchmark модули пропускаются.
+"""
+import os
+import random
+import numpy as np
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # draw_game без окна
+
+from core.constants import WALL_TILE
+from core.game_manager import GameManager
+from game_objects.weapon_definitions import create_test_weapons, create_test_ammo
+from maps.test_map import TestMap as GameMap  # псевдоним, чтобы pytest не собирал класс
+from units.unit import Unit
+
+# Сторона карты -> юнитов на фракцию
+MAP_SIZES = {15: 4, 100: 32, 500: 128}
+WALL_DENSITY = 0.15
+
+def build_map(size: int, units_per_faction: int = None, seed: int = 0) -> GameMap:
+    """Synthetic size x size map: random walls, armed units of both factions, loot on the floor."""
+    rng = random.Random(seed)
+    if units_per_faction is None:
+        units_per_faction = MAP_SIZES[size]
+    game_map = GameMap(size, size, rng=rng, loot_rng=rng)
+
+    grid = game_map.grid.copy()
+    walls = np.random.default_rng(seed).random(grid.shape) < WALL_DENSITY
+    for unit in game_map.units:
+        walls[unit.y, unit.x] = False
+    grid[walls] = WALL_TILE
+    game_map.set_grid(grid)
+
+    free = [(x, y) for y in range(1, size - 1) for x in range(1, size - 1)
+            if game_map.is_walkable(x, y) and not game_map.is_occupied(x, y)]
+    rng.shuffle(free)
+    for faction, unit_type in (("player", "average"), ("enemy", "enemy_average")):
+        have = sum(1 for unit in game_map.units if unit.faction == faction)
+        for _ in range(max(0, units_per_faction - have)):
+            x, y = free.pop()
+            unit = Unit(unit_type, x, y, faction=faction)
+            weapon = rng.choice(create_test_weapons())
+            unit.add_item(weapon)
+            unit.equip_weapon(weapon)
+            unit.add_item(rng.choice(create_test_ammo()))
+            game_map.add_unit(unit)
+    for _ in range(units_per_faction):
+        x, y = free.pop()
+        game_map.add_item({'type': 'weapon', 'x': x, 'y': y, 'object': rng.choice(create_test_weapons())})
+    return game_map
+
+def build_manager(size: int, **kwargs) -> GameManager:
+    """GameManager over a synthetic map, with line of sight computed."""
+    game_manager = GameManager()
+    game_manager.ai_controllers = {}
+    game_manager.current_map = build_map(size, **kwargs)
+    game_manager.game_state.current_map = game_manager.current_map
+    game_manager.visibility.reset(game_manager.current_map)
+    game_manager.update_line_of_sight()
+    return game_manager
+
+@pytest.fixture(params=sorted(MAP_SIZES), ids=lambda size: f"{size}x{size}")
+def map_size(request):
+    return request.param
@@ -0,0 +1,130 @@
+"""
+Бенчмарки горячих путей ядра: обзор, пули, сохранение и загрузка.
+"""
+import os
+import random
+import shutil
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from core.line_of_sight import LineOfSight
+from core.load_system import LoadSystem
+from core.save_system import SaveSystem
+from game_objects.bullet import Bullet, BulletPool
+from benchmarks.conftest import build_map, build_manager
+
+def test_has_line_of_sight(benchmark, map_size):
+    """Бенчмарк: 200 лучей Брезенхэма между случайными клетками (до 20 клеток)."""
+    game_map = build_map(map_size)
+    rng = random.Random(1)
+    pairs = []
+    for _ in range(200):
+        x1, y1 = rng.randrange(map_size), rng.randrange(map_size)
+        x2 = min(map_size - 1, max(0, x1 + rng.randint(-20, 20)))
+        y2 = min(map_size - 1, max(0, y1 + rng.randint(-20, 20)))
+        pairs.append((x1, y1, x2, y2))
+    los = LineOfSight()
+
+    def run():
+        return sum(los.has_line_of_sight(x1, y1, x2, y2, game_map) for x1, y1, x2, y2 in pairs)
+
+    benchmark(run)
+
+@pytest.mark.parametrize('units', [4, 32, 128])
+def test_update_line_of_sight_full(benchmark, units):
+    """Бенчмарк: полный пересчёт видимости на карте 100x100 при разном числе юнитов."""
+    game_manager = build_manager(100, units_per_faction=units)
+
+    def run():
+        game_manager.visibility.reset(game_manager.current_map)
+        game_manager.update_line_of_sight()
+
+    benchmark(run)
+
+def test_update_line_of_sight_step(benchmark, map_size):
+    """Бенчмарк: инкрементальный пересчёт после шага одного юнита (туда и обратно)."""
+    game_manager = build_manager(map_size)
+    game_map = game_manager.current_map
+    unit = next(u for u in game_map.units
+                if any(game_map.is_walkable(u.x + dx, u.y) and not game_map.is_occupied(u.x + dx, u.y)
+                       for dx in (1, -1)))
+    dx = 1 if game_map.is_walkable(unit.x + 1, unit.y) and not game_map.is_occupied(unit.x + 1, unit.y) else -1
+
+    def run():
+        for step in (dx, -dx):
+            old_x = unit.x
+            unit.x += step
+            game_map.on_unit_moved(unit, old_x, unit.y)
+            game_manager.update_line_of_sight()
+
+    benchmark(run)
+
+@pytest.mark.parametrize('burst', [10, 100, 500])
+def test_update_bullets_burst(benchmark, map_size, burst):
+    """Бенчмарк: очередь пуль (список объектов Bullet) летит до столкновения."""
+    game_manager = build_manager(map_size)
+    game_map = game_manager.current_map
+    combat = game_manager.combat_system
+    rng = random.Random(2)
+    shots = [rng.sample(game_map.units, 2) for _ in range(burst)]
+
+    def setup():
+        combat.clear_bullets()
+        for attacker, target in shots:
+            combat.bullets.append(Bullet(attacker.x + 0.5, attacker.y + 0.5, target.x + 0.5, target.y + 0.5,
+                                         0.5, 0, attacker, 100, rng=random.Random(3)))
+
+    def run():
+        while combat.has_active_bullets():
+            combat.update_bullets(game_map)
+
+    benchmark.pedantic(run, setup=setup, rounds=10)
+
+@pytest.mark.parametrize('burst', [10, 100, 500])
+def test_bullet_pool_burst(benchmark, map_size, burst):
+    """Бенчмарк: та же очередь пуль в пуле (структура массивов) на картах разного размера."""
+    game_map = build_map(map_size)
+    pool = BulletPool()
+    rng = random.Random(2)
+    shots = [rng.sample(game_map.units, 2) for _ in range(burst)]
+
+    def setup():
+        pool.clear()
+        for attacker, target in shots:
+            pool.spawn_bullet(Bullet(attacker.x + 0.5, attacker.y + 0.5, target.x + 0.5, target.y + 0.5,
+                                     0.5, 0, attacker, 100, rng=random.Random(3)))
+
+    def run():
+        while len(pool):
+            pool.step(game_map)
+
+    benchmark.pedantic(run, setup=setup, rounds=10)
+
+def test_save_game(benchmark, map_size, tmp_path):
+    """Бенчмарк: сохранение игры в файл."""
+    game_manager = build_manager(map_size)
+    save_system = SaveSystem(str(tmp_path))
+    benchmark.pedantic(save_system.save_game, args=(game_manager, "bench.rsg"), rounds=5)
+
+def test_load_game(benchmark, map_size, tmp_path):
+    """Бенчмарк: чтение сохранения и восстановление состояния."""
+    game_manager = build_manager(map_size)
+    save_system = SaveSystem(str(tmp_path))
+    path = save_system.save_game(game_manager, "bench.rsg")
+    load_system = LoadSystem()
+
+    def run():
+        load_system.restore_game(save_system.load_game(path), game_manager)
+
+    benchmark.pedantic(run, rounds=5)
+
+def test_list_saves(benchmark, tmp_path):
+    """Бенчмарк: список из 300 сохранений карты 100x100."""
+    save_system = SaveSystem(str(tmp_path))
+    first = save_system.save_game(build_manager(100), "save_000.rsg")
+    for index in range(1, 300):
+        shutil.copy(first, os.path.join(str(tmp_path), f"save_{index:03d}.rsg"))
+
+    saves = benchmark(save_system.list_saves)
+    assert len(saves) == 300
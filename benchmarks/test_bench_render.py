@@ -0,0 +1,49 @@
+"""
+Бенчмарк кадра отрисовки без окна (SDL_VIDEODRIVER=dummy).
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pygame = pytest.importorskip("pygame")
+
+from benchmarks.conftest import build_map
+
+@pytest.fixture
+def game():
+    from core.game import Game
+    game = Game()
+    yield game
+    game.game_manager.shutdown()
+
+def test_draw_game_frame(benchmark, game, map_size):
+    """Бенчмарк: один кадр draw_game (карта, туман, юниты, HUD)."""
+    game_manager = game.game_manager
+    game_manager.current_map = build_map(map_size)
+    game_manager.game_state.current_map = game_manager.current_map
+    game_manager.game_state.state = 'game'
+    game.attach_sprite_loader()
+    game_manager.visibility.reset(game_manager.current_map)
+    game_manager.update_line_of_sight()
+    game_manager.select_unit(game_manager.current_map.units[0])
+
+    benchmark(game.draw_game)
+
+def test_draw_terrain_zoom_transition(benchmark, game):
+    """Бенчмарк: слой местности на всём плавном зуме 1x -> 2x (карта 100x100)."""
+    game_manager = game.game_manager
+    game_map = build_map(100)
+    game_manager.current_map = game_map
+    game.attach_sprite_loader()
+    camera = game_manager.camera
+
+    def setup():
+        camera.zoom = camera.smooth_zoom = camera.target_zoom = 1.0
+        game.terrain_layer.draw(game.screen, game_map, camera)
+        camera.set_zoom(2.0)
+
+    def run():
+        while camera.is_zooming():
+            camera.update()
+            game.terrain_layer.draw(game.screen, game_map, camera)
+
+    benchmark.pedantic(run, setup=setup, rounds=5)
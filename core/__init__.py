@@ -1,14 +1,33 @@
 # core/__init__.py
-from .game import Game
-from .sprite_loader import SpriteLoader
-from .game_manager import GameManager
-from .input_handler import InputHandler
-from .combat_system import CombatSystem
-from .line_of_sight import LineOfSight
-from .save_system import SaveSystem
-from .load_system import LoadSystem
+"""
+Ядро игры.
+
+Классы подгружаются лениво (PEP 562): `import core` и импорт модулей
+симуляции не тянут pygame - он нужен только Game, InputHandler и SpriteLoader.
+"""
+from importlib import import_module
 from .exceptions import *
 
+# Имя экспортируемого класса -> модуль пакета, где он определён
+_LAZY_EXPORTS = {
+    'Game': '.game',
+    'SpriteLoader': '.sprite_loader',
+    'GameManager': '.game_manager',
+    'InputHandler': '.input_handler',
+    'CombatSystem': '.combat_system',
+    'LineOfSight': '.line_of_sight',
+    'SaveSystem': '.save_system',
+    'LoadSystem': '.load_system',
+}
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 __all__ = [
     'Game',
     'SpriteLoader',
@@ -25,5 +44,7 @@ __all__ = [
     'InventoryFullException',
     'UnitNotFoundException',
     'NotYourTurnException',
-    'TargetNotVisibleException'
-]
\ No newline at end of file
+    'TargetNotVisibleException',
+    'ReplayFormatException',
+    'SaveFormatException'
+]
@@ -6,6 +6,9 @@ import threading
 import time
 from datetime import datetime
 from core.save_system import SaveSystem
+from core.log import get_logger
+
+log = get_logger('save')
 
 class AutosaveSystem:
     def __init__(self, game_manager, interval=300):
@@ -28,14 +31,14 @@ class AutosaveSystem:
         self.running = True
         self.thread = threading.Thread(target=self._autosave_loop, daemon=True)
         self.thread.start()
-        print(f"Автопсохранение запущено (интервал: {self.interval} сек)")
+        log.info("Автосохранение запущено (интервал: %s сек)", self.interval)
     
     def stop(self):
         """Останавливает систему автопсохранения."""
         self.running = False
         if self.thread:
             self.thread.join(timeout=2.0)
-        print("Автопсохранение остановлено")
+        log.info("Автосохранение остановлено")
     
     def _autosave_loop(self):
         """Цикл автопсохранения."""
@@ -50,9 +53,9 @@ class AutosaveSystem:
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     filename = f"autosave_{timestamp}.rsg"
                     self.save_system.save_game(self.game_manager, filename)
-                    print(f"Автосохранение: {filename}")
+                    log.info("Автосохранение: %s", filename)
                 except Exception as e:
-                    print(f"Ошибка автосохранения: {e}")
+                    log.exception("Ошибка автосохранения: %s", e)
     
     def save_now(self):
         """Немедленное сохранение."""
@@ -63,5 +66,5 @@ class AutosaveSystem:
                 self.save_system.save_game(self.game_manager, filename)
                 return filename
             except Exception as e:
-                print(f"Ошибка немедленного сохранения: {e}")
+                log.exception("Ошибка немедленного сохранения: %s", e)
         return None
\ No newline at end of file
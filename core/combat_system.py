@@ -1,42 +1,101 @@
 # core/combat_system.py
-import pygame
+import logging
 import math
+import random
 from typing import List, Optional, Tuple
-from game_objects.bullet import Bullet
+from game_objects.bullet import Bullet, BulletPool, aim_direction, resolve_trajectory
 from units.unit import Unit
 from maps.test_map import TestMap
-from core.constants import TILE_SIZE
+from core.events import ShotFired, BulletHit, UnitDied
+from core.constants import TILE_SIZE, BULLET_SPEED, BULLET_MAX_RANGE
+from core.log import get_logger
+
+log = get_logger('combat')
 
 class CombatSystem:
-    def __init__(self):
+    def __init__(self, bullet_pool: Optional[BulletPool] = None, rng=None, events=None):
         self.bullets: List[Bullet] = []
+        # Шина событий (core.events.EventBus); None - события не публикуются
+        self.events = events
+        # Поток случайных чисел для разброса (core.rng: поток 'combat'); None - глобальный random
+        self.rng = rng if rng is not None else random
+        # Если задан пул, новые пули живут в нём (векторное обновление), а не в self.bullets.
+        # Пул включается явно: выигрыш он даёт лишь на больших залпах, игра использует список
+        self.bullet_pool = bullet_pool
+        # Записанные траектории мгновенных выстрелов, проигрываемые рендером: [path, индекс тика]
+        self.shot_playbacks: List[list] = []
     
     def create_bullet(self, attacker: Unit, target: Unit, weapon) -> Optional[Bullet]:
         """Create a bullet for an attack."""
-        # Проверяем, может ли атакующий стрелять
-        if not self._can_shoot(attacker, weapon):
+        if not self._consume_shot(attacker, weapon):
             return None
         
-        # Вычитаем патроны и энергию
-        weapon.ammo -= 1
-        attacker.energy -= 1
-        
-        print(f"{attacker.unit_type} стреляет! Патроны: {weapon.ammo}/{weapon.max_ammo}, Энергия: {attacker.energy}/{attacker.max_energy}")
+        self._publish_shot(attacker, target, weapon)
         
         # Создаем пулю
         bullet = self._create_bullet_object(attacker, target, weapon)
-        self.bullets.append(bullet)
+        if self.bullet_pool is not None:
+            self.bullet_pool.spawn_bullet(bullet)
+        else:
+            self.bullets.append(bullet)
         
         return bullet
     
+    def resolve_shot_immediately(self, attacker: Unit, target: Unit, weapon, game_map: TestMap,
+                                 record_path: bool = False) -> Optional[Tuple[str, object, Optional[list]]]:
+        """
+        Resolve a shot in a single call without animating a bullet.
+        Разброс тот же, что у Bullet; патроны, энергия и урон применяются сразу.
+        Возвращает (result, value, path) как resolve_trajectory или None, если выстрел невозможен.
+        При record_path=True path - позиции пули по тикам (для play_shot_path).
+        """
+        if not self._consume_shot(attacker, weapon):
+            return None
+        self._publish_shot(attacker, target, weapon)
+        
+        start_x = attacker.x + 0.5
+        start_y = attacker.y + 0.5
+        accuracy = (attacker.accuracy + weapon.accuracy) / 2
+        vx, vy = aim_direction(start_x, start_y, target.x + 0.5, target.y + 0.5, accuracy, self.rng)
+        result, value, path = resolve_trajectory(game_map, start_x, start_y, vx, vy,
+                                                 BULLET_MAX_RANGE, Bullet.COLLISION_RADIUS, attacker,
+                                                 step=BULLET_SPEED if record_path else None)
+        
+        if result == 'hit_unit':
+            self._apply_hit(attacker, weapon.damage, value, game_map)
+        return result, value, path
+    
+    def play_shot_path(self, path: list) -> None:
+        """Queue a recorded shot path to be animated like a bullet (damage is already applied)."""
+        if path:
+            self.shot_playbacks.append([path, 0])
+    
+    def _consume_shot(self, attacker: Unit, weapon) -> bool:
+        """Check that attacker can shoot and spend ammo and energy."""
+        # Проверяем, может ли атакующий стрелять
+        if not self._can_shoot(attacker, weapon):
+            return False
+        
+        # Вычитаем патроны и энергию
+        weapon.ammo -= 1
+        attacker.energy -= 1
+        
+        log.debug("%s стреляет! Патроны: %d/%d, Энергия: %d/%d", attacker.unit_type,
+                  weapon.ammo, weapon.max_ammo, attacker.energy, attacker.max_energy)
+        return True
+    
+    def _publish_shot(self, attacker: Unit, target: Unit, weapon) -> None:
+        if self.events is not None and self.events.wants(ShotFired):
+            self.events.publish(ShotFired(attacker, target, weapon))
+    
     def _can_shoot(self, attacker: Unit, weapon) -> bool:
         """Check if attacker can shoot."""
         if weapon.ammo <= 0:
-            print("Нет патронов!")
+            log.debug("Нет патронов!")
             return False
         
         if attacker.energy <= 0:
-            print("Недостаточно энергии для атаки!")
+            log.debug("Недостаточно энергии для атаки!")
             return False
         
         return True
@@ -50,7 +109,7 @@ class CombatSystem:
         target_y = target.y + 0.5
         
         # Параметры пули
-        bullet_speed = 0.5  # Тайлов в тик
+        bullet_speed = BULLET_SPEED  # Тайлов в тик
         bullet_damage = weapon.damage
         bullet_accuracy = (attacker.accuracy + weapon.accuracy) / 2  # Средняя точность
         
@@ -62,74 +121,120 @@ class CombatSystem:
             speed=bullet_speed,
             damage=bullet_damage,
             attacker_unit=attacker,
-            accuracy=bullet_accuracy
+            accuracy=bullet_accuracy,
+            rng=self.rng
         )
     
     def update_bullets(self, game_map: TestMap) -> None:
         """Update all bullets and handle collisions."""
-        bullets_to_remove = []
+        remaining = []
         
-        for bullet in self.bullets[:]:  # Используем копию для безопасного удаления
-            collision_result = bullet.update(game_map, game_map.units)
+        for bullet in self.bullets:
+            collision_result = bullet.update(game_map)
             
             if collision_result[0] == 'hit_unit':
                 hit_unit = collision_result[1]
                 self._handle_unit_hit(bullet, hit_unit, game_map)
-                bullets_to_remove.append(bullet)
             elif collision_result[0] == 'hit_wall':
                 hit_position = collision_result[1]
-                print(f"Пуля попала в стену в {hit_position}")
-                bullets_to_remove.append(bullet)
+                log.debug("Пуля попала в стену в %s", hit_position)
             elif collision_result[0] == 'miss' and collision_result[1] is not None:
                 # Пуля пролетела максимальную дистанцию
                 miss_position = collision_result[1]
-                print(f"Пуля пролетела мимо, упала в {miss_position}")
-                bullets_to_remove.append(bullet)
-            # Если результат 'miss' с None, пуля продолжает лететь
-        
-        # Удаляем обработанные пули
-        for bullet in bullets_to_remove:
-            if bullet in self.bullets:
-                self.bullets.remove(bullet)
+                log.debug("Пуля пролетела мимо, упала в %s", miss_position)
+            else:
+                # Если результат 'miss' с None, пуля продолжает лететь
+                remaining.append(bullet)
+        
+        # Уплотняем список за один проход вместо remove() для каждой пули
+        self.bullets[:] = remaining
+
+        if self.bullet_pool is not None:
+            self._update_pool(game_map)
+        
+        # Продвигаем проигрываемые траектории на один тик
+        for playback in self.shot_playbacks:
+            playback[1] += 1
+        self.shot_playbacks[:] = [p for p in self.shot_playbacks if p[1] < len(p[0])]
+
+    def _update_pool(self, game_map: TestMap) -> None:
+        """Advance pooled bullets and handle collisions."""
+        for _slot, (result, value), attacker, damage in self.bullet_pool.step(game_map):
+            if result == 'hit_unit':
+                # Пули одного тика трассируются до нанесения урона: цель могла пасть от предыдущей
+                if value.hp <= 0 or value not in game_map.units:
+                    log.debug("Пуля попала в уже павшего юнита %s", value.unit_type)
+                    continue
+                self._apply_hit(attacker, damage, value, game_map)
+            elif result == 'hit_wall':
+                log.debug("Пуля попала в стену в %s", value)
+            else:
+                log.debug("Пуля пролетела мимо, упала в %s", value)
     
     def _handle_unit_hit(self, bullet: Bullet, hit_unit: Unit, game_map: TestMap) -> None:
         """Handle bullet hitting a unit."""
+        self._apply_hit(bullet.attacker, bullet.damage, hit_unit, game_map)
+
+    def _apply_hit(self, attacker: Unit, damage: int, hit_unit: Unit, game_map: TestMap) -> None:
+        """Apply damage from attacker's shot to hit_unit."""
         # Убеждаемся, что это не стреляющий юнит (двойная проверка)
-        if hit_unit == bullet.attacker:
-            print(f"ОШИБКА: Пуля попала в стреляющего юнита!")
+        if hit_unit == attacker:
+            log.error("Пуля попала в стреляющего юнита %s", attacker.unit_type)
             return
         
         # Наносим урон
-        damage_dealt = max(0, bullet.damage - hit_unit.armor)
+        damage_dealt = max(0, damage - hit_unit.armor)
         actual_damage = hit_unit.take_damage(damage_dealt)
         
         # Определяем, был ли это союзник или враг
-        relation = "врага" if hit_unit.faction != bullet.attacker.faction else "союзника"
-        print(f"Пуля попала в {relation} {hit_unit.unit_type} и нанесла {actual_damage} урона. HP: {hit_unit.hp}/{hit_unit.max_hp}")
+        if log.isEnabledFor(logging.DEBUG):
+            relation = "врага" if hit_unit.faction != attacker.faction else "союзника"
+            log.debug("Пуля попала в %s %s и нанесла %d урона. HP: %d/%d", relation,
+                      hit_unit.unit_type, actual_damage, hit_unit.hp, hit_unit.max_hp)
+        if self.events is not None and self.events.wants(BulletHit):
+            self.events.publish(BulletHit(attacker, hit_unit, actual_damage))
         
         # Проверяем смерть юнита
         if hit_unit.hp <= 0:
-            self._handle_unit_death(hit_unit, game_map)
+            self._handle_unit_death(hit_unit, game_map, attacker)
     
-    def _handle_unit_death(self, unit: Unit, game_map: TestMap) -> None:
+    def _handle_unit_death(self, unit: Unit, game_map: TestMap, killer: Optional[Unit] = None) -> None:
         """Handle unit death."""
-        print(f"{unit.unit_type} повержен!")
+        log.info("%s повержен!", unit.unit_type)
+        if self.events is not None and self.events.wants(UnitDied):
+            self.events.publish(UnitDied(unit, killer, unit.x, unit.y))
         
         # Создаем труп
         game_map.create_corpse(unit)
         
-        # Удаляем юнита из списка
-        game_map.units.remove(unit)
+        # Удаляем юнита с карты (и из сетки занятости)
+        game_map.remove_unit(unit)
     
     def draw_bullets(self, screen, camera, sprite_loader) -> None:
         """Draw all bullets."""
         for bullet in self.bullets:
             bullet.draw(screen, camera, sprite_loader, TILE_SIZE)
+        if self.bullet_pool is not None:
+            self.bullet_pool.draw(screen, camera, TILE_SIZE)
+        for path, index in self.shot_playbacks:
+            self._draw_path_segment(screen, camera, path[max(0, index - 1)], path[index])
+    
+    def _draw_path_segment(self, screen, camera, start, end) -> None:
+        """Draw a recorded bullet position with a tracer from the previous tick."""
+        import pygame  # Только для отрисовки: симуляция работает без pygame
+        points = [(int((x * TILE_SIZE - camera.x) * camera.zoom), int((y * TILE_SIZE - camera.y) * camera.zoom))
+                  for x, y in (start, end)]
+        pygame.draw.line(screen, (255, 200, 0), points[0], points[1], 1)
+        pygame.draw.circle(screen, (255, 255, 0), points[1], int(3 * camera.zoom))
     
     def clear_bullets(self) -> None:
         """Clear all bullets (e.g., when returning to menu)."""
         self.bullets.clear()
+        self.shot_playbacks.clear()
+        if self.bullet_pool is not None:
+            self.bullet_pool.clear()
     
     def has_active_bullets(self) -> bool:
         """Check if there are any active bullets."""
-        return len(self.bullets) > 0
\ No newline at end of file
+        return (len(self.bullets) > 0 or len(self.shot_playbacks) > 0
+                or (self.bullet_pool is not None and len(self.bullet_pool) > 0))
\ No newline at end of file
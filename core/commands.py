@@ -0,0 +1,177 @@
+# core/commands.py
+"""
+Команды игрока и журнал отмены/повтора.
+
+Каждое действие игрока (шаг, переход по клику, выстрел, перезарядка,
+а также подбор/экипировка/выброс через меню) оформлено как маленькая
+команда с параметрами. Обратимость даёт снимок состояния (core.snapshot),
+сделанный перед командой: выстрел случаен и его итог известен только
+когда пуля долетит, поэтому вместо ручной обратной операции для каждой
+команды откатываем к снимку. Повтор (redo) возвращает ровно тот итог,
+который был отменён, а не бросает кости заново.
+
+Снимки соседних записей делят неизменённые части, а журнал хранит
+записи, пока их суммарная оценка размера не превысит лимит памяти -
+самые старые выбрасываются первыми.
+"""
+from collections import deque
+from typing import Optional
+from core import snapshot as snapshots
+from core.constants import UNDO_MEMORY_LIMIT
+from core.exceptions import GameException
+
+class Command:
+    """A player action that can be undone through CommandLog."""
+    name = 'command'
+
+    def execute(self, game_manager):
+        """Apply the action. Returns a falsy value if nothing happened."""
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return self.name
+
+class MoveCommand(Command):
+    name = 'move'
+
+    def __init__(self, dx: int, dy: int):
+        self.dx = dx
+        self.dy = dy
+
+    def execute(self, game_manager):
+        return game_manager.move_unit(self.dx, self.dy)
+
+    def describe(self) -> str:
+        return f"шаг ({self.dx}, {self.dy})"
+
+class MoveToCommand(Command):
+    name = 'move_to'
+
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+
+    def execute(self, game_manager):
+        return game_manager.move_unit_to(self.x, self.y)
+
+    def describe(self) -> str:
+        return f"переход на ({self.x}, {self.y})"
+
+class ShootCommand(Command):
+    name = 'shoot'
+
+    def __init__(self, attacker, target):
+        self.attacker = attacker
+        self.target = target
+
+    def execute(self, game_manager):
+        game_manager.can_attack_target(self.attacker, self.target)
+        bullet = game_manager.combat_system.create_bullet(
+            self.attacker, self.target, self.attacker.equipped_weapon)
+        if bullet:
+            game_manager.update_line_of_sight()
+        return bullet
+
+    def describe(self) -> str:
+        return f"выстрел по {self.target.unit_type}"
+
+class ReloadCommand(Command):
+    name = 'reload'
+
+    def __init__(self, unit):
+        self.unit = unit
+
+    def execute(self, game_manager):
+        return self.unit.reload_weapon()
+
+    def describe(self) -> str:
+        return "перезарядка"
+
+class MenuCommand(Command):
+    """An inventory/pickup action already applied by a menu (записывается через CommandLog.record)."""
+    name = 'menu'
+
+    def __init__(self, menu_name: str):
+        self.menu_name = menu_name
+
+    def execute(self, game_manager):
+        raise GameException("Действие меню нельзя выполнить повторно напрямую")
+
+    def describe(self) -> str:
+        return f"действие в меню ({self.menu_name})"
+
+class CommandLog:
+    def __init__(self, memory_limit: int = UNDO_MEMORY_LIMIT):
+        """
+        Args:
+            memory_limit: Лимит оценочного размера снимков в байтах
+        """
+        self.memory_limit = memory_limit
+        self.memory_used = 0
+        self._undo = deque()  # (команда, снимок до, оценка размера)
+        self._redo = []       # (команда, снимок после)
+
+    def __len__(self):
+        return len(self._undo)
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self) -> None:
+        """Forget all history (new turn, new game, load)."""
+        self._undo.clear()
+        self._redo.clear()
+        self.memory_used = 0
+
+    def begin(self, game_manager) -> snapshots.GameSnapshot:
+        """Snapshot the state before an action (shared with the newest history entry)."""
+        previous = self._undo[-1][1] if self._undo else None
+        return snapshots.capture(game_manager, previous)
+
+    def execute(self, game_manager, command: Command):
+        """Run command and remember how to undo it. Exceptions of the command propagate."""
+        before = self.begin(game_manager)
+        result = command.execute(game_manager)
+        if result:
+            self.record(game_manager, command, before)
+        return result
+
+    def record(self, game_manager, command: Command, before: snapshots.GameSnapshot) -> bool:
+        """Remember an action that has already been applied; skipped if it changed nothing."""
+        if snapshots.unchanged(before, snapshots.capture(game_manager, before)):
+            return False
+        previous = self._undo[-1][1] if self._undo else None
+        size = snapshots.estimate_size(before, previous)
+        self._undo.append((command, before, size))
+        self.memory_used += size
+        self._redo.clear()
+        # Выбрасываем самые старые записи, но последнюю оставляем всегда
+        while self.memory_used > self.memory_limit and len(self._undo) > 1:
+            self.memory_used -= self._undo.popleft()[2]
+        return True
+
+    def undo(self, game_manager) -> Optional[Command]:
+        """Return to the state before the last command. Returns the undone command or None."""
+        if not self._undo:
+            return None
+        command, before, size = self._undo.pop()
+        self.memory_used -= size
+        self._redo.append((command, snapshots.capture(game_manager, before)))
+        game_manager.restore_snapshot(before)
+        return command
+
+    def redo(self, game_manager) -> Optional[Command]:
+        """Re-apply the last undone command with exactly the same outcome."""
+        if not self._redo:
+            return None
+        command, after = self._redo.pop()
+        previous = self._undo[-1][1] if self._undo else None
+        before = snapshots.capture(game_manager, previous)
+        size = snapshots.estimate_size(before, previous)
+        self._undo.append((command, before, size))
+        self.memory_used += size
+        game_manager.restore_snapshot(after)
+        return command
@@ -5,6 +5,9 @@
 import json
 import os
 from typing import Dict, Any
+from core.log import get_logger
+
+log = get_logger('config')
 
 class GameConfig:
     def __init__(self, config_file="config/game_config.json"):
@@ -67,11 +70,11 @@ class GameConfig:
                     loaded_config = json.load(f)
                     # Рекурсивное обновление конфигурации
                     self._update_dict(self.config, loaded_config)
-                print(f"Конфигурация загружена из {self.config_file}")
+                log.info("Конфигурация загружена из %s", self.config_file)
             except Exception as e:
-                print(f"Ошибка загрузки конфигурации: {e}. Используются настройки по умолчанию.")
+                log.warning("Ошибка загрузки конфигурации: %s. Используются настройки по умолчанию.", e)
         else:
-            print("Конфигурационный файл не найден. Используются настройки по умолчанию.")
+            log.info("Конфигурационный файл не найден. Используются настройки по умолчанию.")
             self.save()  # Создаем файл с настройками по умолчанию
     
     def save(self):
@@ -80,9 +83,9 @@ class GameConfig:
             os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(self.config, f, indent=2, ensure_ascii=False)
-            print(f"Конфигурация сохранена в {self.config_file}")
+            log.info("Конфигурация сохранена в %s", self.config_file)
         except Exception as e:
-            print(f"Ошибка сохранения конфигурации: {e}")
+            log.warning("Ошибка сохранения конфигурации: %s", e)
     
     def get(self, key_path: str, default=None):
         """Получает значение по пути ключей (например, 'game.fps')."""
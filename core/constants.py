@@ -4,6 +4,20 @@ SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 TILE_SIZE = 40
 
+# Tiles
+FLOOR_TILE = 0
+WALL_TILE = 1
+TILE_SPRITES = {
+    FLOOR_TILE: 'floor.png',
+    WALL_TILE: 'wall.png'
+}
+TERRAIN_CHUNK_SIZE = 8  # Размер чанка слоя местности в тайлах
+TILE_CHANGE_LOG_LIMIT = 4096  # Предел журнала изменённых клеток карты (отставшие кэши пересчитываются целиком)
+
+# Sprite cache
+SPRITE_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Лимит памяти под отмасштабированные спрайты
+SPRITE_SIZE_STEP = 2  # Шаг квантования размера спрайта при плавном зуме (в пикселях)
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -53,3 +67,30 @@ COMBAT_STATE_ATTACKING = 'attacking'
 MAX_VISION_RANGE = 10  # Максимальная дальность обзора
 VISIBLE_COLOR = (255, 255, 255, 180)  # Цвет видимых тайлов
 FOG_OF_WAR_COLOR = (50, 50, 50, 200)  # Цвет тумана войны
+REACHABLE_COLOR = (80, 160, 255, 60)  # Подсветка клеток, достижимых выбранным юнитом
+
+# Bullets
+BULLET_SPEED = 5.0  # Тайлов в тик (клетки отрезка проверяются обходом сетки)
+BULLET_MAX_RANGE = 50  # Максимальная дальность полёта пули в тайлах
+
+# Undo
+UNDO_MEMORY_LIMIT = 4 * 1024 * 1024  # Лимит памяти журнала отмены (оценка по снимкам)
+
+# Replays
+REPLAY_KEYFRAME_INTERVAL = 64  # Ключевой кадр каждые N записей (для перемотки и проверки рассинхрона)
+REPLAY_ACTIONS_PER_SECOND = 4.0  # Скорость проигрывания реплея в окне при speed=1
+
+# Logging
+# Уровни подсистем в релизном режиме (горячие пути молчат и ничего не форматируют)
+LOG_LEVELS = {'game': 'INFO', 'combat': 'WARNING', 'los': 'WARNING', 'ai': 'INFO', 'map': 'INFO',
+              'save': 'INFO', 'replay': 'INFO', 'ui': 'INFO', 'sim': 'WARNING', 'config': 'INFO'}
+LOG_RING_BUFFER_SIZE = 500  # Сколько последних записей выгружать при ошибке
+LOG_RATE_LIMIT = 20  # Не больше N одинаковых сообщений в консоль за секунду
+
+# Profiler
+PROFILER_WINDOW = 300  # Кадров в скользящем окне перцентилей (~5 с при 60 FPS)
+PROFILER_TRACE_LIMIT = 50000  # Сколько последних замеров хранить для экспорта
+PROFILER_OVERLAY_REFRESH = 0.25  # Период перерисовки оверлея, с
+
+# Saves
+SAVE_COMPRESSION_LEVEL = 1  # Быстрый уровень zlib: сетка и так жмётся в десятки раз
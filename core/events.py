@@ -0,0 +1,163 @@
+# core/events.py
+"""
+Шина игровых событий.
+
+Системы публикуют типизированные события (перемещение, выстрел, попадание,
+смерть, конец хода, подбор предмета), а подписчики - UI, аналитика,
+запись в файл - получают их, не разбирая отладочный вывод.
+
+Публикация дешёвая: обработчики хранятся в кортежах по классу события,
+а издатель сначала спрашивает wants() и не создаёт объект события, если
+его никто не слушает. Сток (sink) получает все события подряд; JsonLinesSink
+копит их в буфере и дописывает в файл по одной JSON-строке на событие.
+"""
+import json
+import time
+from typing import Callable, Dict, List, Tuple, Type
+
+class Event:
+    """Base class of game events; __slots__ lists the payload fields."""
+    __slots__ = ()
+    type = 'event'
+
+    def to_dict(self) -> dict:
+        """Plain JSON-friendly representation (юниты и предметы - кратким описанием)."""
+        data = {'type': self.type}
+        for name in self.__slots__:
+            data[name] = _plain(getattr(self, name))
+        return data
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+def _plain(value):
+    if hasattr(value, 'unit_type'):
+        return {'unit_type': value.unit_type, 'faction': value.faction, 'x': value.x, 'y': value.y}
+    if hasattr(value, 'name') and not isinstance(value, (str, int, float)):
+        return value.name
+    return value
+
+class UnitMoved(Event):
+    __slots__ = ('unit', 'from_x', 'from_y', 'x', 'y')
+    type = 'unit_moved'
+
+    def __init__(self, unit, from_x, from_y, x, y):
+        self.unit = unit
+        self.from_x = from_x
+        self.from_y = from_y
+        self.x = x
+        self.y = y
+
+class ShotFired(Event):
+    __slots__ = ('attacker', 'target', 'weapon')
+    type = 'shot_fired'
+
+    def __init__(self, attacker, target, weapon):
+        self.attacker = attacker
+        self.target = target
+        self.weapon = weapon
+
+class BulletHit(Event):
+    """A bullet hit a unit (target) and dealt damage."""
+    __slots__ = ('attacker', 'target', 'damage')
+    type = 'bullet_hit'
+
+    def __init__(self, attacker, target, damage):
+        self.attacker = attacker
+        self.target = target
+        self.damage = damage
+
+class UnitDied(Event):
+    __slots__ = ('unit', 'killer', 'x', 'y')
+    type = 'unit_died'
+
+    def __init__(self, unit, killer, x, y):
+        self.unit = unit
+        self.killer = killer
+        self.x = x
+        self.y = y
+
+class TurnEnded(Event):
+    __slots__ = ('faction', 'next_faction')
+    type = 'turn_ended'
+
+    def __init__(self, faction, next_faction):
+        self.faction = faction
+        self.next_faction = next_faction
+
+class ItemPicked(Event):
+    __slots__ = ('unit', 'item', 'x', 'y')
+    type = 'item_picked'
+
+    def __init__(self, unit, item, x, y):
+        self.unit = unit
+        self.item = item
+        self.x = x
+        self.y = y
+
+class EventBus:
+    def __init__(self):
+        # Кортежи, а не списки: подписка во время публикации не ломает обход
+        self._handlers: Dict[Type[Event], Tuple[Callable, ...]] = {}
+        self._sinks: Tuple[Callable, ...] = ()
+
+    def subscribe(self, event_type: Type[Event], handler: Callable) -> None:
+        """Call handler(event) for every published event of event_type."""
+        self._handlers[event_type] = self._handlers.get(event_type, ()) + (handler,)
+
+    def unsubscribe(self, event_type: Type[Event], handler: Callable) -> None:
+        handlers = tuple(h for h in self._handlers.get(event_type, ()) if h != handler)
+        if handlers:
+            self._handlers[event_type] = handlers
+        else:
+            self._handlers.pop(event_type, None)
+
+    def add_sink(self, sink: Callable) -> None:
+        """Add a sink that receives every event."""
+        self._sinks += (sink,)
+
+    def remove_sink(self, sink: Callable) -> None:
+        self._sinks = tuple(s for s in self._sinks if s != sink)
+
+    def wants(self, event_type: Type[Event]) -> bool:
+        """Check if anybody listens to event_type (чтобы не создавать событие впустую)."""
+        return bool(self._sinks) or event_type in self._handlers
+
+    def publish(self, event: Event) -> None:
+        for handler in self._handlers.get(type(event), ()):
+            handler(event)
+        for sink in self._sinks:
+            sink(event)
+
+class JsonLinesSink:
+    def __init__(self, path: str, buffer_size: int = 256):
+        """
+        Args:
+            path: Файл .jsonl (дописывается)
+            buffer_size: Сколько событий копить перед записью на диск
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer: List[str] = []
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __call__(self, event: Event) -> None:
+        # В строку превращаем сразу: к моменту сброса юниты уже могут сдвинуться
+        data = event.to_dict()
+        data['time'] = round(time.time(), 3)
+        self._buffer.append(json.dumps(data, ensure_ascii=False))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered events to the file."""
+        if self._buffer and not self._file.closed:
+            self._buffer.append('')
+            self._file.write('\n'.join(self._buffer))
+            self._file.flush()
+            self._buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
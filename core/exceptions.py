@@ -41,4 +41,13 @@ class NotYourTurnException(GameException):
 class TargetNotVisibleException(GameException):
     """Цель не видна"""
     def __init__(self, target_x, target_y):
-        super().__init__(f"Цель на позиции ({target_x}, {target_y}) не видна")
\ No newline at end of file
+        super().__init__(f"Цель на позиции ({target_x}, {target_y}) не видна")
+class ReplayFormatException(GameException):
+    """Файл реплея повреждён или в неизвестном формате"""
+    def __init__(self, reason):
+        super().__init__(f"Некорректный реплей: {reason}")
+
+class SaveFormatException(GameException):
+    """Файл сохранения повреждён или записан неизвестной версией формата"""
+    def __init__(self, reason):
+        super().__init__(f"Некорректное сохранение: {reason}")
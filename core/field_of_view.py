@@ -0,0 +1,106 @@
+# core/field_of_view.py
+"""
+Поле зрения методом симметричного теневого отбрасывания (symmetric shadowcasting).
+
+За один проход по четырём квадрантам вычисляет все клетки, видимые
+из точки в пределах радиуса. Алгоритм симметричен для клеток пола:
+если A видит B, то и B видит A. Склоны хранятся как целые дроби
+(числитель, знаменатель), чтобы обойтись без Fraction и float.
+"""
+from array import array
+from typing import Set, Tuple
+from core.constants import MAX_VISION_RANGE, WALL_TILE
+
+# Преобразования (строка, столбец) квадранта в смещение (dx, dy) на карте
+_QUADRANTS = (
+    lambda depth, col: (col, -depth),   # Север
+    lambda depth, col: (depth, col),    # Восток
+    lambda depth, col: (col, depth),    # Юг
+    lambda depth, col: (-depth, col),   # Запад
+)
+
+def compute_fov(game_map, origin_x: int, origin_y: int, radius: int = MAX_VISION_RANGE) -> Set[Tuple[int, int]]:
+    """
+    Compute the set of tiles visible from (origin_x, origin_y) within radius.
+    Стены видимы (их можно увидеть), но закрывают всё, что за ними.
+    """
+    width, height = game_map.width, game_map.height
+    grid = game_map.grid
+    visible = set()
+    if not (0 <= origin_x < width and 0 <= origin_y < height):
+        return visible
+    visible.add((origin_x, origin_y))
+    radius_sq = radius * radius
+
+    for transform in _QUADRANTS:
+        def is_wall(depth, col):
+            dx, dy = transform(depth, col)
+            x, y = origin_x + dx, origin_y + dy
+            # За пределами карты - как стена
+            return not (0 <= x < width and 0 <= y < height) or grid[y, x] == WALL_TILE
+
+        def reveal(depth, col):
+            dx, dy = transform(depth, col)
+            x, y = origin_x + dx, origin_y + dy
+            if 0 <= x < width and 0 <= y < height and dx * dx + dy * dy <= radius_sq:
+                visible.add((x, y))
+
+        # Строка: (глубина, склон начала, склон конца); склон = (числитель, знаменатель > 0)
+        rows = [(1, (-1, 1), (1, 1))]
+        while rows:
+            depth, start, end = rows.pop()
+            if depth > radius:
+                continue
+            # Первый и последний столбец строки (половины округляются внутрь сектора)
+            min_col = (2 * depth * start[0] + start[1]) // (2 * start[1])
+            max_col = -((end[1] - 2 * depth * end[0]) // (2 * end[1]))
+            prev_wall = None
+            for col in range(min_col, max_col + 1):
+                wall = is_wall(depth, col)
+                # Симметричность: столбец лежит внутри сектора [start, end] на этой глубине
+                if wall or (col * start[1] >= depth * start[0] and col * end[1] <= depth * end[0]):
+                    reveal(depth, col)
+                if prev_wall and not wall:
+                    start = (2 * col - 1, 2 * depth)
+                if prev_wall is False and wall:
+                    rows.append((depth + 1, start, (2 * col - 1, 2 * depth)))
+                prev_wall = wall
+            if prev_wall is False:
+                rows.append((depth + 1, start, end))
+
+    return visible
+
+
+class VisibilityBitmap:
+    """
+    Объединённая карта видимости фракции: для каждой клетки хранится,
+    сколько юнитов её видят, и флаг видимости в плоском bytearray.
+    """
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.counts = array('H', bytes(2 * width * height))
+        self.visible = bytearray(width * height)  # 1 - клетка видна хотя бы одному юниту
+
+    def add(self, cells):
+        """Add a viewer's field of view."""
+        width = self.width
+        for x, y in cells:
+            index = y * width + x
+            self.counts[index] += 1
+            self.visible[index] = 1
+
+    def remove(self, cells):
+        """Remove a viewer's field of view."""
+        width = self.width
+        for x, y in cells:
+            index = y * width + x
+            self.counts[index] -= 1
+            if self.counts[index] == 0:
+                self.visible[index] = 0
+
+    def is_visible(self, x: int, y: int) -> bool:
+        """Check if tile is visible to the faction."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.visible[y * self.width + x] == 1
+        return False
@@ -2,15 +2,22 @@
 import pygame
 import sys
 import os
+from datetime import datetime
 from core.constants import *
 from core.sprite_loader import SpriteLoader
 
 # Импорт систем
 from systems.camera import Camera
 from systems.game_state import GameState
+from systems.terrain_layer import TerrainLayer
 from core.combat_system import CombatSystem
 from core.game_manager import GameManager
+from ai.turn_executor import AITurnExecutor
 from core.input_handler import InputHandler
+from core.commands import ReloadCommand
+from core.replay import ReplayRecorder, ReplayPlayer
+from core.events import JsonLinesSink, UnitDied
+from core.profiler import Profiler
 
 # Импорт UI меню
 from ui.main_menu import MainMenu
@@ -24,6 +31,10 @@ from ui.corpse_pickup_menu import CorpsePickupMenu
 from core.save_system import SaveSystem
 from core.load_system import LoadSystem
 from ui.notification_system import NotificationSystem
+from ui.profiler_overlay import ProfilerOverlay
+from core.log import get_logger
+
+log = get_logger('game')
 
 class Game:
     def __init__(self):
@@ -34,17 +45,38 @@ class Game:
         
         # Initialize components
         self.sprite_loader = SpriteLoader()
+        self.terrain_layer = TerrainLayer(self.sprite_loader)
+        self.show_fog_of_war = True
+        self._fog_tile = None  # Полупрозрачный тайл тумана под текущий зум
+        self._reachable_tile = None  # Полупрозрачный тайл подсветки достижимых клеток
         
         # --- Инициализируем GameManager ---
         self.game_manager = GameManager()
         self.game_manager.game_state = GameState()
         self.game_manager.camera = Camera()
-        self.game_manager.combat_system = CombatSystem()
+        self.game_manager.combat_system = CombatSystem(events=self.game_manager.events)
+        # Ход ИИ планируется в фоновом потоке, чтобы окно не замирало
+        self.game_manager.ai_executor = AITurnExecutor()
+        # Каждая партия пишется в реплей (replays/), чтобы приложить его к баг-репорту
+        self.game_manager.recorder = ReplayRecorder()
+        self.replay_dir = "replays"
+        self.replay_player = None  # Проигрываемый реплей (режим просмотра)
+        self.replay_speed = 1.0
+        self._replay_backup = None  # (recorder, ai_controllers) на время просмотра
         
         # Новые системы
         self.save_system = SaveSystem()
         self.load_system = LoadSystem()
         self.notification_system = NotificationSystem()
+        self.game_manager.events.subscribe(UnitDied, self._on_unit_died)
+        self.event_log = None  # JsonLinesSink, если включена запись событий (--events)
+        
+        # Профилировщик кадра (F3 - оверлей, F4 - экспорт в profiles/)
+        self.profiler = Profiler()
+        self.profiler.instrument(self.game_manager, 'update_line_of_sight')
+        self.profiler.instrument(self.game_manager.combat_system, 'update_bullets')
+        self.profiler_overlay = ProfilerOverlay(self.profiler)
+        self.profile_dir = "profiles"
         
         # UI меню
         self.main_menu = MainMenu()
@@ -83,7 +115,12 @@ class Game:
     
     def start_game(self, map_name="test"):
         """Initialize game with selected map"""
+        self.save_replay()
         self.game_manager.start_game(map_name)
+        self.attach_sprite_loader()
+    
+    def attach_sprite_loader(self):
+        """Give the current map and its units the sprite loader (после новой игры, загрузки, кадра реплея)."""
         if self.game_manager.current_map:
             self.game_manager.current_map.sprite_loader = self.sprite_loader
             
@@ -91,6 +128,38 @@ class Game:
             for unit in self.game_manager.current_map.units:
                 unit.sprite_loader = self.sprite_loader
     
+    # ===== REPLAYS =====
+    
+    def save_replay(self):
+        """Write the replay of the current match to replay_dir. Returns the path or None."""
+        recorder = self.game_manager.recorder
+        if recorder is None or not len(recorder):
+            return None
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = recorder.save(os.path.join(self.replay_dir, f"replay_{timestamp}.rrp"))
+        recorder.reset()
+        log.info("Реплей сохранён: %s", path)
+        return path
+    
+    def start_replay(self, path, speed=1.0):
+        """Watch a replay file in the window at the given speed (actions per second x speed)."""
+        self.save_replay()
+        self._replay_backup = (self.game_manager.recorder, self.game_manager.ai_controllers)
+        self.game_manager.recorder = None
+        self.replay_player = ReplayPlayer.from_file(path, self.game_manager)
+        self.replay_player.on_state = self.attach_sprite_loader
+        self.attach_sprite_loader()
+        self.replay_speed = speed
+        self.game_manager.game_state.state = 'game'
+    
+    def stop_replay(self):
+        """Leave replay mode and give control back to the player and the AI."""
+        if self.replay_player is None:
+            return
+        self.replay_player = None
+        self.game_manager.recorder, self.game_manager.ai_controllers = self._replay_backup
+        self._replay_backup = None
+    
     def handle_events(self):
         """Handle all pygame events"""
         # Используем InputHandler для обработки всех событий
@@ -103,7 +172,9 @@ class Game:
         self.last_time = current_time
         
         # Обновляем уведомления
+        self.save_system.poll_saves()
         self.notification_system.update(dt)
+        self.profiler_overlay.update(dt)
         
         # Обновляем анимации меню
         if self.game_manager.game_state.state == 'menu':
@@ -113,6 +184,10 @@ class Game:
         elif self.game_manager.game_state.state == 'pause':
             self.pause_menu.update(dt)
         
+        # Реплей подаёт записанные действия вместо игрока и ИИ
+        if self.replay_player is not None and self.game_manager.game_state.state == 'game':
+            self.replay_player.advance(dt, self.replay_speed)
+        
         # Обновляем игровое состояние
         self.game_manager.update()
     
@@ -141,6 +216,7 @@ class Game:
             self.pause_menu.draw(self.screen)  # Затем меню паузы поверх
         
         # Всегда рисуем уведомления поверх всего
+        self.profiler_overlay.draw(self.screen)
         self.notification_system.draw(self.screen)
         
         pygame.display.flip()
@@ -151,101 +227,142 @@ class Game:
             return
         
         current_faction = self.game_manager.game_state.turn_faction
+        profiler = self.profiler
         
-        # 1. Рисуем ВСЮ карту (всегда видна)
-        for y in range(self.game_manager.current_map.height):
-            for x in range(self.game_manager.current_map.width):
-                screen_x = (x * TILE_SIZE - self.game_manager.camera.x) * self.game_manager.camera.zoom
-                screen_y = (y * TILE_SIZE - self.game_manager.camera.y) * self.game_manager.camera.zoom
-                
-                if (-TILE_SIZE * self.game_manager.camera.zoom <= screen_x <= SCREEN_WIDTH and 
-                    -TILE_SIZE * self.game_manager.camera.zoom <= screen_y <= SCREEN_HEIGHT):
-                    
-                    sprite = self.game_manager.current_map.get_sprite(x, y)
-                    if sprite:
-                        scaled_sprite = pygame.transform.scale(
-                            sprite, 
-                            (int(TILE_SIZE * self.game_manager.camera.zoom), 
-                             int(TILE_SIZE * self.game_manager.camera.zoom))
-                        )
-                        self.screen.blit(scaled_sprite, (screen_x, screen_y))
+        # 1. Рисуем карту (всегда видна) - только чанки в пределах камеры
+        with profiler.section('draw.terrain'):
+            self.terrain_layer.draw(self.screen, self.game_manager.current_map, self.game_manager.camera)
+            
+            # Туман войны поверх клеток, которые не видит ни один юнит текущей фракции
+            if self.show_fog_of_war:
+                self.draw_fog_of_war(current_faction)
+            
+            # Клетки, до которых выбранный юнит дойдёт на оставшуюся энергию
+            self.draw_reachable_tiles(current_faction)
         
         # 2. Рисуем предметы (всегда видны)
-        for item in self.game_manager.current_map.items:
-            if item['type'] in ['weapon', 'ammo']:
-                screen_x = (item['x'] * TILE_SIZE - self.game_manager.camera.x) * self.game_manager.camera.zoom
-                screen_y = (item['y'] * TILE_SIZE - self.game_manager.camera.y) * self.game_manager.camera.zoom
-                pygame.draw.circle(self.screen, (255, 255, 0), 
-                                 (int(screen_x + TILE_SIZE * self.game_manager.camera.zoom // 2), 
-                                  int(screen_y + TILE_SIZE * self.game_manager.camera.zoom // 2)), 
-                                 int(8 * self.game_manager.camera.zoom))
+        with profiler.section('draw.items'):
+            for item in self.game_manager.current_map.items:
+                if item['type'] in ['weapon', 'ammo']:
+                    screen_x = (item['x'] * TILE_SIZE - self.game_manager.camera.x) * self.game_manager.camera.zoom
+                    screen_y = (item['y'] * TILE_SIZE - self.game_manager.camera.y) * self.game_manager.camera.zoom
+                    pygame.draw.circle(self.screen, (255, 255, 0), 
+                                     (int(screen_x + TILE_SIZE * self.game_manager.camera.zoom // 2), 
+                                      int(screen_y + TILE_SIZE * self.game_manager.camera.zoom // 2)), 
+                                     int(8 * self.game_manager.camera.zoom))
         
         # 3. Рисуем трупы (всегда видны)
-        for corpse in self.game_manager.current_map.corpses:
-            screen_x = (corpse['x'] * TILE_SIZE - self.game_manager.camera.x) * self.game_manager.camera.zoom
-            screen_y = (corpse['y'] * TILE_SIZE - self.game_manager.camera.y) * self.game_manager.camera.zoom
+        with profiler.section('draw.corpses'):
+            for corpse in self.game_manager.current_map.corpses:
+                screen_x = (corpse['x'] * TILE_SIZE - self.game_manager.camera.x) * self.game_manager.camera.zoom
+                screen_y = (corpse['y'] * TILE_SIZE - self.game_manager.camera.y) * self.game_manager.camera.zoom
             
-            sprite = self.sprite_loader.get_scaled_sprite(corpse['sprite'], 
-                (int(TILE_SIZE * self.game_manager.camera.zoom), int(TILE_SIZE * self.game_manager.camera.zoom)))
-            if sprite:
-                self.screen.blit(sprite, (screen_x, screen_y))
+                sprite = self.sprite_loader.get_scaled_sprite(corpse['sprite'], 
+                    (int(TILE_SIZE * self.game_manager.camera.zoom), int(TILE_SIZE * self.game_manager.camera.zoom)))
+                if sprite:
+                    self.screen.blit(sprite, (screen_x, screen_y))
         
         # 4. Рисуем пули
-        self.game_manager.combat_system.draw_bullets(self.screen, self.game_manager.camera, self.sprite_loader)
+        with profiler.section('draw.bullets'):
+            self.game_manager.combat_system.draw_bullets(self.screen, self.game_manager.camera, self.sprite_loader)
         
         # 5. Рисуем юнитов
-        for unit in self.game_manager.current_map.units:
-            # Проверяем, нужно ли рисовать врага
-            if unit.faction != current_faction:
-                # Враг - проверяем видимость для ТЕКУЩЕЙ фракции
-                if not self.game_manager.is_enemy_visible(unit.x, unit.y, current_faction):
-                    continue  # Пропускаем невидимого врага
+        with profiler.section('draw.units'):
+            for unit in self.game_manager.current_map.units:
+                # Проверяем, нужно ли рисовать врага
+                if unit.faction != current_faction:
+                    # Враг - проверяем видимость для ТЕКУЩЕЙ фракции
+                    if not self.game_manager.is_enemy_visible(unit.x, unit.y, current_faction):
+                        continue  # Пропускаем невидимого врага
             
-            screen_x = (unit.x * TILE_SIZE - self.game_manager.camera.x) * self.game_manager.camera.zoom
-            screen_y = (unit.y * TILE_SIZE - self.game_manager.camera.y) * self.game_manager.camera.zoom
+                screen_x = (unit.x * TILE_SIZE - self.game_manager.camera.x) * self.game_manager.camera.zoom
+                screen_y = (unit.y * TILE_SIZE - self.game_manager.camera.y) * self.game_manager.camera.zoom
             
-            sprite = unit.get_sprite((int(TILE_SIZE * self.game_manager.camera.zoom), 
-                                     int(TILE_SIZE * self.game_manager.camera.zoom)))
-            if sprite:
-                self.screen.blit(sprite, (screen_x, screen_y))
+                sprite = unit.get_sprite((int(TILE_SIZE * self.game_manager.camera.zoom), 
+                                         int(TILE_SIZE * self.game_manager.camera.zoom)))
+                if sprite:
+                    self.screen.blit(sprite, (screen_x, screen_y))
             
-            # Выделение выбранного юнита (только свои)
-            if (self.game_manager.game_state.selected_unit == unit and 
-                unit.faction == current_faction):
-                pygame.draw.rect(self.screen, (255, 255, 0), 
-                               (screen_x, screen_y, 
-                                int(TILE_SIZE * self.game_manager.camera.zoom), 
-                                int(TILE_SIZE * self.game_manager.camera.zoom)), 2)
+                # Выделение выбранного юнита (только свои)
+                if (self.game_manager.game_state.selected_unit == unit and 
+                    unit.faction == current_faction):
+                    pygame.draw.rect(self.screen, (255, 255, 0), 
+                                   (screen_x, screen_y, 
+                                    int(TILE_SIZE * self.game_manager.camera.zoom), 
+                                    int(TILE_SIZE * self.game_manager.camera.zoom)), 2)
         
         # 6. UI элементы
-        if self.game_manager.game_state.hovered_unit:
-            unit = self.game_manager.game_state.hovered_unit
-            # Показываем информацию только если юнит виден для текущей фракции
-            if (unit.faction == current_faction or
-                self.game_manager.is_enemy_visible(unit.x, unit.y, current_faction)):
-                info_text = f"{UNIT_TYPES[unit.unit_type]['name']} (Фракция: {unit.faction}) (HP: {unit.hp}/{unit.max_hp})"
-                text_surface = self.small_font.render(info_text, True, WHITE)
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                self.screen.blit(text_surface, (mouse_x + 10, mouse_y - 20))
-            else:
-                # Для невидимых врагов показываем "???"
-                info_text = "??? (Враг скрыт)"
-                text_surface = self.small_font.render(info_text, True, WHITE)
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                self.screen.blit(text_surface, (mouse_x + 10, mouse_y - 20))
+        with profiler.section('draw.tooltip'):
+            if self.game_manager.game_state.hovered_unit:
+                unit = self.game_manager.game_state.hovered_unit
+                # Показываем информацию только если юнит виден для текущей фракции
+                if (unit.faction == current_faction or
+                    self.game_manager.is_enemy_visible(unit.x, unit.y, current_faction)):
+                    info_text = f"{UNIT_TYPES[unit.unit_type]['name']} (Фракция: {unit.faction}) (HP: {unit.hp}/{unit.max_hp})"
+                    text_surface = self.small_font.render(info_text, True, WHITE)
+                    mouse_x, mouse_y = pygame.mouse.get_pos()
+                    self.screen.blit(text_surface, (mouse_x + 10, mouse_y - 20))
+                else:
+                    # Для невидимых врагов показываем "???"
+                    info_text = "??? (Враг скрыт)"
+                    text_surface = self.small_font.render(info_text, True, WHITE)
+                    mouse_x, mouse_y = pygame.mouse.get_pos()
+                    self.screen.blit(text_surface, (mouse_x + 10, mouse_y - 20))
         
         # 7. Панель информации о выбранном юните
-        if self.game_manager.game_state.selected_unit:
-            self.draw_unit_info_panel()
+        with profiler.section('draw.unit_panel'):
+            if self.game_manager.game_state.selected_unit:
+                self.draw_unit_info_panel()
         
         # 8. HUD
-        self.draw_hud()
+        with profiler.section('draw.hud'):
+            self.draw_hud()
         
         # 9. Отладочная информация (опционально)
         # debug_text = f"Ход: {current_faction} | Видимых врагов: {len(self.game_manager.visible_enemies)}"
         # debug_surface = self.small_font.render(debug_text, True, (255, 255, 0))
         # self.screen.blit(debug_surface, (10, SCREEN_HEIGHT - 40))
     
+    def draw_reachable_tiles(self, faction):
+        """Highlight tiles reachable by the selected unit of the current faction."""
+        unit = self.game_manager.selected_unit
+        if not unit or unit.faction != faction or self.game_manager.is_ai_turn():
+            return
+        camera = self.game_manager.camera
+        size = int(TILE_SIZE * camera.zoom)
+        if self._reachable_tile is None or self._reachable_tile.get_width() != size:
+            self._reachable_tile = pygame.Surface((size, size), pygame.SRCALPHA)
+            self._reachable_tile.fill(REACHABLE_COLOR)
+        for x, y in self.game_manager.get_reachable_tiles(unit):
+            screen_x = (x * TILE_SIZE - camera.x) * camera.zoom
+            screen_y = (y * TILE_SIZE - camera.y) * camera.zoom
+            self.screen.blit(self._reachable_tile, (screen_x, screen_y))
+    
+    def draw_fog_of_war(self, faction):
+        """Draw fog over tiles outside the faction's field of view."""
+        bitmap = self.game_manager.visibility.get_bitmap(faction)
+        camera = self.game_manager.camera
+        tile_range = self.terrain_layer.get_visible_tile_range(self.screen, self.game_manager.current_map, camera)
+        if bitmap is None or tile_range is None:
+            return
+        
+        tile_px = max(1, int(TILE_SIZE * camera.zoom))
+        if self._fog_tile is None or self._fog_tile.get_width() != tile_px:
+            self._fog_tile = pygame.Surface((tile_px, tile_px), pygame.SRCALPHA)
+            self._fog_tile.fill(FOG_OF_WAR_COLOR)
+        
+        first_x, first_y, last_x, last_y = tile_range
+        visible = bitmap.visible
+        width = bitmap.width
+        fog_blits = []
+        for y in range(first_y, last_y + 1):
+            screen_y = (y * TILE_SIZE - camera.y) * camera.zoom
+            row = y * width
+            for x in range(first_x, last_x + 1):
+                if not visible[row + x]:
+                    fog_blits.append((self._fog_tile, ((x * TILE_SIZE - camera.x) * camera.zoom, screen_y)))
+        self.screen.blits(fog_blits, doreturn=False)
+    
     def draw_unit_info_panel(self):
         """Draw unit information panel"""
         unit = self.game_manager.game_state.selected_unit
@@ -302,7 +419,7 @@ class Game:
             "WASD - движение | +/- - зум | Enter - конец хода",
             "ESC - меню | ЛКМ - выбрать юнита | ПКМ - атака",
             "P - подобрать | I - инвентарь | R - перезарядка",
-            "F5 - быстрое сохранение | F9 - быстрая загрузка"
+            "F5 - быстрое сохранение | F9 - быстрая загрузка | F3 - профилировщик"
         ]
         
         # Рисуем с отступом от нижнего края
@@ -344,7 +461,7 @@ class Game:
                     })
             
             if items_for_menu:
-                self.pickup_menu = PickupMenu(items_for_menu, self.game_manager.game_state.selected_unit, self.game_manager.current_map.items)
+                self.pickup_menu = PickupMenu(items_for_menu, self.game_manager.game_state.selected_unit, self.game_manager.current_map)
                 self.game_manager.game_state.state = 'pickup'
         elif corpses:
             corpse = corpses[0]
@@ -362,7 +479,7 @@ class Game:
             if corpse_items_for_menu:
                 self._try_pickup_corpse_items(corpse, corpse_items_for_menu)
         else:
-            print("No items or corpses to pick up here.")
+            log.debug("No items or corpses to pick up here.")
     
     def _try_pickup_corpse_items(self, corpse, corpse_items_list):
         """Open pickup menu for items on a corpse."""
@@ -371,7 +488,7 @@ class Game:
                 corpse_items_list, 
                 self.game_manager.game_state.selected_unit, 
                 corpse, 
-                self.game_manager.current_map.corpses, 
+                self.game_manager.current_map, 
                 self.font,
                 self.small_font
             )
@@ -396,7 +513,7 @@ class Game:
             if unit.equipped_weapon:
                 try:
                     if unit.energy > 0:
-                        success = unit.reload_weapon()
+                        success = self.game_manager.execute_command(ReloadCommand(unit))
                         if success:
                             self.notification_system.add_success(
                                 f"{unit.unit_type} перезарядил {unit.equipped_weapon.name}."
@@ -421,14 +538,25 @@ class Game:
     
     def quick_save(self):
         """Быстрое сохранение игры (F5)."""
+        return self.save_game()
+    
+    def save_game(self, filename=None):
+        """Start a background save; the result is reported when the file is on disk."""
         try:
-            save_path = self.save_system.save_game(self.game_manager)
-            self.notification_system.add_success(f"Игра сохранена: {save_path}")
+            # Снимок берётся здесь, упаковка и запись идут в фоне - кадр не ждёт диска
+            self.save_system.save_game_async(self.game_manager, filename, callback=self._on_game_saved)
+            self.game_manager.replan_ai_turn()
             return True
         except Exception as e:
             self.notification_system.add_error(f"Ошибка сохранения: {str(e)}")
             return False
     
+    def _on_game_saved(self, save_path, error):
+        if error is None:
+            self.notification_system.add_success(f"Игра сохранена: {save_path}")
+        else:
+            self.notification_system.add_error(f"Ошибка сохранения: {error}")
+    
     def quick_load(self):
         """Быстрая загрузка последнего сохранения (F9)."""
         saves = self.save_system.list_saves()
@@ -440,19 +568,58 @@ class Game:
             latest_save = saves[0]  # Самое свежее сохранение
             save_data = self.save_system.load_game(latest_save['filepath'])
             self.load_system.restore_game(save_data, self.game_manager)
+            self.attach_sprite_loader()
             self.notification_system.add_success(f"Игра загружена: {latest_save['name']}")
             return True
         except Exception as e:
             self.notification_system.add_error(f"Ошибка загрузки: {str(e)}")
             return False
     
+    def export_profile(self):
+        """Write the profiler samples to profiles/ as CSV and Chrome trace (F4)."""
+        if not self.profiler.trace:
+            self.notification_system.add_warning("Профилировщик ещё ничего не записал (F3)")
+            return None
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(self.profile_dir, f"profile_{timestamp}")
+        try:
+            self.profiler.export_csv(base + ".csv")
+            path = self.profiler.export_chrome_trace(base + ".json")
+        except OSError as e:
+            self.notification_system.add_error(f"Ошибка экспорта профиля: {e}")
+            return None
+        self.notification_system.add_success(f"Профиль сохранён: {base}.csv / .json")
+        return path
+    
+    def open_event_log(self, path: str) -> None:
+        """Stream all game events to a JSON-lines file."""
+        self.event_log = JsonLinesSink(path)
+        self.game_manager.events.add_sink(self.event_log)
+    
+    def _on_unit_died(self, event) -> None:
+        if event.unit.faction == "player":
+            self.notification_system.add_warning(f"{event.unit.unit_type} погиб")
+        else:
+            self.notification_system.add_info(f"{event.unit.unit_type} повержен")
+    
     def run(self):
         """Main game loop"""
+        profiler = self.profiler
         while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
+            profiler.begin_frame()
+            with profiler.section('handle_events'):
+                self.handle_events()
+            with profiler.section('update'):
+                self.update()
+            with profiler.section('draw'):
+                self.draw()
+            profiler.end_frame()
             self.clock.tick(60)
         
+        self.save_replay()
+        self.save_system.wait_saves()
+        if self.event_log is not None:
+            self.event_log.close()
+        self.game_manager.shutdown()
         pygame.quit()
         sys.exit()
\ No newline at end of file
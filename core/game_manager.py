@@ -1,4 +1,5 @@
 # core/game_manager.py
+from collections import deque
 from typing import Optional, Tuple
 from systems.game_state import GameState
 from systems.camera import Camera
@@ -6,87 +7,110 @@ from maps.test_map import TestMap
 from units.unit import Unit
 from core.combat_system import CombatSystem
 from core.line_of_sight import LineOfSight
+from core.visibility import VisibilityEngine
+from core.pathfinding import PathFinder, path_to_steps
+from core import snapshot as snapshots
+from core.commands import CommandLog, Command
+from core.rng import RNGService
+from core.events import EventBus, TurnEnded
+from ai.basic_ai import BasicAI
 from core.constants import TILE_SIZE, COMBAT_STATE_IDLE
 from core.exceptions import *  # Добавляем импорт
+from core.log import get_logger
+
+log = get_logger('game')
+los_log = get_logger('los')
+ai_log = get_logger('ai')
 
 class GameManager:
     def __init__(self):
         self.game_state = GameState()
         self.camera = Camera()
-        self.current_map: Optional[TestMap] = None
-        self.combat_system = CombatSystem()
+        self.events = EventBus()  # Шина игровых событий (core.events) для UI, аналитики и логов
+        self._current_map: Optional[TestMap] = None
+        self.combat_system = CombatSystem(events=self.events)
         self.selected_unit: Optional[Unit] = None
         self.hovered_unit: Optional[Unit] = None
         self.los_system = LineOfSight()
+        self.visibility = VisibilityEngine()
+        self.pathfinder = PathFinder()
         self.visible_enemies = set()  # Множество координат видимых врагов для текущей фракции
+        self.visibility_version = -1  # Версия снимка visible_enemies
+        # Фракции под управлением ИИ и очередь действий текущего хода ИИ (None - ход не идёт)
+        self.ai_controllers = {"enemy": BasicAI("enemy")}
+        self.ai_actions: Optional[deque] = None
+        # Фоновый планировщик (ai.turn_executor.AITurnExecutor); None - планировать синхронно
+        self.ai_executor = None
+        self.ai_planning = False  # План хода ИИ ещё строится в фоне
+        self.command_log = CommandLog()  # Журнал отмены действий игрока в пределах хода
+        self.rng = RNGService()  # Случайность матча: пересоздаётся в start_game, сохраняется с игрой
+        self.recorder = None  # core.replay.ReplayRecorder; None - реплей не пишется
+    
+    @property
+    def current_map(self) -> Optional[TestMap]:
+        return self._current_map
     
-    def start_game(self, map_name: str = "test") -> None:
-        """Initialize game with selected map."""
+    @current_map.setter
+    def current_map(self, game_map: Optional[TestMap]) -> None:
+        # Карта публикует события перемещения и подбора в шину менеджера
+        if game_map is not None:
+            game_map.events = self.events
+        self._current_map = game_map
+    
+    def start_game(self, map_name: str = "test", seed: Optional[int] = None) -> None:
+        """Initialize game with selected map; seed makes the match reproducible."""
         if map_name == "test":
-            self.current_map = TestMap()
+            self.cancel_ai_turn()
+            self.command_log.clear()
+            self.reseed(seed)
+            self.current_map = TestMap(rng=self.rng.stream('map'), loot_rng=self.rng.stream('loot'))
             self.game_state.current_map = self.current_map
             self.game_state.turn_faction = "player"
+            if self.recorder is not None:
+                self.recorder.start(self, map_name)
             
-            print(f"DEBUG: Игра начата с картой {map_name}")
-            print(f"DEBUG: На карте {len(self.current_map.units)} юнитов")
+            log.info("Игра начата с картой %s, сид %s, юнитов на карте: %d",
+                     map_name, self.rng.seed, len(self.current_map.units))
             
             if self.current_map:
                 # Рассчитываем начальную видимость врагов
+                self.visibility.reset(self.current_map)
                 self.update_line_of_sight()
     
+    def reseed(self, seed: Optional[int] = None) -> None:
+        """Start a new RNG service and hand its streams to the subsystems."""
+        self.rng = RNGService(seed)
+        self.combat_system.rng = self.rng.stream('combat')
+    
     def update_line_of_sight(self):
         """Обновить видимость врагов для текущей фракции."""
         if not self.current_map:
             return
         
         current_faction = self.game_state.turn_faction
-        print(f"\nDEBUG: Обновление прямой видимости для фракции {current_faction}")
-        
-        # Собираем всех врагов (живых) - те, у кого фракция НЕ равна текущей
-        all_enemies = [
-            u for u in self.current_map.units 
-            if u.faction != current_faction and u.hp > 0
-        ]
-        
-        # Собираем всех своих юнитов (живых)
-        friendly_units = [
-            u for u in self.current_map.units 
-            if u.faction == current_faction and u.hp > 0
-        ]
-        
-        visible_enemies = set()
-        
-        # Каждый свой юнит проверяет видимость врагов
-        for friendly in friendly_units:
-            visible = self.los_system.get_visible_enemies(
-                friendly.x, friendly.y,
-                self.current_map,
-                all_enemies,  # Только врагов проверяем
-                current_faction  # Передаем фракцию зрителя
-            )
-            for enemy in visible:
-                visible_enemies.add((enemy.x, enemy.y))
-                print(f"  {friendly.unit_type} ({current_faction}) на ({friendly.x},{friendly.y}) видит врага {enemy.unit_type} ({enemy.faction}) на ({enemy.x},{enemy.y})")
         
-        self.visible_enemies = visible_enemies
-        print(f"DEBUG: Фракция {current_faction} видит {len(visible_enemies)} врагов")
+        # Движок пересчитывает только изменившиеся лучи
+        self.visibility.refresh(self.current_map)
+        self.visibility_version, self.visible_enemies = self.visibility.get_snapshot(current_faction)
+        los_log.debug("Фракция %s видит %d врагов", current_faction, len(self.visible_enemies))
     
     def is_enemy_visible(self, enemy_x: int, enemy_y: int, faction: str = None) -> bool:
         """Проверяет, виден ли враг на указанных координатах для указанной фракции."""
-        if faction is None:
-            faction = self.game_state.turn_faction
+        if faction is None or faction == self.game_state.turn_faction:
+            # Если координаты в visible_enemies - значит виден
+            return (enemy_x, enemy_y) in self.visible_enemies
         
-        # Если координаты в visible_enemies - значит виден
-        return (enemy_x, enemy_y) in self.visible_enemies
+        return (enemy_x, enemy_y) in self.visibility.visible_enemies(faction)
     
     def select_unit(self, unit: Unit) -> bool:
         """Select a unit if it belongs to current faction."""
         if unit.faction == self.game_state.turn_faction:
             self.selected_unit = unit
             self.game_state.selected_unit = unit
-            print(f"DEBUG: Выбран юнит {unit.unit_type} на ({unit.x},{unit.y})")
+            log.debug("Выбран юнит %s на (%d,%d)", unit.unit_type, unit.x, unit.y)
             return True
-        print(f"DEBUG: Не могу выбрать {unit.unit_type} - не та фракция ({unit.faction} vs {self.game_state.turn_faction})")
+        log.debug("Не могу выбрать %s - не та фракция (%s vs %s)",
+                  unit.unit_type, unit.faction, self.game_state.turn_faction)
         return False
     
     def move_unit(self, dx: int, dy: int) -> bool:
@@ -103,36 +127,65 @@ class GameManager:
         try:
             success = self.selected_unit.move(dx, dy, self.current_map)
             if success:
-                print(f"DEBUG: Юнит перемещен на ({self.selected_unit.x},{self.selected_unit.y})")
+                log.debug("Юнит перемещен на (%d,%d)", self.selected_unit.x, self.selected_unit.y)
                 self.update_line_of_sight()
             return success
         except GameException as e:
             # Логируем ошибку
-            print(f"ERROR: {e}")
+            log.warning("Ход отклонён: %s", e)
             # Показываем сообщение пользователю (будет реализовано в UI)
             self.last_error = str(e)
             return False
     
+    def move_unit_to(self, x: int, y: int) -> bool:
+        """Move selected unit along the shortest path to (x, y), spending 1 energy per step."""
+        unit = self.selected_unit
+        if not unit:
+            raise UnitNotFoundException("No unit selected")
+        
+        if unit.faction != self.game_state.turn_faction:
+            raise NotYourTurnException(unit.faction, self.game_state.turn_faction)
+        
+        path = self.pathfinder.find_path(self.current_map, (unit.x, unit.y), (x, y))
+        if path is None:
+            raise PathBlockedException(x, y)
+        if len(path) > unit.energy:
+            raise NotEnoughEnergyException(len(path), unit.energy)
+        
+        for dx, dy in path_to_steps((unit.x, unit.y), path):
+            unit.move(dx, dy, self.current_map)
+        log.debug("Юнит прошёл %d клеток до (%d,%d)", len(path), unit.x, unit.y)
+        self.update_line_of_sight()
+        return bool(path)
+    
+    def get_reachable_tiles(self, unit: Optional[Unit] = None):
+        """Tiles the unit can reach with its remaining energy -> step cost."""
+        unit = unit or self.selected_unit
+        if not unit or not self.current_map:
+            return {}
+        return self.pathfinder.reachable_tiles(self.current_map, (unit.x, unit.y), unit.energy)
+    
     def end_turn(self) -> None:
         """End current player turn."""
         if not self.current_map:
             return
         
-        print(f"\nDEBUG: Завершение хода для {self.game_state.turn_faction}")
+        log.debug("Завершение хода для %s", self.game_state.turn_faction)
         
         # Восстанавливаем энергию всех юнитов текущей фракции
         for unit in self.current_map.units:
             if unit.faction == self.game_state.turn_faction:
                 unit.end_turn()
-                print(f"  Юнит {unit.unit_type} восстановил энергию до {unit.energy}")
+                log.debug("  Юнит %s восстановил энергию до %d", unit.unit_type, unit.energy)
         
         # Переключаем фракцию
+        ended_faction = self.game_state.turn_faction
         if self.game_state.turn_faction == "player":
             self.game_state.turn_faction = "enemy"
-            print("DEBUG: Ход врага начинается.")
+            log.debug("Ход врага начинается")
         else:
             self.game_state.turn_faction = "player"
-            print("DEBUG: Ход игрока начинается.")
+            log.debug("Ход игрока начинается")
         
         # Сбрасываем состояние боя
         self.game_state.combat_state = COMBAT_STATE_IDLE
@@ -146,14 +199,129 @@ class GameManager:
         # Очищаем пули
         self.combat_system.clear_bullets()
         
+        # Отмена не переходит через границу хода
+        self.command_log.clear()
+        
         # Обновляем видимость для новой фракции
         self.update_line_of_sight()
+        
+        if self.recorder is not None:
+            self.recorder.record_end_turn(self)
+        if self.events.wants(TurnEnded):
+            self.events.publish(TurnEnded(ended_faction, self.game_state.turn_faction))
+        self.begin_turn()
+    
+    def begin_turn(self) -> None:
+        """Start the turn of the current faction (plans it if the faction is AI-controlled)."""
+        self.cancel_ai_turn()
+        ai = self.ai_controllers.get(self.game_state.turn_faction)
+        if ai is None or not self.current_map:
+            return
+        if self.ai_executor is not None:
+            # План придёт из рабочего потока; до тех пор ход ИИ ждёт в update()
+            self.ai_executor.submit(ai, self.current_map)
+            self.ai_actions = deque()
+            self.ai_planning = True
+            return
+        actions = ai.plan_turn(self.current_map)
+        ai_log.debug("ИИ %s спланировал %d действий: %s", ai.faction, len(actions), ai.last_stats)
+        self.ai_actions = deque(ai.resolve_actions(self.current_map.units, actions))
+    
+    def is_ai_turn(self) -> bool:
+        """Check if an AI turn is being played."""
+        return self.ai_actions is not None
+    
+    def cancel_ai_turn(self) -> None:
+        """Drop the remaining AI actions and any plan in progress (e.g. on load or return to menu)."""
+        self.ai_actions = None
+        self.ai_planning = False
+        if self.ai_executor is not None:
+            self.ai_executor.cancel()
+    
+    def replan_ai_turn(self) -> None:
+        """Restart planning of a running AI turn from the current state (e.g. after saving)."""
+        if self.is_ai_turn():
+            self.begin_turn()
+    
+    def shutdown(self) -> None:
+        """Stop background work before quitting."""
+        self.cancel_ai_turn()
+        if self.ai_executor is not None:
+            self.ai_executor.shutdown()
+    
+    def _step_ai_turn(self) -> None:
+        """Apply the next possible AI action; end the turn when the plan is exhausted."""
+        if self.ai_planning:
+            actions = self.ai_executor.poll()
+            if actions is None:
+                return  # План ещё не готов - кадр рисуется дальше
+            self.ai_planning = False
+            self.ai_actions.extend(actions)
+        ai = self.ai_controllers[self.game_state.turn_faction]
+        while self.ai_actions:
+            action = self.ai_actions.popleft()
+            if ai.apply_action(self, action):
+                if self.recorder is not None:
+                    self.recorder.record_action(self, action)
+                return
+        self.ai_actions = None
+        self.end_turn()
+    
+    def capture_snapshot(self, previous=None):
+        """Take a cheap snapshot of the world (see core.snapshot); previous enables structural sharing."""
+        return snapshots.capture(self, previous)
+    
+    def restore_snapshot(self, snapshot) -> None:
+        """Return the world to a snapshot taken by capture_snapshot."""
+        self.cancel_ai_turn()
+        snapshots.restore(self, snapshot)
+    
+    def execute_command(self, command: Command):
+        """Run a player command through the undo log (and the replay, if one is recorded)."""
+        result = self.command_log.execute(self, command)
+        if result and self.recorder is not None:
+            self.recorder.record_command(self, command)
+        return result
+    
+    def record_action(self, command: Command, before) -> bool:
+        """Log an action a menu has already applied (before - command_log.begin() snapshot)."""
+        recorded = self.command_log.record(self, command, before)
+        if recorded and self.recorder is not None:
+            self.recorder.record_state(self)
+        return recorded
+    
+    def can_undo_redo(self) -> bool:
+        """Undo/redo is allowed only on the player's own turn with no bullets in flight."""
+        return (self.current_map is not None and not self.is_ai_turn()
+                and not self.combat_system.has_active_bullets())
+    
+    def undo(self) -> Optional[Command]:
+        """Undo the last player command of this turn."""
+        if not self.can_undo_redo():
+            return None
+        command = self.command_log.undo(self)
+        if command and self.recorder is not None:
+            self.recorder.record_state(self)
+        return command
+    
+    def redo(self) -> Optional[Command]:
+        """Redo the last undone player command."""
+        if not self.can_undo_redo():
+            return None
+        command = self.command_log.redo(self)
+        if command and self.recorder is not None:
+            self.recorder.record_state(self)
+        return command
     
     def update(self) -> None:
         """Update game state."""
         self.camera.update()
         if self.current_map:
             self.combat_system.update_bullets(self.current_map)
+            # Ход ИИ: по одному действию за кадр, дожидаясь, пока долетят пули
+            if (self.ai_actions is not None and self.game_state.state == 'game'
+                    and not self.combat_system.has_active_bullets()):
+                self._step_ai_turn()
     
     def get_world_coords_from_screen(self, screen_x: int, screen_y: int) -> Tuple[float, float]:
         """Convert screen coordinates to world coordinates."""
@@ -173,18 +341,12 @@ class GameManager:
         if not self.current_map:
             return []
         
-        # Собираем всех врагов
-        all_enemies = [u for u in self.current_map.units if u.faction != unit.faction and u.hp > 0]
-        
-        # Получаем видимых врагов для этого юнита
-        visible = self.los_system.get_visible_enemies(
-            unit.x, unit.y,
-            self.current_map,
-            all_enemies,
-            unit.faction
-        )
+        # Берём готовое множество из движка видимости
+        self.visibility.refresh(self.current_map)
+        targets = self.visibility.get_visible_targets(unit)
+        visible = [u for u in self.current_map.units if u in targets]
         
-        print(f"DEBUG: Юнит {unit.unit_type} видит {len(visible)} врагов")
+        los_log.debug("Юнит %s видит %d врагов", unit.unit_type, len(visible))
         return visible
     
     def can_attack_target(self, attacker: Unit, target: Unit) -> bool:
@@ -2,6 +2,10 @@
 import pygame
 from typing import Optional, Callable, Dict, Any, Tuple
 from core.constants import COMBAT_STATE_TARGETING, COMBAT_STATE_IDLE, TILE_SIZE
+from core.commands import MoveCommand, MoveToCommand, ShootCommand, MenuCommand
+from core.log import get_logger
+
+log = get_logger('ui')
 
 class InputHandler:
     def __init__(self, game):
@@ -40,6 +44,10 @@ class InputHandler:
         # Добавляем новые горячие клавиши для сохранения/загрузки
         self.register_key_handler(pygame.K_F5, self._handle_quick_save)
         self.register_key_handler(pygame.K_F9, self._handle_quick_load)
+        
+        # Отмена/повтор (Ctrl+Z / Ctrl+Y)
+        self.register_key_handler(pygame.K_z, self._handle_undo)
+        self.register_key_handler(pygame.K_y, self._handle_redo)
     
     def register_key_handler(self, key: int, handler: Callable):
         """Register a handler for a specific key."""
@@ -58,6 +66,11 @@ class InputHandler:
             if event.type == pygame.QUIT:
                 return False
             
+            # Профилировщик доступен в любом состоянии (меню, игра, реплей)
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_F3, pygame.K_F4):
+                self._handle_profiler_key(event.key)
+                continue
+            
             # Если есть активное меню, передаем событие ему
             if self.game.is_menu_active():
                 menu_result = self._handle_menu_event(event)
@@ -108,7 +121,7 @@ class InputHandler:
                     self.game.main_menu.in_load_menu = True
                 elif result == "Настройки":
                     # TODO: Реализовать настройки
-                    print("Настройки пока не реализованы")
+                    log.info("Настройки пока не реализованы")
                 elif result == "Выход":
                     return False  # Выход из игры
                 elif result.startswith("load:"):
@@ -128,7 +141,9 @@ class InputHandler:
                         self.game.game_manager.game_state.state = 'game'
         
         elif state == 'pickup' and self.game.pickup_menu:
+            before = self.game.game_manager.command_log.begin(self.game.game_manager)
             result = self.game.pickup_menu.handle_event(event)
+            self.game.game_manager.record_action(MenuCommand('pickup'), before)
             if result:
                 if result == "close":
                     self.game.game_manager.game_state.state = 'game'
@@ -141,7 +156,9 @@ class InputHandler:
                     self.game.pickup_menu = None
         
         elif state == 'inventory' and self.game.inventory_menu:
+            before = self.game.game_manager.command_log.begin(self.game.game_manager)
             result = self.game.inventory_menu.handle_event(event)
+            self.game.game_manager.record_action(MenuCommand('inventory'), before)
             if result:
                 if result == "close":
                     self.game.game_manager.game_state.state = 'game'
@@ -175,6 +192,7 @@ class InputHandler:
                     # TODO: Реализовать настройки
                     self.game.notification_system.add_info("Настройки пока не реализованы")
                 elif result == "Выход в меню":
+                    self.game.stop_replay()
                     self.game.game_manager.game_state.state = 'menu'
                     self.game.game_manager.current_map = None
                     self.game.game_manager.game_state.current_map = None
@@ -186,6 +204,7 @@ class InputHandler:
                     self.game.game_manager.game_state.targeting_unit = None
                     self.game.game_manager.game_state.targeting_weapon = None
                     self.game.game_manager.combat_system.clear_bullets()
+                    self.game.game_manager.cancel_ai_turn()
                     self.game.game_manager.game_state.turn_faction = "player"
                 elif result == "Выход":
                     return False  # Выход из игры
@@ -209,6 +228,10 @@ class InputHandler:
     
     def _handle_game_event(self, event):
         """Handle events when in game state."""
+        if self.game.replay_player is not None:
+            self._handle_replay_event(event)
+            return
+        
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
                 # Переключение паузы
@@ -229,6 +252,29 @@ class InputHandler:
         elif event.type == pygame.MOUSEMOTION:
             self._handle_mousemotion(event.pos)
     
+    def _handle_replay_event(self, event):
+        """Handle events while watching a replay: pause, zoom, speed ([ / ]) and restart (Home)."""
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self._handle_escape()
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS):
+                self._handle_zoom_in()
+            elif event.key == pygame.K_MINUS:
+                self._handle_zoom_out()
+            elif event.key == pygame.K_RIGHTBRACKET:
+                self.game.replay_speed = min(64.0, self.game.replay_speed * 2)
+                self.game.notification_system.add_info(f"Скорость реплея: x{self.game.replay_speed:g}")
+            elif event.key == pygame.K_LEFTBRACKET:
+                self.game.replay_speed = max(0.25, self.game.replay_speed / 2)
+                self.game.notification_system.add_info(f"Скорость реплея: x{self.game.replay_speed:g}")
+            elif event.key == pygame.K_HOME:
+                self.game.replay_player.seek(0)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 4:
+                self.game.game_manager.camera.zoom_in()
+            elif event.button == 5:
+                self.game.game_manager.camera.zoom_out()
+    
     def _handle_mousemotion(self, mouse_pos: Tuple[int, int]):
         """Handle mouse motion for hover effects."""
         if self.game.game_manager.current_map:
@@ -243,6 +289,13 @@ class InputHandler:
     
     # ===== DEFAULT HANDLERS =====
     
+    def _handle_profiler_key(self, key: int):
+        """Handle F3 (profiler overlay) and F4 (export the profile)."""
+        if key == pygame.K_F3:
+            self.game.profiler_overlay.toggle()
+        else:
+            self.game.export_profile()
+    
     def _handle_escape(self):
         """Handle ESC key - toggle pause."""
         if self.game.game_manager.game_state.state == 'game':
@@ -253,7 +306,7 @@ class InputHandler:
     
     def _handle_enter(self):
         """Handle Enter key - end turn."""
-        if self.game.game_manager.game_state.state == 'game':
+        if self.game.game_manager.game_state.state == 'game' and not self.game.game_manager.is_ai_turn():
             self.game.game_manager.end_turn()
     
     def _handle_zoom_in(self):
@@ -289,7 +342,7 @@ class InputHandler:
         """Handle movement."""
         if self.game.game_manager.game_state.state == 'game':
             try:
-                success = self.game.game_manager.move_unit(dx, dy)
+                success = self.game.game_manager.execute_command(MoveCommand(dx, dy))
                 if success:
                     self.game.notification_system.add_success(
                         f"Юнит перемещен на ({self.game.game_manager.selected_unit.x}, {self.game.game_manager.selected_unit.y})"
@@ -301,11 +354,27 @@ class InputHandler:
     def _handle_quick_save(self):
         """Handle quick save (F5)."""
         if self.game.game_manager.game_state.state == 'game':
-            try:
-                save_path = self.game.save_system.save_game(self.game.game_manager)
-                self.game.notification_system.add_success(f"Игра сохранена: {save_path}")
-            except Exception as e:
-                self.game.notification_system.add_error(f"Ошибка сохранения: {str(e)}")
+            self.game.quick_save()
+    
+    def _handle_undo(self):
+        """Handle undo (Ctrl+Z)."""
+        if (self.game.game_manager.game_state.state == 'game' and
+                pygame.key.get_mods() & pygame.KMOD_CTRL):
+            command = self.game.game_manager.undo()
+            if command:
+                self.game.notification_system.add_info(f"Отменено: {command.describe()}")
+            else:
+                self.game.notification_system.add_warning("Нечего отменять")
+    
+    def _handle_redo(self):
+        """Handle redo (Ctrl+Y)."""
+        if (self.game.game_manager.game_state.state == 'game' and
+                pygame.key.get_mods() & pygame.KMOD_CTRL):
+            command = self.game.game_manager.redo()
+            if command:
+                self.game.notification_system.add_info(f"Повторено: {command.describe()}")
+            else:
+                self.game.notification_system.add_warning("Нечего повторять")
     
     def _handle_quick_load(self):
         """Handle quick load (F9)."""
@@ -341,12 +410,28 @@ class InputHandler:
                     except Exception as e:
                         # Обрабатываем исключения при выборе юнита
                         self.game.notification_system.add_error(str(e))
+                elif self._try_move_selected_to(grid_x, grid_y):
+                    pass
                 else:
                     # Клик по пустой клетке - снимаем выделение
                     self.game.game_manager.selected_unit = None
                     self.game.game_manager.game_state.selected_unit = None
                     # Не показываем уведомление при снятии выделения, чтобы не засорять экран
     
+    def _try_move_selected_to(self, grid_x: int, grid_y: int) -> bool:
+        """Click-to-move: walk the selected unit to a reachable tile."""
+        game_manager = self.game.game_manager
+        unit = game_manager.selected_unit
+        if (not unit or unit.faction != game_manager.game_state.turn_faction
+                or (grid_x, grid_y) not in game_manager.get_reachable_tiles(unit)):
+            return False
+        try:
+            game_manager.execute_command(MoveToCommand(grid_x, grid_y))
+            self.game.notification_system.add_success(f"Юнит перемещен на ({unit.x}, {unit.y})")
+        except Exception as e:
+            self.game.notification_system.add_error(str(e))
+        return True
+    
     def _handle_right_click(self, mouse_pos: Tuple[int, int]):
         """Handle right mouse click for attacking."""
         if (self.game.game_manager.game_state.state == 'game' and 
@@ -361,23 +446,14 @@ class InputHandler:
                 target_unit = units[0]
                 if target_unit.is_enemy(self.game.game_manager.game_state.selected_unit):
                     try:
-                        # Проверяем через GameManager
-                        if self.game.game_manager.can_attack_target(
-                            self.game.game_manager.game_state.selected_unit,
-                            target_unit
-                        ):
-                            # Используем систему боя
-                            bullet = self.game.game_manager.combat_system.create_bullet(
-                                self.game.game_manager.game_state.selected_unit,
-                                target_unit,
-                                self.game.game_manager.game_state.selected_unit.equipped_weapon
+                        # Проверка дистанции и видимости, выстрел и обновление видимости - в команде
+                        bullet = self.game.game_manager.execute_command(
+                            ShootCommand(self.game.game_manager.game_state.selected_unit, target_unit)
+                        )
+                        if bullet:
+                            self.game.notification_system.add_success(
+                                f"Атакую врага {target_unit.unit_type}"
                             )
-                            if bullet:
-                                self.game.notification_system.add_success(
-                                    f"Атакую врага {target_unit.unit_type}"
-                                )
-                                # После атаки обновляем видимость
-                                self.game.game_manager.update_line_of_sight()
                     except Exception as e:
                         self.game.notification_system.add_error(str(e))
                 else:
@@ -397,6 +473,7 @@ class InputHandler:
         try:
             save_data = self.game.save_system.load_game(f"saves/{filename}")
             self.game.load_system.restore_game(save_data, self.game.game_manager)
+            self.game.attach_sprite_loader()
             
             self.game.main_menu.in_load_menu = False
             self.game.game_manager.game_state.state = 'game'
@@ -407,12 +484,6 @@ class InputHandler:
     
     def _save_game(self, filename: Optional[str] = None):
         """Сохраняет игру в указанный файл."""
-        try:
-            save_path = self.game.save_system.save_game(self.game.game_manager, filename)
-            
+        if self.game.save_game(filename):
             self.game.main_menu.in_load_menu = False
-            self.game.game_manager.game_state.state = 'pause'  # Возвращаемся в паузу
-            
-            self.game.notification_system.add_success(f"Игра сохранена: {save_path}")
-        except Exception as e:
-            self.game.notification_system.add_error(f"Ошибка сохранения: {str(e)}")
\ No newline at end of file
+            self.game.game_manager.game_state.state = 'pause'  # Возвращаемся в паузу
\ No newline at end of file
@@ -1,7 +1,10 @@
 # core/line_of_sight.py
-import pygame
 import math
 from typing import Set, Tuple, List
+from core.constants import WALL_TILE
+from core.log import get_logger
+
+log = get_logger('los')
 
 class LineOfSight:
     def __init__(self):
@@ -41,7 +44,7 @@ class LineOfSight:
                 return False
             
             # Если это стена, прерываем луч
-            if game_map.grid[y][x] == 1:
+            if game_map.grid[y, x] == WALL_TILE:
                 # Если это конечная точка, все равно не видно
                 return False
             
@@ -66,7 +69,7 @@ class LineOfSight:
             # Проверяем линию видимости
             if self.has_line_of_sight(viewer_x, viewer_y, unit.x, unit.y, game_map):
                 visible_enemies.add((unit.x, unit.y))
-                print(f"DEBUG: {viewer_faction} видит врага {unit.unit_type} на ({unit.x},{unit.y})")
+                log.debug("%s видит врага %s на (%d,%d)", viewer_faction, unit.unit_type, unit.x, unit.y)
         
         self.visible_units = visible_enemies
         return visible_enemies
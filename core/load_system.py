@@ -9,6 +9,9 @@ from maps.test_map import TestMap
 from systems.camera import Camera
 from systems.game_state import GameState
 from core.game_manager import GameManager
+from core.log import get_logger
+
+log = get_logger('save')
 
 class LoadSystem:
     def __init__(self):
@@ -18,19 +21,23 @@ class LoadSystem:
         """
         Восстанавливает игровое состояние из сохраненных данных.
         """
+        # Прерываем незавершённый ход ИИ; история отмены к загруженной игре не относится
+        game_manager.cancel_ai_turn()
+        game_manager.command_log.clear()
+        
         # Восстанавливаем карту
         map_data = save_data['map_state']
         game_map = TestMap(map_data['width'], map_data['height'])
-        game_map.grid = map_data['grid']
+        game_map.set_grid(map_data['grid'])
         
         # Восстанавливаем юнитов
-        game_map.units = self._restore_units(save_data['units'])
+        game_map.set_units(self._restore_units(save_data['units']))
         
         # Восстанавливаем предметы
-        game_map.items = self._restore_items(save_data['items'])
+        game_map.set_items(self._restore_items(save_data['items']))
         
         # Восстанавливаем трупы
-        game_map.corpses = self._restore_corpses(save_data['corpses'])
+        game_map.set_corpses(self._restore_corpses(save_data['corpses']))
         
         # Настраиваем GameManager
         game_manager.current_map = game_map
@@ -41,6 +48,11 @@ class LoadSystem:
         game_manager.game_state.turn_faction = game_state_data['turn_faction']
         game_manager.game_state.combat_state = game_state_data['combat_state']
         
+        # Восстанавливаем генератор случайных чисел (в старых сохранениях его нет)
+        if 'rng' in game_state_data:
+            game_manager.rng.set_state(game_state_data['rng'])
+            game_manager.combat_system.rng = game_manager.rng.stream('combat')
+        
         # Восстанавливаем выбранного юнита
         selected_index = game_state_data['selected_unit_index']
         if 0 <= selected_index < len(game_map.units):
@@ -61,7 +73,17 @@ class LoadSystem:
         for unit in game_map.units:
             unit.sprite_loader = game_manager.current_map.sprite_loader
         
-        print("Игровое состояние успешно восстановлено")
+        # Реплей продолжается с загруженного состояния (или с него начинается)
+        if game_manager.recorder is not None:
+            if game_manager.recorder.started:
+                game_manager.recorder.record_state(game_manager)
+            else:
+                game_manager.recorder.start(game_manager, from_state=True)
+        
+        # Если сохранились на ходу ИИ, он доиграет ход заново
+        game_manager.begin_turn()
+        
+        log.info("Игровое состояние успешно восстановлено")
         return game_manager
     
     def _restore_units(self, units_data):
@@ -85,8 +107,8 @@ class LoadSystem:
             # Восстанавливаем экипированное оружие
             weapon_data = unit_data['equipped_weapon']
             if weapon_data:
-                weapon = self._restore_weapon(weapon_data)
-                unit.equip_weapon(weapon)
+                # equip_weapon берёт оружие только из инвентаря, а экипированное там не хранится
+                unit.equipped_weapon = self._restore_weapon(weapon_data)
             
             units.append(unit)
         return units
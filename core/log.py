@@ -0,0 +1,128 @@
+# core/log.py
+"""
+Журналирование игры.
+
+Диагностика идёт через logging в логгеры подсистем 'rebelstar.<подсистема>'
+(get_logger). Сообщения пишутся с ленивым форматированием:
+log.debug("видит %s", unit) собирает строку, только если уровень включён,
+поэтому в релизном режиме горячие пути (обзор, бой) не форматируют ничего.
+
+setup_logging настраивает:
+  - уровни подсистем (LOG_LEVELS; переопределяются аргументом levels или
+    переменной окружения REBELSTAR_LOG="combat=DEBUG,los=INFO");
+  - консоль: в релизе только предупреждения и ошибки, одинаковые сообщения
+    ограничены по частоте (RateLimitFilter);
+  - кольцевой буфер последних записей (RingBufferHandler), который
+    выгружается в консоль только при ошибке - контекст сбоя без постоянного вывода.
+Без setup_logging (тесты, импорт как библиотеки) logging показывает только
+предупреждения и ошибки.
+"""
+import logging
+import os
+import sys
+import time
+from collections import deque
+from typing import Dict, Optional
+from core.constants import LOG_LEVELS, LOG_RING_BUFFER_SIZE, LOG_RATE_LIMIT
+
+ROOT_LOGGER = 'rebelstar'
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """Logger of a subsystem (game, combat, los, ai, map, save, replay, ui, sim, config)."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+class RingBufferHandler(logging.Handler):
+    def __init__(self, target: logging.Handler, capacity: int = LOG_RING_BUFFER_SIZE,
+                 dump_level: int = logging.ERROR):
+        """
+        Args:
+            target: Куда выгружать буфер (обычно консольный обработчик)
+            capacity: Сколько последних записей хранить
+            dump_level: Уровень записи, при котором буфер выгружается
+        """
+        super().__init__()
+        self.target = target
+        self.dump_level = dump_level
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Записи хранятся как есть: форматирование - только при выгрузке
+        if record.levelno >= self.dump_level:
+            self.dump()
+        else:
+            self.records.append(record)
+
+    def dump(self) -> None:
+        """Write buffered records the target has not shown yet and clear the buffer."""
+        records = list(self.records)
+        self.records.clear()
+        for record in records:
+            if record.levelno < self.target.level:
+                self.target.handle(record)
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, limit: int = LOG_RATE_LIMIT, interval: float = 1.0):
+        """Pass at most limit records with the same message template per interval seconds."""
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.suppressed = 0  # Сколько записей отброшено всего
+        self._windows: Dict[tuple, list] = {}  # (логгер, шаблон) -> [начало окна, счётчик]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        now = time.monotonic()
+        window = self._windows.get((record.name, record.msg))
+        if window is None or now - window[0] >= self.interval:
+            self._windows[(record.name, record.msg)] = [now, 1]
+            return True
+        window[1] += 1
+        if window[1] > self.limit:
+            self.suppressed += 1
+            return False
+        return True
+
+def parse_levels(text: str) -> Dict[str, str]:
+    """Parse "combat=DEBUG,los=INFO" into {'combat': 'DEBUG', 'los': 'INFO'}."""
+    levels = {}
+    for part in text.split(','):
+        if '=' in part:
+            name, level = part.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging(debug: bool = False, levels: Optional[Dict[str, str]] = None,
+                  stream=None) -> RingBufferHandler:
+    """
+    Configure the game loggers (повторный вызов заменяет прежнюю настройку).
+
+    Args:
+        debug: Отладочный режим - всё в консоль без буфера и ограничений
+        levels: Уровни подсистем поверх LOG_LEVELS и REBELSTAR_LOG
+        stream: Поток консоли (по умолчанию sys.stderr)
+    Returns:
+        Кольцевой буфер (его можно выгрузить вручную через dump()).
+    """
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.propagate = False
+    root.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    subsystem_levels = {} if debug else dict(LOG_LEVELS)
+    subsystem_levels.update(parse_levels(os.environ.get('REBELSTAR_LOG', '')))
+    subsystem_levels.update(levels or {})
+    for name in set(LOG_LEVELS) | set(subsystem_levels):
+        get_logger(name).setLevel(subsystem_levels.get(name, logging.NOTSET))
+
+    console = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    console.setFormatter(logging.Formatter(LOG_FORMAT, '%H:%M:%S'))
+    ring = RingBufferHandler(console, capacity=0 if debug else LOG_RING_BUFFER_SIZE)
+    if not debug:
+        console.setLevel(logging.WARNING)
+        console.addFilter(RateLimitFilter())
+        root.addHandler(ring)  # Раньше консоли: контекст выгружается до самой ошибки
+    root.addHandler(console)
+    return ring
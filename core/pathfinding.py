@@ -0,0 +1,197 @@
+# core/pathfinding.py
+"""
+Поиск путей по карте: A* для одиночных маршрутов и поля расстояний
+(Дейкстра) для запросов "куда можно дойти".
+
+Клетка проходима, если она пол (TestMap.is_walkable) и на ней нет юнитов.
+Все ходы стоят 1 энергию, поэтому Дейкстра сводится к обходу в ширину.
+Результаты кэшируются и сбрасываются целиком, как только меняется
+сетка (grid_version) или занятость клеток (occupancy_version).
+"""
+import heapq
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from core.constants import FLOOR_TILE
+
+Position = Tuple[int, int]
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+UNREACHABLE = -1
+
+class PathFinder:
+    def __init__(self, max_cached_fields=64):
+        """
+        Args:
+            max_cached_fields: Сколько полей расстояний держать в кэше
+        """
+        self.max_cached_fields = max_cached_fields
+        self._map = None
+        self._grid = None
+        self._grid_version = -1
+        self._occupancy_version = -1
+        self._passable = None   # Список строк [y][x] -> bool
+        self._fields = {}       # (x, y) -> np.ndarray расстояний от клетки
+        self._paths = {}        # (start, goal) -> путь или None
+        self._reachable = {}    # (start, energy) -> {клетка: стоимость}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def invalidate(self):
+        """Drop all cached paths and distance fields."""
+        self._passable = None
+        self._fields.clear()
+        self._paths.clear()
+        self._reachable.clear()
+
+    def _sync(self, game_map):
+        """Сбрасывает кэш, если сменились карта, сетка или занятость клеток."""
+        if (game_map is not self._map or game_map.grid is not self._grid
+                or game_map.grid_version != self._grid_version
+                or game_map.occupancy_version != self._occupancy_version):
+            self._map = game_map
+            self._grid = game_map.grid
+            self._grid_version = game_map.grid_version
+            self._occupancy_version = game_map.occupancy_version
+            self.invalidate()
+        if self._passable is None:
+            self._passable = ((game_map.grid == FLOOR_TILE) & (game_map.occupancy == 0)).tolist()
+
+    def _neighbors(self, x, y):
+        width, height = self._map.width, self._map.height
+        passable = self._passable
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and passable[ny][nx]:
+                yield nx, ny
+
+    # ===== ЗАПРОСЫ =====
+
+    def distance_field(self, game_map, origin: Position) -> np.ndarray:
+        """
+        Distances (in steps) from origin to every tile, UNREACHABLE where there is no path.
+        Сама клетка origin может быть занята (обычно на ней стоит юнит).
+        """
+        self._sync(game_map)
+        field = self._fields.get(origin)
+        if field is not None:
+            self.cache_hits += 1
+            return field
+        self.cache_misses += 1
+
+        field = np.full((game_map.height, game_map.width), UNREACHABLE, dtype=np.int32)
+        x, y = origin
+        if 0 <= x < game_map.width and 0 <= y < game_map.height:
+            distances = {origin: 0}
+            queue = deque([origin])
+            while queue:
+                x, y = queue.popleft()
+                distance = distances[(x, y)] + 1
+                for neighbor in self._neighbors(x, y):
+                    if neighbor not in distances:
+                        distances[neighbor] = distance
+                        queue.append(neighbor)
+            xs, ys = zip(*distances)
+            field[list(ys), list(xs)] = list(distances.values())
+
+        if len(self._fields) >= self.max_cached_fields:
+            self._fields.pop(next(iter(self._fields)))
+        self._fields[origin] = field
+        return field
+
+    def reachable_tiles(self, game_map, start: Position, energy: int) -> Dict[Position, int]:
+        """All tiles reachable from start with at most energy steps -> step cost (start excluded)."""
+        self._sync(game_map)
+        key = (start, energy)
+        cached = self._reachable.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        field = self.distance_field(game_map, start)
+        ys, xs = np.nonzero((field > 0) & (field <= energy))
+        reachable = {(int(x), int(y)): int(field[y, x]) for x, y in zip(xs, ys)}
+        self._reachable[key] = reachable
+        return reachable
+
+    def find_path(self, game_map, start: Position, goal: Position) -> Optional[List[Position]]:
+        """
+        A* path from start to goal (start excluded, goal included), None if unreachable.
+        Если поле расстояний от start уже посчитано, путь восстанавливается по нему.
+        """
+        self._sync(game_map)
+        key = (start, goal)
+        if key in self._paths:
+            self.cache_hits += 1
+            return self._paths[key]
+        self.cache_misses += 1
+
+        if start == goal:
+            path = []
+        elif not (0 <= goal[0] < game_map.width and 0 <= goal[1] < game_map.height) \
+                or not self._passable[goal[1]][goal[0]]:
+            path = None
+        elif start in self._fields:
+            path = self._path_from_field(self._fields[start], start, goal)
+        else:
+            path = self._astar(start, goal)
+        self._paths[key] = path
+        return path
+
+    # ===== ВНУТРЕННЕЕ =====
+
+    def _astar(self, start, goal):
+        goal_x, goal_y = goal
+        came_from = {start: None}
+        cost = {start: 0}
+        # (f, g, счётчик для стабильного порядка, клетка)
+        counter = 0
+        heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, counter, start)]
+        while heap:
+            _, g, _, current = heapq.heappop(heap)
+            if current == goal:
+                break
+            if g > cost[current]:
+                continue
+            for neighbor in self._neighbors(*current):
+                new_cost = g + 1
+                if new_cost < cost.get(neighbor, new_cost + 1):
+                    cost[neighbor] = new_cost
+                    came_from[neighbor] = current
+                    counter += 1
+                    h = abs(neighbor[0] - goal_x) + abs(neighbor[1] - goal_y)
+                    heapq.heappush(heap, (new_cost + h, new_cost, counter, neighbor))
+        if goal not in came_from:
+            return None
+        path = []
+        current = goal
+        while current != start:
+            path.append(current)
+            current = came_from[current]
+        path.reverse()
+        return path
+
+    def _path_from_field(self, field, start, goal):
+        """Walk back from goal to start along decreasing distances."""
+        if field[goal[1], goal[0]] == UNREACHABLE:
+            return None
+        path = [goal]
+        x, y = goal
+        while field[y, x] > 1:
+            distance = field[y, x]
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < field.shape[1] and 0 <= ny < field.shape[0] and field[ny, nx] == distance - 1:
+                    x, y = nx, ny
+                    break
+            path.append((x, y))
+        path.reverse()
+        return path
+
+def path_to_steps(start: Position, path: List[Position]) -> List[Tuple[int, int]]:
+    """Convert a path of tiles into (dx, dy) steps for Unit.move."""
+    steps = []
+    x, y = start
+    for nx, ny in path:
+        steps.append((nx - x, ny - y))
+        x, y = nx, ny
+    return steps
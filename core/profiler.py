@@ -0,0 +1,170 @@
+# core/profiler.py
+"""
+Профилировщик кадра.
+
+Замеряет секции игрового цикла (handle_events, update, фазы draw_game,
+update_bullets, update_line_of_sight) и сам кадр целиком. По каждой секции
+хранит скользящее окно длительностей для перцентилей p50/p95/p99 (оверлей,
+ui.profiler_overlay) и общий журнал замеров для выгрузки в CSV или в формат
+Chrome trace (chrome://tracing, Perfetto).
+
+Выключенный профилировщик отдаёт из section() общий пустой контекст -
+в цикле остаётся только проверка флага.
+"""
+import csv
+import json
+import math
+import os
+import threading
+from collections import deque
+from time import perf_counter_ns
+from typing import Dict, List, Optional
+from core.constants import PROFILER_WINDOW, PROFILER_TRACE_LIMIT
+
+FRAME = 'frame'
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SECTION = _NullSection()
+
+class _Section:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_sample(self.name, self.start, perf_counter_ns())
+        return False
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    # Ранг ceil(p*n), считая с 1: p50 из 1..100 - это 50, а p99 - 99, а не максимум
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class Profiler:
+    def __init__(self, window: int = PROFILER_WINDOW, trace_limit: int = PROFILER_TRACE_LIMIT):
+        """
+        Args:
+            window: Размер скользящего окна по каждой секции
+            trace_limit: Сколько последних замеров хранить для экспорта
+        """
+        self.enabled = False
+        self.window = window
+        self.samples: Dict[str, deque] = {}  # Секция -> длительности, мс
+        self.trace = deque(maxlen=trace_limit)  # (секция, начало нс, длительность нс, поток, кадр)
+        self.frame = 0
+        self._frame_start = None
+        self._origin = perf_counter_ns()
+
+    def section(self, name: str):
+        """Context manager timing a section (no-op while disabled)."""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def instrument(self, obj, method_name: str, name: Optional[str] = None) -> None:
+        """Time every call of obj.method_name as section name (по умолчанию - имя метода)."""
+        method = getattr(obj, method_name)
+        section_name = name or method_name
+
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return method(*args, **kwargs)
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.add_sample(section_name, start, perf_counter_ns())
+
+        setattr(obj, method_name, timed)
+
+    def begin_frame(self) -> None:
+        if self.enabled:
+            self._frame_start = perf_counter_ns()
+
+    def end_frame(self) -> None:
+        if self.enabled and self._frame_start is not None:
+            self.add_sample(FRAME, self._frame_start, perf_counter_ns())
+            self._frame_start = None
+            self.frame += 1
+
+    def add_sample(self, name: str, start_ns: int, end_ns: int) -> None:
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        duration = end_ns - start_ns
+        samples.append(duration / 1e6)
+        self.trace.append((name, start_ns, duration, threading.get_ident(), self.frame))
+
+    def reset(self) -> None:
+        """Forget all samples."""
+        self.samples.clear()
+        self.trace.clear()
+        self.frame = 0
+        self._frame_start = None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Rolling statistics per section in milliseconds: count, mean, p50, p95, p99, max."""
+        result = {}
+        for name, samples in self.samples.items():
+            values = sorted(samples)
+            if not values:
+                continue
+            result[name] = {
+                'count': len(values),
+                'mean': sum(values) / len(values),
+                'p50': percentile(values, 0.50),
+                'p95': percentile(values, 0.95),
+                'p99': percentile(values, 0.99),
+                'max': values[-1],
+            }
+        return result
+
+    def export_csv(self, path: str) -> str:
+        """Write every recorded sample as a CSV row (кадр, секция, начало и длительность в мс)."""
+        self._ensure_dir(path)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'section', 'start_ms', 'duration_ms', 'thread'])
+            for name, start, duration, thread, frame in list(self.trace):
+                writer.writerow([frame, name, f"{(start - self._origin) / 1e6:.3f}",
+                                 f"{duration / 1e6:.3f}", thread])
+        return path
+
+    def export_chrome_trace(self, path: str) -> str:
+        """Write samples in the Chrome trace event format (complete events, микросекунды)."""
+        self._ensure_dir(path)
+        threads = {}
+        events = []
+        for name, start, duration, thread, frame in list(self.trace):
+            events.append({
+                'name': name, 'cat': 'game', 'ph': 'X', 'pid': os.getpid(),
+                'tid': threads.setdefault(thread, len(threads) + 1),
+                'ts': (start - self._origin) / 1e3, 'dur': duration / 1e3,
+                'args': {'frame': frame},
+            })
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    @staticmethod
+    def _ensure_dir(path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
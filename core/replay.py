@@ -0,0 +1,414 @@
+# core/replay.py
+"""
+Запись и проигрывание реплеев.
+
+Реплей - компактный двоичный поток: заголовок с сидом матча (core.rng)
+и именем карты, затем записи команд игрока и действий ИИ в том порядке,
+в каком они применялись. Юниты задаются индексом в game_map.units, поэтому
+запись действия занимает 1-7 байт.
+
+    заголовок:  b'RSRP', версия u8, сид u64, длина имени карты u8, имя (utf-8)
+    MOVE        op u8, юнит u16, dx i8, dy i8
+    MOVE_TO     op u8, юнит u16, x u16, y u16
+    SHOOT       op u8, стрелок u16, цель u16
+    RELOAD      op u8, юнит u16
+    END_TURN    op u8
+    KEYFRAME    op u8, длина u32, состояние (двоичный формат сохранений core.save_format)
+    STATE       то же, что KEYFRAME
+
+KEYFRAME пишется каждые REPLAY_KEYFRAME_INTERVAL записей, когда в полёте нет
+пуль: по нему перематывают (seek) и проверяют рассинхрон. STATE - состояние,
+которое надо применить как есть: действия меню, отмена/повтор, загрузка
+сохранения не выражаются командами. Сетка карты попадает в кадр, только если
+изменилась с предыдущего: иначе она берётся из ближайшего более раннего кадра
+или стартовой карты сида. Кадры строятся в главном потоке, поэтому формат
+выбран тот же быстрый, что у сохранений. Реплеи версии 1 (кадры в JSON) читаются.
+
+Проигрыватель пересимулирует матч без окна на максимальной скорости (пули
+досчитываются сразу после выстрела) или по шагам в игровом цикле с любой
+скоростью (advance). Пример проверки реплеев в CI:
+
+    python -m core.replay replays/*.rrp
+"""
+import argparse
+import base64
+import bisect
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from typing import Callable, List, Optional, Tuple
+from core.constants import REPLAY_KEYFRAME_INTERVAL, REPLAY_ACTIONS_PER_SECOND
+from core.exceptions import GameException, ReplayFormatException
+from core.game_manager import GameManager
+from core.load_system import LoadSystem
+from core.log import setup_logging
+from core.save_format import MAGIC as SAVE_MAGIC, decode_save, encode_save
+from core.save_system import SaveSystem
+
+MAGIC = b'RSRP'
+FORMAT_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)  # 1 - кадры в JSON, 2 - в двоичном формате сохранений
+
+OP_MOVE = 1
+OP_MOVE_TO = 2
+OP_SHOOT = 3
+OP_RELOAD = 4
+OP_END_TURN = 5
+OP_KEYFRAME = 6
+OP_STATE = 7
+
+HEADER = struct.Struct('<4sBQB')
+STATE_HEADER = struct.Struct('<BI')
+RECORDS = {
+    OP_MOVE: struct.Struct('<BHbb'),
+    OP_MOVE_TO: struct.Struct('<BHHH'),
+    OP_SHOOT: struct.Struct('<BHH'),
+    OP_RELOAD: struct.Struct('<BH'),
+    OP_END_TURN: struct.Struct('<B'),
+}
+STATE_OPS = (OP_KEYFRAME, OP_STATE)
+
+# Части состояния, по которым сверяется рассинхрон (камера и выделение к симуляции не относятся)
+SYNC_KEYS = ('map_state', 'units', 'items', 'corpses')
+
+def encode_state(save_data, include_grid: bool = True) -> bytes:
+    """Pack a save dict (SaveSystem.build_save_data) into a keyframe payload."""
+    if not include_grid:
+        save_data = dict(save_data, map_state=dict(save_data['map_state'], grid=None))
+    return encode_save(save_data, {})
+
+def decode_state(payload: bytes) -> dict:
+    """Unpack a keyframe payload into a save dict; map_state['grid'] is None if it was left out."""
+    if payload[:4] == SAVE_MAGIC:
+        return decode_save(payload)[1]
+    return _decode_state_v1(payload)
+
+def _decode_state_v1(payload: bytes) -> dict:
+    """Keyframe payload of format version 1 (zlib + JSON)."""
+    data = json.loads(zlib.decompress(payload))
+    data['map_state']['grid'] = base64.b64decode(data['map_state']['grid'])
+    rng = data['game_state'].get('rng')
+    if rng is not None:
+        for name, (version, words, gauss) in rng['streams'].items():
+            words = base64.b64decode(words)
+            rng['streams'][name] = (version, struct.unpack(f'<{len(words) // 4}I', words), gauss)
+    return data
+
+def parse_replay(data: bytes) -> Tuple[int, str, List[Tuple[int, object]]]:
+    """Split a replay into (seed, map name, [(op, args or payload)])."""
+    if len(data) < HEADER.size:
+        raise ReplayFormatException("слишком короткий файл")
+    magic, version, seed, name_length = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ReplayFormatException("неверная сигнатура")
+    if version not in SUPPORTED_VERSIONS:
+        raise ReplayFormatException(f"неизвестная версия формата {version}")
+    offset = HEADER.size
+    map_name = bytes(data[offset:offset + name_length]).decode('utf-8')
+    offset += name_length
+
+    records = []
+    try:
+        while offset < len(data):
+            op = data[offset]
+            if op in STATE_OPS:
+                _, length = STATE_HEADER.unpack_from(data, offset)
+                offset += STATE_HEADER.size
+                if offset + length > len(data):
+                    raise ReplayFormatException("обрезанный ключевой кадр")
+                records.append((op, bytes(data[offset:offset + length])))
+                offset += length
+            elif op in RECORDS:
+                record = RECORDS[op]
+                records.append((op, record.unpack_from(data, offset)[1:]))
+                offset += record.size
+            else:
+                raise ReplayFormatException(f"неизвестная запись {op} на смещении {offset}")
+    except struct.error:
+        raise ReplayFormatException("обрезанная запись")
+    return seed, map_name, records
+
+class ReplayRecorder:
+    def __init__(self, keyframe_interval: int = REPLAY_KEYFRAME_INTERVAL):
+        """
+        Args:
+            keyframe_interval: Ключевой кадр каждые N записей
+        """
+        self.keyframe_interval = keyframe_interval
+        self._serializer = SaveSystem(save_dir=None)
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop everything recorded so far."""
+        self.buffer = bytearray()
+        self.started = False
+        self.records = 0
+        self._since_keyframe = 0
+        self._grid_key = None  # (карта, grid_version) сетки из последнего записанного кадра
+
+    def __len__(self):
+        return self.records
+
+    def start(self, game_manager, map_name: str = "test", from_state: bool = False) -> None:
+        """
+        Begin a new replay of game_manager's match.
+        from_state=True - матч не с начала (например, после загрузки): первым пишется состояние.
+        """
+        self.reset()
+        name = map_name.encode('utf-8')
+        self.buffer += HEADER.pack(MAGIC, FORMAT_VERSION, game_manager.rng.seed, len(name)) + name
+        self.started = True
+        if not from_state:
+            # Стартовую карту проигрыватель получит из сида - сетку в первый кадр не пишем
+            self._grid_key = (game_manager.current_map, game_manager.current_map.grid_version)
+        if from_state:
+            self.record_state(game_manager)
+
+    # ===== ЗАПИСЬ =====
+
+    def record_command(self, game_manager, command) -> None:
+        """Record a player command (core.commands) that has just been executed."""
+        if not self.started:
+            return
+        units = game_manager.current_map.units
+        if command.name == 'move':
+            self._write(game_manager, OP_MOVE, units.index(game_manager.selected_unit), command.dx, command.dy)
+        elif command.name == 'move_to':
+            self._write(game_manager, OP_MOVE_TO, units.index(game_manager.selected_unit), command.x, command.y)
+        elif command.name == 'shoot':
+            self._write(game_manager, OP_SHOOT, units.index(command.attacker), units.index(command.target))
+        elif command.name == 'reload':
+            self._write(game_manager, OP_RELOAD, units.index(command.unit))
+        else:
+            self.record_state(game_manager)
+
+    def record_action(self, game_manager, action) -> None:
+        """Record an AI action (resolved tuple of ai.BasicAI) that has just been applied."""
+        if not self.started:
+            return
+        units = game_manager.current_map.units
+        kind, unit = action[0], action[1]
+        if kind == 'move':
+            self._write(game_manager, OP_MOVE, units.index(unit), action[2], action[3])
+        elif kind == 'reload':
+            self._write(game_manager, OP_RELOAD, units.index(unit))
+        elif kind == 'shoot':
+            self._write(game_manager, OP_SHOOT, units.index(unit), units.index(action[2]))
+
+    def record_end_turn(self, game_manager) -> None:
+        if self.started:
+            self._write(game_manager, OP_END_TURN)
+
+    def record_state(self, game_manager) -> None:
+        """Record the current state as authoritative (действия, которые нельзя пересимулировать)."""
+        if self.started:
+            self._write_state(OP_STATE, game_manager)
+
+    def _write(self, game_manager, op, *args):
+        self.buffer += RECORDS[op].pack(op, *args)
+        self.records += 1
+        self._since_keyframe += 1
+        # Кадр - состояние после всех предыдущих записей, поэтому летящие пули откладывают его
+        if (self._since_keyframe >= self.keyframe_interval
+                and not game_manager.combat_system.has_active_bullets()):
+            self._write_state(OP_KEYFRAME, game_manager)
+
+    def _write_state(self, op, game_manager):
+        grid_key = (game_manager.current_map, game_manager.current_map.grid_version)
+        payload = encode_state(self._serializer.build_save_data(game_manager),
+                               include_grid=grid_key != self._grid_key)
+        self._grid_key = grid_key
+        self.buffer += STATE_HEADER.pack(op, len(payload)) + payload
+        self.records += 1
+        self._since_keyframe = 0
+
+    # ===== ВЫВОД =====
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buffer)
+
+    def save(self, path: str) -> str:
+        """Write the replay to path (папка создаётся при необходимости)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(self.buffer)
+        return path
+
+class ReplayPlayer:
+    def __init__(self, data: bytes, game_manager: Optional[GameManager] = None):
+        """
+        Args:
+            data: Содержимое файла реплея
+            game_manager: Куда проигрывать (по умолчанию - новый GameManager без окна)
+        """
+        self.seed, self.map_name, self.records = parse_replay(data)
+        self.keyframes = [i for i, (op, _) in enumerate(self.records) if op in STATE_OPS]
+        if game_manager is None:
+            game_manager = GameManager()
+        # Действия ИИ берутся из реплея
+        game_manager.ai_controllers = {}
+        self.game_manager = game_manager
+        self.on_state: Optional[Callable] = None  # Вызывается после смены карты (для рендера)
+        self.desyncs: List[Tuple[int, str]] = []  # (номер записи, причина)
+        self._loader = LoadSystem()
+        self._serializer = SaveSystem(save_dir=None)
+        self._clock = 0.0
+        self._grids = {}  # Номер записи состояния -> её сетка (None, если кадр без сетки)
+        self.restart()
+
+    @classmethod
+    def from_file(cls, path: str, game_manager: Optional[GameManager] = None) -> 'ReplayPlayer':
+        with open(path, 'rb') as f:
+            return cls(f.read(), game_manager)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def at_end(self) -> bool:
+        return self.position >= len(self.records)
+
+    def restart(self) -> None:
+        """Start the match over from the seed."""
+        self.game_manager.start_game(self.map_name, seed=self.seed)
+        self._start_grid = self.game_manager.current_map.grid.tobytes()
+        self.position = 0
+        self._clock = 0.0
+        if self.on_state:
+            self.on_state()
+
+    # ===== ПРОИГРЫВАНИЕ =====
+
+    def step(self, resolve_bullets: bool = True, verify: bool = False) -> bool:
+        """
+        Apply the next record. Returns False at the end of the replay.
+        resolve_bullets - досчитать пули сразу (без окна); verify - сверять ключевые кадры.
+        """
+        if self.at_end:
+            return False
+        op, args = self.records[self.position]
+        game_manager = self.game_manager
+        try:
+            if op == OP_STATE:
+                self._apply_state(self.position)
+            elif op == OP_KEYFRAME:
+                if verify and not self._matches(self.position):
+                    self.desyncs.append((self.position, "состояние расходится с ключевым кадром"))
+            elif op == OP_END_TURN:
+                game_manager.end_turn()
+            else:
+                self._apply_action(op, args, resolve_bullets)
+        except (GameException, ValueError, IndexError) as e:
+            self.desyncs.append((self.position, str(e)))
+        self.position += 1
+        return True
+
+    def _apply_action(self, op, args, resolve_bullets):
+        game_manager = self.game_manager
+        game_map = game_manager.current_map
+        unit = game_map.units[args[0]]
+        if op == OP_MOVE:
+            if not unit.move(args[1], args[2], game_map):
+                raise ValueError(f"юнит {args[0]} не смог сделать шаг ({args[1]}, {args[2]})")
+        elif op == OP_MOVE_TO:
+            game_manager.selected_unit = unit
+            game_manager.move_unit_to(args[1], args[2])
+        elif op == OP_SHOOT:
+            game_manager.combat_system.create_bullet(unit, game_map.units[args[1]], unit.equipped_weapon)
+            while resolve_bullets and game_manager.combat_system.has_active_bullets():
+                game_manager.combat_system.update_bullets(game_map)
+        elif op == OP_RELOAD:
+            unit.reload_weapon()
+        game_manager.update_line_of_sight()
+
+    def run(self, verify: bool = True) -> List[Tuple[int, str]]:
+        """Re-simulate to the end at maximum speed. Returns the desyncs found."""
+        while self.step(verify=verify):
+            pass
+        return self.desyncs
+
+    def seek(self, position: int) -> None:
+        """Jump to the state after the first position records, starting from the nearest keyframe."""
+        position = max(0, min(position, len(self.records)))
+        k = bisect.bisect_left(self.keyframes, position) - 1
+        keyframe = self.keyframes[k] if k >= 0 else None
+        if keyframe is not None and (keyframe >= self.position or position < self.position):
+            self._apply_state(keyframe)
+            self.position = keyframe + 1
+        elif position < self.position:
+            self.restart()
+        while self.position < position:
+            self.step()
+
+    def advance(self, dt: float, speed: float = 1.0) -> None:
+        """Play records in real time from the game loop; bullets are animated by GameManager.update."""
+        self._clock += dt * speed * REPLAY_ACTIONS_PER_SECOND
+        while self._clock >= 1.0 and not self.at_end:
+            if self.game_manager.combat_system.has_active_bullets():
+                self._clock = 1.0  # Ждём пули, не копя отставание
+                return
+            self.step(resolve_bullets=False)
+            self._clock -= 1.0
+
+    # ===== СОСТОЯНИЕ =====
+
+    def _state(self, index: int) -> dict:
+        """Decoded state record; a keyframe without a grid takes it from an earlier one."""
+        state = decode_state(self.records[index][1])
+        if state['map_state']['grid'] is None:
+            state['map_state']['grid'] = self._grid_before(index)
+        return state
+
+    def _grid_before(self, index: int) -> bytes:
+        """Grid of the newest state record before index that carries one (или стартовой карты)."""
+        k = bisect.bisect_left(self.keyframes, index) - 1
+        while k >= 0:
+            previous = self.keyframes[k]
+            if previous not in self._grids:
+                self._grids[previous] = decode_state(self.records[previous][1])['map_state']['grid']
+            if self._grids[previous] is not None:
+                return self._grids[previous]
+            k -= 1
+        return self._start_grid
+
+    def _apply_state(self, index: int) -> None:
+        self.game_manager.combat_system.clear_bullets()
+        self._loader.restore_game(self._state(index), self.game_manager)
+        self.game_manager.update_line_of_sight()
+        if self.on_state:
+            self.on_state()
+
+    def _matches(self, index: int) -> bool:
+        expected = self._state(index)
+        actual = decode_state(encode_state(self._serializer.build_save_data(self.game_manager)))
+        return (all(expected[key] == actual[key] for key in SYNC_KEYS)
+                and expected['game_state']['turn_faction'] == actual['game_state']['turn_faction']
+                and expected['game_state'].get('rng') == actual['game_state'].get('rng'))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка реплеев: пересимуляция без окна")
+    parser.add_argument('replays', nargs='+', help="Файлы .rrp")
+    parser.add_argument('--verbose', action='store_true', help="Не глушить отладочный вывод игры")
+    args = parser.parse_args(argv)
+    setup_logging(debug=args.verbose)
+
+    failed = 0
+    for path in args.replays:
+        started = time.perf_counter()
+        player = ReplayPlayer.from_file(path)
+        desyncs = player.run(verify=True)
+        elapsed = time.perf_counter() - started
+        status = "OK" if not desyncs else f"РАССИНХРОН ({len(desyncs)})"
+        print(f"{path}: {len(player)} записей за {elapsed:.3f} с - {status}")
+        for position, reason in desyncs[:5]:
+            print(f"    запись {position}: {reason}")
+        failed += bool(desyncs)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
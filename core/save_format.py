@@ -0,0 +1,343 @@
+# core/save_format.py
+"""
+Двоичный формат файла сохранения (.rsg), версия 2.
+
+Файл:
+    заголовок  '<4sHH'  сигнатура b'RSAV', версия формата, число секций
+    секции     '<4sBI'  тег, кодек (0 - как есть, 1 - zlib), длина; затем данные
+Секции (порядок в файле - как ниже, META всегда первая):
+    META - JSON: имя, дата создания, карта, версия схемы данных
+    STRS - таблица строк (имена предметов, типы юнитов, фракции, спрайты)
+    GRID - '<HHB' ширина, высота, бит на клетку; затем сетка карты сырыми байтами:
+           по байту uint8 на клетку или, если на карте только пол и стены, по биту;
+           0 бит - сетка не записана (ключевые кадры реплея, где она не менялась)
+    ITEM - все предметы подряд записями ITEM_RECORD
+    UNIT - юниты (UNIT_RECORD); их оружие и инвентарь - следующие записи ITEM
+    GITM - предметы на земле (координаты; предмет - следующая запись ITEM)
+    CRPS - трупы (координаты, спрайт, число предметов из ITEM)
+    RNGS - потоки ГСЧ: слова вихря Мерсенна массивом uint32
+    STAT - JSON: ход, режим боя, выбранный юнит, видимые враги, сид, камера
+Большие секции сжимаются zlib с быстрым уровнем SAVE_COMPRESSION_LEVEL, META
+не сжимается никогда - list_saves читает только её. Неизвестные секции
+пропускаются: новые секции добавляются без смены версии, а несовместимые
+изменения раскладки поднимают FORMAT_VERSION.
+
+Старые сохранения (JSON + base64 + zlib + pickle) читает load_legacy через
+RestrictedUnpickler: он не создаёт объектов по именам классов, так что чужой
+файл не может выполнить код при загрузке.
+"""
+import base64
+import io
+import json
+import pickle
+import struct
+import zlib
+from typing import Dict, List, Tuple
+import numpy as np
+from core.constants import SAVE_COMPRESSION_LEVEL
+from core.exceptions import SaveFormatException
+
+MAGIC = b'RSAV'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<4sHH')
+SECTION_HEADER = struct.Struct('<4sBI')
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+COMPRESS_MIN_SIZE = 512  # Секции короче не сжимаются
+
+# Тип, имя, тип патронов, урон, дальность, патроны (в оружии или магазине), ёмкость, точность, вес
+ITEM_RECORD = struct.Struct('<BHHiiiidd')
+ITEM_WEAPON = 1
+ITEM_AMMO = 2
+# Тип, фракция, x, y, hp, max_hp, энергия, max_энергия, есть оружие, размер инвентаря
+UNIT_RECORD = struct.Struct('<HHiiiiiiBH')
+GROUND_RECORD = struct.Struct('<ii')
+CORPSE_RECORD = struct.Struct('<iiHH')
+STREAM_RECORD = struct.Struct('<HiBdH')  # Имя, версия, есть gauss, gauss, число слов
+COUNT = struct.Struct('<I')
+GRID_HEADER = struct.Struct('<HHB')
+
+class _Strings:
+    """String table: every distinct string is stored once and referenced by index."""
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def __call__(self, text: str) -> int:
+        number = self.index.get(text)
+        if number is None:
+            number = self.index[text] = len(self.strings)
+            self.strings.append(text)
+        return number
+
+    def pack(self) -> bytes:
+        parts = [COUNT.pack(len(self.strings))]
+        for text in self.strings:
+            raw = text.encode('utf-8')
+            parts.append(struct.pack('<H', len(raw)))
+            parts.append(raw)
+        return b''.join(parts)
+
+def _unpack_strings(data: bytes) -> List[str]:
+    (count,) = COUNT.unpack_from(data, 0)
+    offset = COUNT.size
+    strings = []
+    for _ in range(count):
+        (length,) = struct.unpack_from('<H', data, offset)
+        offset += 2
+        strings.append(bytes(data[offset:offset + length]).decode('utf-8'))
+        offset += length
+    return strings
+
+def _records(data: bytes, record: struct.Struct):
+    """Iterate count-prefixed packed records of a section."""
+    (count,) = COUNT.unpack_from(data, 0)
+    end = COUNT.size + count * record.size
+    if end > len(data):
+        raise SaveFormatException("обрезанная секция")
+    return record.iter_unpack(data[COUNT.size:end])
+
+def _pack_item(out: list, strings: _Strings, kind: str, item: dict) -> None:
+    if kind == 'weapon':
+        out.append(ITEM_RECORD.pack(ITEM_WEAPON, strings(item['name']), strings(item['ammo_type']),
+                                    item['damage'], item['max_range'], item['ammo'], item['max_ammo'],
+                                    item['accuracy'], item['weight']))
+    else:
+        out.append(ITEM_RECORD.pack(ITEM_AMMO, strings(item['name']), strings(item['ammo_type']),
+                                    0, 0, item['ammo_count'], 0, 0.0, item['weight']))
+
+def _unpack_item(record: tuple, strings: List[str]) -> Tuple[str, dict]:
+    kind, name, ammo_type, damage, max_range, ammo, max_ammo, accuracy, weight = record
+    if kind == ITEM_WEAPON:
+        return 'weapon', {'name': strings[name], 'damage': damage, 'accuracy': _number(accuracy),
+                          'max_range': max_range, 'weight': _number(weight), 'ammo': ammo,
+                          'max_ammo': max_ammo, 'ammo_type': strings[ammo_type]}
+    if kind == ITEM_AMMO:
+        return 'ammo', {'name': strings[name], 'ammo_type': strings[ammo_type], 'ammo_count': ammo,
+                        'weight': _number(weight)}
+    raise SaveFormatException(f"неизвестный тип предмета {kind}")
+
+def _number(value: float):
+    """Floats that hold whole numbers go back to int (как их записала игра)."""
+    return int(value) if value.is_integer() else value
+
+def _section(tag: bytes, payload: bytes, compress: bool = True) -> bytes:
+    codec = CODEC_RAW
+    if compress and len(payload) >= COMPRESS_MIN_SIZE:
+        payload = zlib.compress(payload, SAVE_COMPRESSION_LEVEL)
+        codec = CODEC_ZLIB
+    return SECTION_HEADER.pack(tag, codec, len(payload)) + payload
+
+def encode_save(save_data: dict, metadata: dict) -> bytes:
+    """Pack a save dict (SaveSystem.build_save_data) and its metadata into the binary format."""
+    strings = _Strings()
+    items: List[bytes] = []
+
+    units = []
+    for unit in save_data['units']:
+        weapon = unit['equipped_weapon']
+        if weapon:
+            _pack_item(items, strings, 'weapon', weapon)
+        for entry in unit['inventory']:
+            _pack_item(items, strings, entry['type'], entry['data'])
+        units.append(UNIT_RECORD.pack(strings(unit['unit_type']), strings(unit['faction']),
+                                      unit['x'], unit['y'], unit['hp'], unit['max_hp'],
+                                      unit['energy'], unit['max_energy'],
+                                      1 if weapon else 0, len(unit['inventory'])))
+
+    ground = []
+    for item in save_data['items']:
+        _pack_item(items, strings, item['type'], item['object'])
+        ground.append(GROUND_RECORD.pack(item['x'], item['y']))
+
+    corpses = []
+    for corpse in save_data['corpses']:
+        for entry in corpse['inventory']:
+            _pack_item(items, strings, entry['type'], entry['data'])
+        corpses.append(CORPSE_RECORD.pack(corpse['x'], corpse['y'], strings(corpse['sprite']),
+                                          len(corpse['inventory'])))
+
+    game_state = dict(save_data['game_state'])
+    rng = game_state.pop('rng', None)
+    streams = []
+    if rng is not None:
+        game_state['seed'] = rng['seed']
+        for name, (version, words, gauss) in rng['streams'].items():
+            streams.append(STREAM_RECORD.pack(strings(name), version, gauss is not None,
+                                              gauss or 0.0, len(words)))
+            streams.append(struct.pack(f'<{len(words)}I', *words))
+
+    map_state = save_data['map_state']
+    # Пол и стены (0/1) упаковываются по биту на клетку: в 8 раз меньше данных для zlib
+    cells = np.frombuffer(bytes(map_state['grid'] or b''), dtype=np.uint8)
+    if map_state['grid'] is None:
+        grid = GRID_HEADER.pack(map_state['width'], map_state['height'], 0)
+    elif cells.size and cells.max() <= 1:
+        grid = GRID_HEADER.pack(map_state['width'], map_state['height'], 1) + np.packbits(cells).tobytes()
+    else:
+        grid = GRID_HEADER.pack(map_state['width'], map_state['height'], 8) + cells.tobytes()
+    meta = dict(metadata, version=save_data['version'], timestamp=save_data['timestamp'])
+    stat = {'game_state': game_state, 'camera': save_data['camera']}
+
+    sections = [
+        _section(b'META', json.dumps(meta, ensure_ascii=False).encode('utf-8'), compress=False),
+        _section(b'STRS', strings.pack()),
+        _section(b'GRID', grid),
+        _section(b'ITEM', COUNT.pack(len(items)) + b''.join(items)),
+        _section(b'UNIT', COUNT.pack(len(units)) + b''.join(units)),
+        _section(b'GITM', COUNT.pack(len(ground)) + b''.join(ground)),
+        _section(b'CRPS', COUNT.pack(len(corpses)) + b''.join(corpses)),
+        _section(b'STAT', json.dumps(stat, ensure_ascii=False).encode('utf-8')),
+    ]
+    if rng is not None:
+        sections.append(_section(b'RNGS', COUNT.pack(len(rng['streams'])) + b''.join(streams)))
+    return HEADER.pack(MAGIC, FORMAT_VERSION, len(sections)) + b''.join(sections)
+
+def _read_sections(data: bytes) -> Dict[bytes, bytes]:
+    if len(data) < HEADER.size:
+        raise SaveFormatException("слишком короткий файл")
+    magic, version, count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise SaveFormatException("неверная сигнатура")
+    if version > FORMAT_VERSION:
+        raise SaveFormatException(f"версия формата {version} новее поддерживаемой ({FORMAT_VERSION})")
+    sections = {}
+    offset = HEADER.size
+    for _ in range(count):
+        if offset + SECTION_HEADER.size > len(data):
+            raise SaveFormatException("обрезанный заголовок секции")
+        tag, codec, length = SECTION_HEADER.unpack_from(data, offset)
+        offset += SECTION_HEADER.size
+        if offset + length > len(data):
+            raise SaveFormatException(f"обрезанная секция {tag.decode('ascii', 'replace')}")
+        payload = data[offset:offset + length]
+        offset += length
+        if codec == CODEC_ZLIB:
+            try:
+                payload = zlib.decompress(payload)
+            except zlib.error as e:
+                raise SaveFormatException(f"повреждённая секция {tag.decode('ascii', 'replace')}: {e}")
+        elif codec != CODEC_RAW:
+            raise SaveFormatException(f"неизвестный кодек {codec}")
+        sections[tag] = payload
+    return sections
+
+def decode_save(data: bytes) -> Tuple[dict, dict]:
+    """Unpack a binary save into (metadata, save dict for LoadSystem.restore_game)."""
+    sections = _read_sections(data)
+    for tag in (b'META', b'STRS', b'GRID', b'ITEM', b'UNIT', b'GITM', b'CRPS', b'STAT'):
+        if tag not in sections:
+            raise SaveFormatException(f"нет секции {tag.decode('ascii')}")
+    try:
+        return _decode_sections(sections)
+    except (struct.error, IndexError, KeyError, ValueError, StopIteration) as e:
+        raise SaveFormatException(f"повреждённые данные: {e}")
+
+def _decode_sections(sections: Dict[bytes, bytes]) -> Tuple[dict, dict]:
+    metadata = json.loads(sections[b'META'])
+    strings = _unpack_strings(sections[b'STRS'])
+
+    items = iter([_unpack_item(record, strings) for record in _records(sections[b'ITEM'], ITEM_RECORD)])
+
+    def inventory(count):
+        return [{'type': kind, 'data': data} for kind, data in (next(items) for _ in range(count))]
+
+    units = []
+    for (unit_type, faction, x, y, hp, max_hp, energy, max_energy,
+         has_weapon, inventory_count) in _records(sections[b'UNIT'], UNIT_RECORD):
+        weapon = next(items)[1] if has_weapon else None
+        units.append({
+            'unit_type': strings[unit_type], 'x': x, 'y': y, 'faction': strings[faction],
+            'hp': hp, 'max_hp': max_hp, 'energy': energy, 'max_energy': max_energy,
+            'inventory': inventory(inventory_count), 'equipped_weapon': weapon,
+        })
+
+    ground = []
+    for x, y in _records(sections[b'GITM'], GROUND_RECORD):
+        kind, data = next(items)
+        ground.append({'type': kind, 'x': x, 'y': y, 'object': data})
+
+    corpses = [{'x': x, 'y': y, 'sprite': strings[sprite], 'inventory': inventory(count)}
+               for x, y, sprite, count in _records(sections[b'CRPS'], CORPSE_RECORD)]
+
+    stat = json.loads(sections[b'STAT'])
+    game_state = stat['game_state']
+    if b'RNGS' in sections:
+        rng_data = sections[b'RNGS']
+        (stream_count,) = COUNT.unpack_from(rng_data, 0)
+        offset = COUNT.size
+        streams = {}
+        for _ in range(stream_count):
+            name, version, has_gauss, gauss, word_count = STREAM_RECORD.unpack_from(rng_data, offset)
+            offset += STREAM_RECORD.size
+            words = list(struct.unpack_from(f'<{word_count}I', rng_data, offset))
+            offset += 4 * word_count
+            streams[strings[name]] = (version, tuple(words), gauss if has_gauss else None)
+        game_state['rng'] = {'seed': game_state.pop('seed'), 'streams': streams}
+
+    grid_data = sections[b'GRID']
+    width, height, bits = GRID_HEADER.unpack_from(grid_data, 0)
+    cells = np.frombuffer(grid_data, dtype=np.uint8, offset=GRID_HEADER.size)
+    if bits == 1 and cells.size * 8 >= width * height:
+        grid = np.unpackbits(cells, count=width * height).tobytes()
+    elif bits == 8 and cells.size == width * height:
+        grid = cells.tobytes()
+    elif bits == 0 and cells.size == 0:
+        grid = None
+    else:
+        raise SaveFormatException("размер сетки не совпадает с картой")
+
+    save_data = {
+        'version': metadata.pop('version'),
+        'timestamp': metadata.pop('timestamp'),
+        'game_state': game_state,
+        'map_state': {'width': width, 'height': height, 'grid': grid, 'items': ground},
+        'units': units,
+        'items': ground,
+        'corpses': corpses,
+        'camera': stat['camera'],
+    }
+    return metadata, save_data
+
+def read_metadata(f) -> dict:
+    """Read only the metadata of an open save file (бинарного или старого JSON)."""
+    head = f.read(HEADER.size + SECTION_HEADER.size)
+    if head[:1] == b'{':
+        return json.loads(head + f.read())['metadata']
+    if len(head) < HEADER.size + SECTION_HEADER.size or head[:4] != MAGIC:
+        raise SaveFormatException("неверная сигнатура")
+    tag, codec, length = SECTION_HEADER.unpack_from(head, HEADER.size)
+    if tag != b'META' or codec != CODEC_RAW:
+        raise SaveFormatException("нет метаданных")
+    metadata = json.loads(f.read(length))
+    metadata.pop('timestamp', None)
+    return metadata
+
+class RestrictedUnpickler(pickle.Unpickler):
+    """Unpickler for legacy saves: only built-in containers and scalars, no classes at all."""
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"запрещённый тип в сохранении: {module}.{name}")
+
+def load_legacy(data: bytes) -> Tuple[dict, dict]:
+    """Read a version 1.0 save (JSON с base64 от zlib от pickle) without executing its code."""
+    try:
+        save_file = json.loads(data)
+        compressed = base64.b64decode(save_file['data'].encode('utf-8'))
+        serialized = zlib.decompress(compressed)
+        save_data = RestrictedUnpickler(io.BytesIO(serialized)).load()
+    except (ValueError, KeyError, TypeError, zlib.error, pickle.UnpicklingError, EOFError) as e:
+        raise SaveFormatException(f"старое сохранение не читается: {e}")
+    if not isinstance(save_data, dict):
+        raise SaveFormatException("старое сохранение не читается: неожиданный тип данных")
+    return save_file.get('metadata', {}), save_data
+
+def load_save_bytes(data: bytes) -> Tuple[dict, dict]:
+    """Decode a save file of any supported version into (metadata, save dict)."""
+    if data[:4] == MAGIC:
+        metadata, save_data = decode_save(data)
+        if save_data['map_state']['grid'] is None:
+            raise SaveFormatException("нет сетки карты")
+        return metadata, save_data
+    if data.lstrip()[:1] == b'{':
+        return load_legacy(data)
+    raise SaveFormatException("неизвестный формат файла")
@@ -1,33 +1,88 @@
 # core/save_system.py
 """
 Система сохранения и загрузки игрового состояния
+
+Файлы .rsg пишутся в двоичном формате с версией (core.save_format);
+сохранения старого формата (JSON с pickle внутри) по-прежнему читаются.
+Запись атомарная (core.save_writer), save_game_async пишет файл в фоне.
 """
-import pickle
-import json
-import zlib
-import base64
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
 import os
+from core.log import get_logger
+from core.save_format import encode_save, load_save_bytes, read_metadata
+from core.save_writer import SaveWriter, write_atomic
+
+log = get_logger('save')
 
 class SaveSystem:
     def __init__(self, save_dir="saves"):
+        # save_dir=None - только сериализация состояния (реплеи), без папки сохранений
         self.save_dir = save_dir
-        os.makedirs(save_dir, exist_ok=True)
+        if save_dir is not None:
+            os.makedirs(save_dir, exist_ok=True)
+        self._writer = None  # Фоновый писатель создаётся при первом save_game_async
         
     def save_game(self, game_manager, filename: Optional[str] = None) -> str:
         """
         Сохраняет игровое состояние.
         Возвращает путь к файлу сохранения.
         """
-        if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"save_{timestamp}.rsg"
-        
+        filename = self._save_filename(filename)
         filepath = os.path.join(self.save_dir, filename)
         
-        # Собираем состояние игры
-        save_data = {
+        save_data = self.build_save_data(game_manager)
+        
+        try:
+            # Упаковываем в двоичный формат с метаданными
+            data = encode_save(save_data, self._metadata(filename))
+            write_atomic(filepath, data)
+            
+            log.info("Игра сохранена: %s", filepath)
+            return filepath
+            
+        except Exception as e:
+            raise RuntimeError(f"Ошибка сохранения игры: {e}")
+    
+    def save_game_async(self, game_manager, filename: Optional[str] = None,
+                        callback: Optional[Callable] = None) -> str:
+        """
+        Сохраняет игру в фоне: снимок состояния берётся сразу, упаковка и запись - в потоке.
+        callback(filepath, error) вызывается из poll_saves()/wait_saves().
+        Возвращает путь к будущему файлу сохранения.
+        """
+        filename = self._save_filename(filename)
+        filepath = os.path.join(self.save_dir, filename)
+        save_data = self.build_save_data(game_manager)
+        if self._writer is None:
+            self._writer = SaveWriter()
+        self._writer.submit(filepath, save_data, self._metadata(filename), callback)
+        return filepath
+    
+    def poll_saves(self) -> int:
+        """Run callbacks of finished background saves (вызывать из главного потока)."""
+        return self._writer.poll() if self._writer else 0
+    
+    def wait_saves(self, timeout: Optional[float] = None) -> bool:
+        """Wait until background saves are on disk (перед загрузкой и выходом)."""
+        return self._writer.wait(timeout) if self._writer else True
+    
+    def _save_filename(self, filename: Optional[str]) -> str:
+        if filename:
+            return filename
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"save_{timestamp}.rsg"
+    
+    def _metadata(self, filename: str) -> Dict[str, Any]:
+        return {
+            'name': filename,
+            'created': datetime.now().isoformat(),
+            'map_name': 'test'
+        }
+    
+    def build_save_data(self, game_manager) -> Dict[str, Any]:
+        """Собирает состояние игры в словарь (для файла сохранения и ключевых кадров реплея)."""
+        return {
             'version': '1.0',
             'timestamp': datetime.now().isoformat(),
             'game_state': self._serialize_game_state(game_manager),
@@ -41,51 +96,21 @@ class SaveSystem:
                 'zoom': game_manager.camera.zoom
             }
         }
-        
-        try:
-            # Сериализуем и сжимаем данные
-            serialized = pickle.dumps(save_data)
-            compressed = zlib.compress(serialized, level=9)
-            
-            # Кодируем в base64 для надежности
-            encoded = base64.b64encode(compressed).decode('utf-8')
-            
-            # Сохраняем с метаданными
-            save_file = {
-                'metadata': {
-                    'version': '1.0',
-                    'name': filename,
-                    'created': datetime.now().isoformat(),
-                    'map_name': 'test'
-                },
-                'data': encoded
-            }
-            
-            with open(filepath, 'w') as f:
-                json.dump(save_file, f, indent=2)
-            
-            print(f"Игра сохранена: {filepath}")
-            return filepath
-            
-        except Exception as e:
-            raise RuntimeError(f"Ошибка сохранения игры: {e}")
     
     def load_game(self, filepath: str) -> Dict[str, Any]:
         """
         Загружает игровое состояние из файла.
         Возвращает словарь с данными для восстановления.
         """
+        self.wait_saves()  # Файл может ещё писаться в фоне
         try:
-            with open(filepath, 'r') as f:
-                save_file = json.load(f)
+            with open(filepath, 'rb') as f:
+                data = f.read()
             
-            # Декодируем данные
-            encoded = save_file['data']
-            compressed = base64.b64decode(encoded.encode('utf-8'))
-            serialized = zlib.decompress(compressed)
-            save_data = pickle.loads(serialized)
+            # Двоичный формат или старый JSON - определяется по сигнатуре
+            _metadata, save_data = load_save_bytes(data)
             
-            print(f"Игра загружена: {filepath}")
+            log.info("Игра загружена: %s", filepath)
             return save_data
             
         except Exception as e:
@@ -93,13 +118,14 @@ class SaveSystem:
     
     def list_saves(self) -> list:
         """Возвращает список доступных сохранений."""
+        self.wait_saves()  # Только что начатые сохранения тоже должны попасть в список
         saves = []
         for filename in os.listdir(self.save_dir):
             if filename.endswith('.rsg'):
                 filepath = os.path.join(self.save_dir, filename)
                 try:
-                    with open(filepath, 'r') as f:
-                        metadata = json.load(f)['metadata']
+                    with open(filepath, 'rb') as f:
+                        metadata = read_metadata(f)
                     saves.append({
                         'filename': filename,
                         'filepath': filepath,
@@ -122,7 +148,8 @@ class SaveSystem:
                 game_manager.game_state.selected_unit,
                 game_manager.current_map.units
             ),
-            'visible_enemies': list(game_manager.visible_enemies)
+            'visible_enemies': list(game_manager.visible_enemies),
+            'rng': game_manager.rng.get_state()
         }
     
     def _serialize_map(self, game_map):
@@ -130,7 +157,7 @@ class SaveSystem:
         return {
             'width': game_map.width,
             'height': game_map.height,
-            'grid': game_map.grid,
+            'grid': game_map.grid.tobytes(),  # uint8 построчно, width*height байт
             'items': self._serialize_items(game_map.items)
         }
     
@@ -217,7 +244,7 @@ class SaveSystem:
                 'x': corpse['x'],
                 'y': corpse['y'],
                 'sprite': corpse['sprite'],
-                'inventory': self._serialize_inventory(corrode['inventory'])
+                'inventory': self._serialize_inventory(corpse['inventory'])
             }
             serialized.append(corpse_data)
         return serialized
@@ -0,0 +1,123 @@
+# core/save_writer.py
+"""
+Фоновая запись сохранений.
+
+Снимок состояния (SaveSystem.build_save_data) собирается в главном потоке:
+это только копирование в словари, и пока оно идёт, игра не меняется. Упаковка
+в двоичный формат и запись на диск выполняются в отдельном потоке, так что
+кадр не ждёт диска.
+
+Файл пишется атомарно: сначала во временный файл рядом с целевым, затем
+fsync и os.replace. Если игра упадёт посреди записи, на диске останется
+прежнее сохранение целиком (и, возможно, осиротевший .tmp), но никогда -
+наполовину записанный .rsg.
+
+Колбэки о завершении не вызываются из рабочего потока: они копятся в очереди
+и выполняются в poll(), который главный цикл зовёт каждый кадр - уведомления
+и прочий UI трогаем только из главного потока.
+"""
+import os
+import queue
+import tempfile
+import threading
+from collections import deque
+from typing import Callable, Optional
+from core.log import get_logger
+from core.save_format import encode_save
+
+log = get_logger('save')
+
+def write_atomic(filepath: str, data: bytes) -> None:
+    """Write data so that filepath holds either the old or the new contents, never a partial file."""
+    directory = os.path.dirname(filepath) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filepath)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+def _fsync_directory(directory: str) -> None:
+    # Переименование надёжно только после fsync каталога; в Windows каталог так не открыть
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class SaveWriter:
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._finished = deque()  # (колбэк, путь, ошибка) для poll()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._thread = None
+
+    @property
+    def pending(self) -> int:
+        """Number of saves submitted but not yet written."""
+        return self._pending
+
+    def submit(self, filepath: str, save_data: dict, metadata: dict,
+               callback: Optional[Callable] = None) -> None:
+        """
+        Queue a save snapshot for writing.
+
+        Args:
+            filepath: Путь к файлу .rsg
+            save_data: Снимок из SaveSystem.build_save_data (после передачи не изменяется)
+            metadata: Метаданные файла
+            callback: callback(filepath, error) - вызывается из poll(); error=None при успехе
+        """
+        with self._idle:
+            self._pending += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='save-writer', daemon=True)
+            self._thread.start()
+        self._jobs.put((filepath, save_data, metadata, callback))
+
+    def _run(self):
+        # Один поток: сохранения пишутся строго в порядке отправки
+        while True:
+            filepath, save_data, metadata, callback = self._jobs.get()
+            error = None
+            try:
+                write_atomic(filepath, encode_save(save_data, metadata))
+                log.info("Игра сохранена: %s", filepath)
+            except Exception as e:
+                error = e
+                log.error("Ошибка фонового сохранения %s: %s", filepath, e)
+            self._finished.append((callback, filepath, error))
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+    def poll(self) -> int:
+        """Run callbacks of finished saves on the calling thread. Returns how many finished."""
+        count = 0
+        while self._finished:
+            callback, filepath, error = self._finished.popleft()
+            if callback:
+                callback(filepath, error)
+            count += 1
+        return count
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until all submitted saves are written, then poll(). False on timeout."""
+        with self._idle:
+            done = self._idle.wait_for(lambda: self._pending == 0, timeout)
+        self.poll()
+        return done
@@ -0,0 +1,164 @@
+# core/snapshot.py
+"""
+Компактные неизменяемые снимки игрового состояния.
+
+Снимок хранит ссылки на живые объекты (юниты, предметы, трупы) и кортежи
+их изменяемых полей: позиция, HP, энергия, экипировка, состав инвентаря,
+патроны в оружии и магазинах, очередь хода и состояние потоков ГСЧ
+матча (иначе отмена промаха позволила бы перебросить выстрел). Восстановление
+возвращает эти поля на место, не создавая новых объектов, поэтому ссылки
+из UI, ИИ и журнала команд остаются действительными.
+
+Структурное разделение: capture(..., previous=снимок) переиспользует
+кортежи предыдущего снимка для всего, что не изменилось, а сетка карты
+копируется, только если сменилась её версия (grid_version).
+Летящие пули в снимок не входят.
+"""
+import sys
+from typing import Optional
+
+class GameSnapshot:
+    __slots__ = ('game_map', 'grid', 'grid_version', 'units', 'unit_states', 'item_states',
+                 'items', 'corpses', 'turn_state', 'rng_state')
+
+    def __init__(self, game_map, grid, grid_version, units, unit_states, item_states,
+                 items, corpses, turn_state, rng_state):
+        self.game_map = game_map          # Карта, к которой относится снимок
+        self.grid = grid                  # Копия сетки (только для чтения)
+        self.grid_version = grid_version
+        self.units = units                # Кортеж юнитов в порядке game_map.units
+        self.unit_states = unit_states    # Кортеж (x, y, hp, energy, оружие, инвентарь) по юнитам
+        self.item_states = item_states    # Кортеж (предмет, патроны) для всех оружий и магазинов
+        self.items = items                # Кортеж словарей предметов на карте
+        self.corpses = corpses            # Кортеж (труп, инвентарь трупа)
+        self.turn_state = turn_state      # (фракция, состояние боя, выбранный юнит, атакующий, оружие)
+        self.rng_state = rng_state        # RNGService.get_state() на момент снимка
+
+def _share(new, old):
+    """Return old if it is equal to new, so unchanged parts are shared between snapshots."""
+    return old if old is not None and old == new else new
+
+def _ammo_of(item):
+    """Mutable ammo counter of a weapon or a magazine (None for other items)."""
+    if hasattr(item, 'ammo'):
+        return item.ammo
+    return getattr(item, 'ammo_count', None)
+
+def capture(game_manager, previous: Optional[GameSnapshot] = None) -> GameSnapshot:
+    """Take a snapshot of game_manager's world and turn state."""
+    game_map = game_manager.current_map
+    game_state = game_manager.game_state
+    if previous is not None and previous.game_map is not game_map:
+        previous = None
+
+    # Сетку копируем, только если она менялась с прошлого снимка
+    if previous is not None and previous.grid_version == game_map.grid_version:
+        grid = previous.grid
+    else:
+        grid = game_map.grid.copy()
+        grid.flags.writeable = False
+
+    old_states = {}
+    if previous is not None:
+        old_states = dict(zip(previous.units, previous.unit_states))
+
+    units = tuple(game_map.units)
+    unit_states = []
+    carried = []
+    for unit in units:
+        inventory = tuple(unit.inventory)
+        state = (unit.x, unit.y, unit.hp, unit.energy, unit.equipped_weapon, inventory)
+        unit_states.append(_share(state, old_states.get(unit)))
+        carried.extend(inventory)
+        if unit.equipped_weapon is not None:
+            carried.append(unit.equipped_weapon)
+
+    corpses = tuple((corpse, tuple(corpse['inventory'])) for corpse in game_map.corpses)
+    for _, inventory in corpses:
+        carried.extend(inventory)
+    carried.extend(item['object'] for item in game_map.items if 'object' in item)
+    item_states = tuple((item, _ammo_of(item)) for item in carried)
+
+    turn_state = (game_state.turn_faction, game_state.combat_state, game_state.selected_unit,
+                  game_state.targeting_unit, game_state.targeting_weapon)
+    rng_state = game_manager.rng.get_state()
+
+    if previous is None:
+        return GameSnapshot(game_map, grid, game_map.grid_version, units, tuple(unit_states),
+                            item_states, tuple(game_map.items), corpses, turn_state, rng_state)
+    return GameSnapshot(game_map, grid, game_map.grid_version,
+                        _share(units, previous.units),
+                        _share(tuple(unit_states), previous.unit_states),
+                        _share(item_states, previous.item_states),
+                        _share(tuple(game_map.items), previous.items),
+                        _share(corpses, previous.corpses),
+                        _share(turn_state, previous.turn_state),
+                        _share(rng_state, previous.rng_state))
+
+def restore(game_manager, snapshot: GameSnapshot) -> None:
+    """Put game_manager's world back into the state recorded in snapshot."""
+    game_map = snapshot.game_map
+    game_manager.current_map = game_map
+    game_manager.game_state.current_map = game_map
+
+    if game_map.grid_version != snapshot.grid_version:
+        game_map.set_grid(snapshot.grid)  # set_grid копирует массив
+
+    # Занятость и пространственный индекс перестраиваем, только если что-то сдвинулось
+    moved = tuple(game_map.units) != snapshot.units
+    for unit, (x, y, hp, energy, weapon, inventory) in zip(snapshot.units, snapshot.unit_states):
+        if unit.x != x or unit.y != y:
+            moved = True
+            unit.x, unit.y = x, y
+        unit.hp = hp
+        unit.energy = energy
+        unit.equipped_weapon = weapon
+        unit.inventory[:] = inventory
+    if moved:
+        game_map.set_units(snapshot.units)
+
+    for item, ammo in snapshot.item_states:
+        if hasattr(item, 'ammo'):
+            item.ammo = ammo
+        elif ammo is not None:
+            item.ammo_count = ammo
+
+    if tuple(game_map.items) != snapshot.items:
+        game_map.set_items(snapshot.items)
+    for corpse, inventory in snapshot.corpses:
+        corpse['inventory'][:] = inventory
+    if tuple(game_map.corpses) != tuple(corpse for corpse, _ in snapshot.corpses):
+        game_map.set_corpses([corpse for corpse, _ in snapshot.corpses])
+
+    game_state = game_manager.game_state
+    (game_state.turn_faction, game_state.combat_state, game_state.selected_unit,
+     game_state.targeting_unit, game_state.targeting_weapon) = snapshot.turn_state
+    game_manager.selected_unit = game_state.selected_unit
+
+    # Потоки сохраняют идентичность объектов, но привязку боя обновляем на всякий случай
+    if game_manager.rng.get_state() != snapshot.rng_state:
+        game_manager.rng.set_state(snapshot.rng_state)
+    game_manager.combat_system.rng = game_manager.rng.stream('combat')
+
+    game_manager.combat_system.clear_bullets()
+    game_manager.update_line_of_sight()
+
+def unchanged(before: GameSnapshot, after: GameSnapshot) -> bool:
+    """Check if after (captured with previous=before) records no changes at all."""
+    return all(getattr(before, name) is getattr(after, name) for name in GameSnapshot.__slots__)
+
+def estimate_size(snapshot: GameSnapshot, previous: Optional[GameSnapshot] = None) -> int:
+    """Rough number of bytes the snapshot adds on top of previous (shared parts are free)."""
+    size = sys.getsizeof(snapshot)
+    if previous is None or snapshot.grid is not previous.grid:
+        size += snapshot.grid.nbytes
+    if previous is None or snapshot.rng_state is not previous.rng_state:
+        size += sum(sys.getsizeof(internal) for _, internal, _ in snapshot.rng_state['streams'].values())
+    for name in ('units', 'unit_states', 'item_states', 'items', 'corpses', 'turn_state'):
+        part = getattr(snapshot, name)
+        if previous is None or part is not getattr(previous, name):
+            size += sys.getsizeof(part)
+            if name in ('unit_states', 'item_states', 'corpses'):
+                old = set(map(id, getattr(previous, name))) if previous is not None else ()
+                size += sum(sys.getsizeof(entry) for entry in part if id(entry) not in old)
+    return size
@@ -1,10 +1,23 @@
 import pygame
 import os
+from collections import OrderedDict
+from core.constants import SPRITE_CACHE_MAX_BYTES, SPRITE_SIZE_STEP
+from core.log import get_logger
+
+log = get_logger('ui')
 
 class SpriteLoader:
-    def __init__(self, sprite_dir='resources/sprites'):
+    def __init__(self, sprite_dir='resources/sprites', cache_max_bytes=SPRITE_CACHE_MAX_BYTES,
+                 size_step=SPRITE_SIZE_STEP):
         self.sprite_dir = sprite_dir
         self.sprites = {}
+        # LRU-кэш отмасштабированных спрайтов: (filename, (w, h)) -> Surface
+        self.scaled_cache = OrderedDict()
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_bytes = 0
+        self.size_step = size_step
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.load_sprites()
     
     def load_sprites(self):
@@ -15,16 +28,82 @@ class SpriteLoader:
                 try:
                     sprite = pygame.image.load(path).convert_alpha()
                     self.sprites[filename] = sprite
+                    self.invalidate(filename)
                 except pygame.error:
-                    print(f"Could not load sprite: {path}")
+                    log.warning("Could not load sprite: %s", path)
     
     def get_sprite(self, filename):
         """Get sprite by filename"""
         return self.sprites.get(filename)
     
-    def get_scaled_sprite(self, filename, size):
-        """Get scaled sprite"""
+    def get_scaled_sprite(self, filename, size, exact=False):
+        """
+        Get scaled sprite from the LRU cache.
+        Если exact=False, размер квантуется с шагом size_step, чтобы плавный зум
+        не создавал новую поверхность на каждый кадр.
+        Возвращаемая поверхность общая - её нельзя изменять.
+        """
         sprite = self.get_sprite(filename)
-        if sprite:
-            return pygame.transform.scale(sprite, size)
-        return None
\ No newline at end of file
+        if not sprite:
+            return None
+        
+        size = self._normalize_size(size, exact)
+        key = (filename, size)
+        scaled = self.scaled_cache.get(key)
+        if scaled is not None:
+            self.scaled_cache.move_to_end(key)
+            self.cache_hits += 1
+            return scaled
+        
+        self.cache_misses += 1
+        scaled = pygame.transform.scale(sprite, size)
+        self._cache_put(key, scaled)
+        return scaled
+    
+    def _normalize_size(self, size, exact):
+        """Приводит размер к целым пикселям и, если нужно, квантует его."""
+        width, height = int(size[0]), int(size[1])
+        step = self.size_step
+        if not exact and step > 1:
+            width = int(round(width / step)) * step
+            height = int(round(height / step)) * step
+        return max(1, width), max(1, height)
+    
+    def _cache_put(self, key, surface):
+        """Add surface to the cache, evicting least recently used entries by memory."""
+        self.scaled_cache[key] = surface
+        self.cache_bytes += self._surface_bytes(surface)
+        # Последний добавленный элемент не выбрасываем, даже если он один больше лимита
+        while self.cache_bytes > self.cache_max_bytes and len(self.scaled_cache) > 1:
+            _, evicted = self.scaled_cache.popitem(last=False)
+            self.cache_bytes -= self._surface_bytes(evicted)
+    
+    @staticmethod
+    def _surface_bytes(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+    
+    def invalidate(self, filename=None):
+        """Drop cached scaled sprites for filename (or all of them if filename is None)."""
+        if filename is None:
+            self.scaled_cache.clear()
+            self.cache_bytes = 0
+            return
+        for key in [k for k in self.scaled_cache if k[0] == filename]:
+            self.cache_bytes -= self._surface_bytes(self.scaled_cache.pop(key))
+    
+    def get_cache_stats(self):
+        """Get scaled sprite cache statistics."""
+        total = self.cache_hits + self.cache_misses
+        return {
+            'entries': len(self.scaled_cache),
+            'bytes': self.cache_bytes,
+            'max_bytes': self.cache_max_bytes,
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / total if total else 0.0
+        }
+    
+    def reset_cache_stats(self):
+        """Reset hit/miss counters."""
+        self.cache_hits = 0
+        self.cache_misses = 0
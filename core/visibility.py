@@ -0,0 +1,186 @@
+# core/visibility.py
+"""
+Инкрементальный движок видимости для всех фракций.
+
+Для каждого юнита хранится поле зрения (множество клеток, см. field_of_view)
+и множество видимых им врагов. Враг виден, если его клетка входит в поле
+зрения - это проверка принадлежности, а не отдельный луч на каждую пару.
+Пересчитывается только то, что изменилось: поле зрения сдвинувшегося юнита,
+принадлежность сдвинувшейся цели и поля зрения рядом с изменёнными клетками.
+"""
+from core.constants import MAX_VISION_RANGE
+from core.field_of_view import compute_fov, VisibilityBitmap
+
+class VisibilityEngine:
+    def __init__(self, vision_range=MAX_VISION_RANGE):
+        self.vision_range = vision_range
+        self.game_map = None
+        self._grid = None
+        self._grid_version = 0
+        self.fov = {}        # viewer -> set((x, y)), поле зрения юнита
+        self.visible = {}    # viewer -> set(target), кого видит юнит
+        self.positions = {}  # unit -> (x, y) на момент последнего пересчёта
+        self.seen_by = {}    # faction -> {target: число юнитов фракции, видящих target}
+        self.bitmaps = {}    # faction -> VisibilityBitmap (объединённое поле зрения)
+        self.versions = {}   # faction -> номер версии снимка видимости
+        self._snapshots = {} # faction -> (version, frozenset координат)
+
+    def reset(self, game_map=None):
+        """Forget everything and rebuild visibility for game_map from scratch."""
+        self.game_map = game_map
+        self._grid = game_map.grid if game_map else None
+        self._grid_version = game_map.grid_version if game_map else 0
+        self.fov.clear()
+        self.visible.clear()
+        self.positions.clear()
+        self.seen_by.clear()
+        self.bitmaps.clear()
+        for faction in self.versions:
+            self.versions[faction] += 1
+        if game_map:
+            self.refresh(game_map)
+
+    def refresh(self, game_map):
+        """Bring visibility up to date with unit positions and map changes."""
+        if game_map is not self.game_map or game_map.grid is not self._grid:
+            self.reset(game_map)
+            return
+
+        current = {unit: (unit.x, unit.y) for unit in game_map.units if unit.hp > 0}
+
+        for unit in [u for u in self.positions if u not in current]:
+            self._remove_unit(unit)
+
+        if game_map.grid_version != self._grid_version:
+            cells = game_map.get_tile_changes(self._grid_version, reader=self)
+            if cells is None:
+                self.reset(game_map)
+                return
+            self._grid_version = game_map.grid_version
+            self._update_cells(cells, current)
+
+        changed = [unit for unit, pos in current.items() if self.positions.get(unit) != pos]
+        for unit in changed:
+            self._update_unit(unit, current)
+
+    def get_snapshot(self, faction):
+        """
+        Возвращает (версия, frozenset координат) врагов, видимых фракцией.
+        Снимок пересобирается только если с прошлого вызова что-то изменилось.
+        """
+        version = self.versions.setdefault(faction, 0)
+        cached = self._snapshots.get(faction)
+        if cached and cached[0] == version:
+            return cached
+        counts = self.seen_by.get(faction, {})
+        snapshot = (version, frozenset((target.x, target.y) for target in counts))
+        self._snapshots[faction] = snapshot
+        return snapshot
+
+    def visible_enemies(self, faction):
+        """Get coordinates of enemies visible to faction."""
+        return self.get_snapshot(faction)[1]
+
+    def get_visible_targets(self, unit):
+        """Get enemy units visible to a specific unit."""
+        return self.visible.get(unit, set())
+
+    def is_unit_visible(self, target, faction):
+        """Check if target is seen by any unit of faction."""
+        return target in self.seen_by.get(faction, {})
+
+    def get_bitmap(self, faction):
+        """Get the union field-of-view bitmap for faction (None if faction has no units)."""
+        return self.bitmaps.get(faction)
+
+    def is_tile_visible(self, x, y, faction):
+        """Check if tile is inside the field of view of any unit of faction."""
+        bitmap = self.bitmaps.get(faction)
+        return bitmap is not None and bitmap.is_visible(x, y)
+
+    # ===== INTERNALS =====
+
+    def _bump(self, faction):
+        self.versions[faction] = self.versions.get(faction, 0) + 1
+
+    def _set_pair(self, viewer, target, is_visible):
+        """Update a single viewer -> target visibility pair."""
+        seen = self.visible[viewer]
+        if is_visible == (target in seen):
+            return
+        counts = self.seen_by.setdefault(viewer.faction, {})
+        if is_visible:
+            seen.add(target)
+            counts[target] = counts.get(target, 0) + 1
+        else:
+            seen.discard(target)
+            counts[target] -= 1
+            if counts[target] == 0:
+                del counts[target]
+        self._bump(viewer.faction)
+
+    def _get_bitmap(self, faction):
+        bitmap = self.bitmaps.get(faction)
+        if bitmap is None:
+            bitmap = VisibilityBitmap(self.game_map.width, self.game_map.height)
+            self.bitmaps[faction] = bitmap
+        return bitmap
+
+    def _set_fov(self, viewer, cells):
+        """Replace viewer's field of view, keeping the faction bitmap in sync."""
+        bitmap = self._get_bitmap(viewer.faction)
+        old = self.fov.get(viewer)
+        if old is not None:
+            bitmap.remove(old)
+        if cells is None:
+            self.fov.pop(viewer, None)
+        else:
+            bitmap.add(cells)
+            self.fov[viewer] = cells
+
+    def _recompute_viewer(self, viewer, current):
+        """One shadowcasting sweep for viewer, then membership checks for all enemies."""
+        cells = compute_fov(self.game_map, viewer.x, viewer.y, self.vision_range)
+        self._set_fov(viewer, cells)
+        for target, pos in current.items():
+            if target.faction != viewer.faction:
+                self._set_pair(viewer, target, pos in cells)
+
+    def _remove_unit(self, unit):
+        """Drop a dead or removed unit both as viewer and as target."""
+        for target in list(self.visible.get(unit, ())):
+            self._set_pair(unit, target, False)
+        self.visible.pop(unit, None)
+        self._set_fov(unit, None)
+        for viewer, seen in self.visible.items():
+            if unit in seen:
+                self._set_pair(viewer, unit, False)
+        del self.positions[unit]
+
+    def _update_unit(self, unit, current):
+        """Recompute field of view of a unit that appeared or moved, and who sees it now."""
+        was_seen_by = [faction for faction, counts in self.seen_by.items() if unit in counts]
+        pos = current[unit]
+        self.positions[unit] = pos
+        self.visible.setdefault(unit, set())
+        self._recompute_viewer(unit, current)
+
+        # Остальные юниты проверяют новую клетку по уже посчитанному полю зрения
+        for viewer, cells in self.fov.items():
+            if viewer.faction != unit.faction and viewer in current:
+                self._set_pair(viewer, unit, pos in cells)
+
+        # Координаты в снимках тех, кто продолжает видеть юнита, тоже сменились
+        for faction in was_seen_by:
+            self._bump(faction)
+
+    def _update_cells(self, cells, current):
+        """Re-sweep only viewers whose vision radius covers a changed cell."""
+        if not cells:
+            return
+        radius = self.vision_range
+        for viewer in list(self.fov):
+            if viewer not in current:
+                continue
+            if any(abs(viewer.x - x) <= radius and abs(viewer.y - y) <= radius for x, y in cells):
+                self._recompute_viewer(viewer, current)
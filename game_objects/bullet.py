@@ -1,10 +1,150 @@
 # game_objects/bullet.py
-import pygame
 import math
 import random
+import numpy as np
+from core.constants import FLOOR_TILE, BULLET_MAX_RANGE
+
+def aim_direction(start_x, start_y, target_x, target_y, accuracy, rng=random):
+    """
+    Unit direction vector of a shot, rotated by a random error within the accuracy cone.
+    Разброс растёт с падением точности и с расстоянием до цели; rng - поток случайных
+    чисел (по умолчанию глобальный модуль random).
+    """
+    dx = target_x - start_x
+    dy = target_y - start_y
+    distance_to_target = math.sqrt(dx**2 + dy**2)
+
+    # Базовое направление (нормализованный вектор)
+    if distance_to_target != 0:
+        dir_x = dx / distance_to_target
+        dir_y = dy / distance_to_target
+    else:
+        # Если цель на той же позиции (маловероятно, но на всякий случай)
+        dir_x, dir_y = 0, 0
+
+    # --- Учёт точности ---
+    base_error = (100 - accuracy) / 10
+    distance_factor = max(1.0, distance_to_target / 5.0)
+    max_error_angle_deg = base_error * distance_factor
+
+    error_angle_rad = math.radians(rng.uniform(-max_error_angle_deg, max_error_angle_deg))
+
+    # Поворот базового направления на случайный угол
+    cos_angle = math.cos(error_angle_rad)
+    sin_angle = math.sin(error_angle_rad)
+
+    return (dir_x * cos_angle - dir_y * sin_angle,
+            dir_x * sin_angle + dir_y * cos_angle)
+
+def _unit_hit_t(unit, x1, y1, seg_x, seg_y, seg_len_sq, radius_sq):
+    """
+    Parameter t in [0, 1] of the segment point closest to unit's center,
+    or None if the segment misses unit's collision circle.
+    """
+    center_x = unit.x + 0.5
+    center_y = unit.y + 0.5
+    t = 0.0
+    if seg_len_sq > 0:
+        t = ((center_x - x1) * seg_x + (center_y - y1) * seg_y) / seg_len_sq
+        t = min(1.0, max(0.0, t))
+    dx = x1 + seg_x * t - center_x
+    dy = y1 + seg_y * t - center_y
+    if dx * dx + dy * dy <= radius_sq:
+        return t
+    return None
+
+def trace_segment(game_map, x1, y1, x2, y2, collision_radius, attacker):
+    """
+    Walk the grid cells crossed by segment (x1, y1)-(x2, y2) in order (Amanatides-Woo).
+    Возвращает ('hit_wall', (x, y), t), ('hit_unit', unit, t) или None, где t в [0, 1] -
+    доля отрезка до точки столкновения. Круг юнита целиком лежит в его клетке,
+    поэтому первое попадание в порядке обхода клеток и есть самое раннее.
+    """
+    seg_x = x2 - x1
+    seg_y = y2 - y1
+    seg_len_sq = seg_x * seg_x + seg_y * seg_y
+    radius_sq = collision_radius * collision_radius
+
+    cell_x = math.floor(x1)
+    cell_y = math.floor(y1)
+    end_x = math.floor(x2)
+    end_y = math.floor(y2)
+
+    # Шаг по каждой оси и значения t на ближайших границах клеток
+    if seg_x > 0:
+        step_x, t_max_x, t_delta_x = 1, (cell_x + 1 - x1) / seg_x, 1 / seg_x
+    elif seg_x < 0:
+        step_x, t_max_x, t_delta_x = -1, (cell_x - x1) / seg_x, -1 / seg_x
+    else:
+        step_x, t_max_x, t_delta_x = 0, math.inf, math.inf
+    if seg_y > 0:
+        step_y, t_max_y, t_delta_y = 1, (cell_y + 1 - y1) / seg_y, 1 / seg_y
+    elif seg_y < 0:
+        step_y, t_max_y, t_delta_y = -1, (cell_y - y1) / seg_y, -1 / seg_y
+    else:
+        step_y, t_max_y, t_delta_y = 0, math.inf, math.inf
+
+    t_enter = 0.0
+    while True:
+        # Из-за накопленной погрешности обход может шагнуть за конец отрезка
+        # (конец ровно на границе клетки): такая клетка отрезку уже не принадлежит
+        if t_enter > 1.0:
+            return None
+        if not game_map.is_walkable(cell_x, cell_y):
+            return ('hit_wall', (cell_x, cell_y), t_enter)
+
+        best_unit = None
+        best_t = 2.0
+        for unit in game_map.get_units_at(cell_x, cell_y):
+            # Пропускаем стреляющего юнита
+            if unit is attacker:
+                continue
+            t = _unit_hit_t(unit, x1, y1, seg_x, seg_y, seg_len_sq, radius_sq)
+            if t is not None and t < best_t:
+                best_unit, best_t = unit, t
+        if best_unit:
+            return ('hit_unit', best_unit, best_t)
+
+        if cell_x == end_x and cell_y == end_y:
+            return None
+        if t_max_x < t_max_y:
+            cell_x += step_x
+            t_enter = t_max_x
+            t_max_x += t_delta_x
+        else:
+            cell_y += step_y
+            t_enter = t_max_y
+            t_max_y += t_delta_y
+
+def resolve_trajectory(game_map, start_x, start_y, vx, vy, max_range, collision_radius,
+                       attacker, step=None):
+    """
+    Resolve a whole flight at once: one cell walk over the full range.
+    Возвращает (result, value, path): result/value как у Bullet.update
+    ('hit_unit', unit) / ('hit_wall', (x, y)) / ('miss', (x, y)), а path -
+    позиции пули в конце каждого тика длиной step (None, если step не задан).
+    """
+    end_x = start_x + vx * max_range
+    end_y = start_y + vy * max_range
+    hit = trace_segment(game_map, start_x, start_y, end_x, end_y, collision_radius, attacker)
+    if hit:
+        result, value, t = hit
+    else:
+        result, value, t = 'miss', (int(end_x), int(end_y)), 1.0
+
+    path = None
+    if step:
+        distance = max_range * t
+        ticks = math.ceil(distance / step)
+        path = [(start_x + vx * min(i * step, distance), start_y + vy * min(i * step, distance))
+                for i in range(ticks + 1)]
+    return result, value, path
 
 class Bullet:
-    def __init__(self, start_x, start_y, target_x, target_y, speed, damage, attacker_unit, accuracy):
+    COLLISION_RADIUS = 0.3  # Радиус круга попадания вокруг центра клетки юнита
+
+    def __init__(self, start_x, start_y, target_x, target_y, speed, damage, attacker_unit, accuracy,
+                 rng=random):
         self.x = start_x
         self.y = start_y
         self.speed = speed
@@ -12,93 +152,63 @@ class Bullet:
         self.attacker = attacker_unit # Ссылка на юнита, который выстрелил
         self.start_x = start_x
         self.start_y = start_y
+        self.prev_x = start_x  # Позиция в начале последнего тика
+        self.prev_y = start_y
 
-        # --- Расчёт направления с учётом точности ---
-        dx = target_x - start_x
-        dy = target_y - start_y
-        distance_to_target = math.sqrt(dx**2 + dy**2)
-
-        # Базовое направление (нормализованный вектор)
-        if distance_to_target != 0:
-            dir_x = dx / distance_to_target
-            dir_y = dy / distance_to_target
-        else:
-            # Если цель на той же позиции (маловероятно, но на всякий случай)
-            dir_x, dir_y = 0, 0
-
-        # --- Учёт точности ---
-        base_error = (100 - accuracy) / 10
-        distance_factor = max(1.0, distance_to_target / 5.0)
-        max_error_angle_deg = base_error * distance_factor
-
-        error_angle_rad = math.radians(random.uniform(-max_error_angle_deg, max_error_angle_deg))
-
-        # Поворот базового направления на случайный угол
-        cos_angle = math.cos(error_angle_rad)
-        sin_angle = math.sin(error_angle_rad)
-
-        self.vx = dir_x * cos_angle - dir_y * sin_angle
-        self.vy = dir_x * sin_angle + dir_y * cos_angle
-        # --- КОНЕЦ УЧЁТА ТОЧНОСТИ ---
+        self.vx, self.vy = aim_direction(start_x, start_y, target_x, target_y, accuracy, rng)
 
         self.traveled_distance = 0
         self.hit_target = False
         self.hit_wall = False
         # Убираем target_x/y из проверок - будем проверять все юниты на пути
-        self.collision_radius = 0.3  # Уменьшим радиус для более точной проверки
-        self.max_range = 50  # Максимальная дальность полёта пули
+        self.collision_radius = self.COLLISION_RADIUS
+        self.max_range = BULLET_MAX_RANGE  # Максимальная дальность полёта пули
 
-    def update(self, game_map, all_units):
+    def update(self, game_map, all_units=None):
         """
         Update bullet position and check for collisions.
         Returns tuple: (result_type, hit_unit_or_position)
         - 'hit_unit': если пуля попала в юнита (возвращает юнита)
         - 'hit_wall': если пуля попала в стену (возвращает позицию)
         - 'miss': если пуля пролетела максимальную дистанцию (возвращает позицию)
+        За тик пуля проходит speed тайлов; все пересечённые клетки проверяются
+        по порядку, поэтому скорость не влияет на точность столкновений.
+        Юниты берутся из пространственного индекса карты; all_units оставлен
+        для совместимости со старыми вызовами и не используется.
         """
         if self.hit_target or self.hit_wall:
             return ('miss', None)  # Пуля уже достигла цели или врезалась в стену
 
-        # Перемещаем пулю
-        self.x += self.vx * self.speed
-        self.y += self.vy * self.speed
+        # Отрезок этого тика, укороченный до остатка дальности
+        self.prev_x, self.prev_y = self.x, self.y
+        step = min(self.speed, self.max_range - self.traveled_distance)
+        end_x = self.x + self.vx * step
+        end_y = self.y + self.vy * step
+        self.traveled_distance += step
 
-        # Увеличиваем пройденное расстояние
-        self.traveled_distance += self.speed
+        # Проходим все клетки отрезка по порядку: стены и юнитов нельзя "перепрыгнуть"
+        hit = trace_segment(game_map, self.prev_x, self.prev_y, end_x, end_y,
+                            self.collision_radius, self.attacker)
+        if hit:
+            result, value, t = hit
+            self.x = self.prev_x + (end_x - self.prev_x) * t
+            self.y = self.prev_y + (end_y - self.prev_y) * t
+            if result == 'hit_wall':
+                self.hit_wall = True
+            else:
+                self.hit_target = True
+            return (result, value)
 
-        # Проверяем, не превышена ли максимальная дальность
-        if self.traveled_distance > self.max_range:
+        self.x, self.y = end_x, end_y
+        # Проверяем, не исчерпана ли максимальная дальность
+        if self.traveled_distance >= self.max_range:
             return ('miss', (int(self.x), int(self.y)))
 
-        # Проверяем столкновение со стенами (или другими препятствиями)
-        tile_x = int(self.x)
-        tile_y = int(self.y)
-        if not game_map.is_walkable(tile_x, tile_y):
-            # Пуля попала в стену
-            self.hit_wall = True
-            return ('hit_wall', (tile_x, tile_y))
-
-        # Проверяем столкновение с юнитами на пути
-        # Ищем всех юнитов вблизи текущей позиции пули
-        for unit in all_units:
-            # Пропускаем стреляющего юнита
-            if unit == self.attacker:
-                continue
-                
-            # Проверяем расстояние от пули до центра юнита
-            dx = self.x - (unit.x + 0.5)
-            dy = self.y - (unit.y + 0.5)
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            # Если пуля достаточно близко к юниту
-            if distance <= self.collision_radius:
-                self.hit_target = True
-                return ('hit_unit', unit)
-
         return ('miss', None)  # Пуля не достигла цели и не врезалась
 
     def draw(self, screen, camera, sprite_loader, tile_size):
         """Draw the bullet."""
+        import pygame  # Только для отрисовки: симуляция работает без pygame
         screen_x = (self.x * tile_size - camera.x) * camera.zoom
         screen_y = (self.y * tile_size - camera.y) * camera.zoom
 
@@ -106,10 +216,210 @@ class Bullet:
         color = (255, 255, 0)  # Жёлтый цвет для примера
         radius = int(3 * camera.zoom)  # Немного увеличим радиус
         pygame.draw.circle(screen, color, (int(screen_x), int(screen_y)), radius)
-        
-        # Для отладки можно рисовать линию траектории
-        # start_screen_x = (self.start_x * tile_size - camera.x) * camera.zoom
-        # start_screen_y = (self.start_y * tile_size - camera.y) * camera.zoom
-        # pygame.draw.line(screen, (255, 200, 0, 128), 
-        #                 (int(start_screen_x), int(start_screen_y)),
-        #                 (int(screen_x), int(screen_y)), 1)
\ No newline at end of file
+
+        # Трассер: отрезок, пройденный за последний тик
+        prev_screen_x = (self.prev_x * tile_size - camera.x) * camera.zoom
+        prev_screen_y = (self.prev_y * tile_size - camera.y) * camera.zoom
+        pygame.draw.line(screen, (255, 200, 0),
+                         (int(prev_screen_x), int(prev_screen_y)),
+                         (int(screen_x), int(screen_y)), 1)
+
+
+class BulletPool:
+    """
+    Пул пуль в виде структуры массивов (structure of arrays).
+
+    Позиции, скорости, пройденный путь, урон и индекс стрелявшего хранятся
+    в массивах NumPy; все живые пули продвигаются за один векторный шаг,
+    обход клеток (trace_segment) запускается только для пуль рядом со стенами
+    и юнитами, а освободившиеся слоты переиспользуются. Результаты шага имеют ту же форму, что и у
+    Bullet.update: ('hit_unit', unit) / ('hit_wall', (x, y)) / ('miss', (x, y)).
+
+    Таблица префиксных сумм препятствий строится за O(W*H) и кэшируется до смены
+    grid_version/occupancy_version карты, так что обычный тик стоит O(число пуль).
+    Пул подключается явно (CombatSystem(bullet_pool=...)); по умолчанию пули
+    живут списком объектов Bullet.
+    """
+    # Меньше пуль - обходим клетки каждой без векторного отбора (накладные расходы NumPy больше выигрыша)
+    VECTOR_MIN_BULLETS = 32
+
+    def __init__(self, capacity=256, collision_radius=Bullet.COLLISION_RADIUS, max_range=BULLET_MAX_RANGE):
+        self.collision_radius = collision_radius
+        self.max_range = max_range
+        self.capacity = 0
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.vx = np.zeros(0)
+        self.vy = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.traveled = np.zeros(0)
+        self.damage = np.zeros(0, dtype=np.int32)
+        self.owner = np.zeros(0, dtype=np.int32)  # Индекс стрелявшего в self.owners
+        self.alive = np.zeros(0, dtype=bool)
+        self.owners = []       # Юниты-стрелки, на которые ссылается owner
+        self._owner_ids = {}   # unit -> индекс в self.owners
+        self._free = []        # Свободные слоты (стек)
+        self._obstacle_table = None
+        self._table_key = None  # (карта, grid_version, occupancy_version) для _obstacle_table
+        self._grow(capacity)
+
+    def __len__(self):
+        return self.capacity - len(self._free)
+
+    def _grow(self, new_capacity):
+        """Extend all arrays to new_capacity slots."""
+        extra = new_capacity - self.capacity
+        if extra <= 0:
+            return
+        for name in ('x', 'y', 'vx', 'vy', 'speed', 'traveled', 'damage', 'owner', 'alive'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros(extra, dtype=array.dtype)]))
+        # Новые слоты в начало стека, чтобы первыми выдавались младшие номера
+        self._free = list(range(new_capacity - 1, self.capacity - 1, -1)) + self._free
+        self.capacity = new_capacity
+
+    def _owner_index(self, unit):
+        index = self._owner_ids.get(unit)
+        if index is None:
+            index = len(self.owners)
+            self.owners.append(unit)
+            self._owner_ids[unit] = index
+        return index
+
+    def spawn(self, start_x, start_y, vx, vy, speed, damage, attacker):
+        """Allocate a slot for a new bullet. Returns the slot index."""
+        if not self._free:
+            self._grow(max(16, self.capacity * 2))
+        slot = self._free.pop()
+        self.x[slot] = start_x
+        self.y[slot] = start_y
+        self.vx[slot] = vx
+        self.vy[slot] = vy
+        self.speed[slot] = speed
+        self.traveled[slot] = 0.0
+        self.damage[slot] = damage
+        self.owner[slot] = self._owner_index(attacker)
+        self.alive[slot] = True
+        return slot
+
+    def spawn_bullet(self, bullet):
+        """Copy an already aimed Bullet into the pool."""
+        return self.spawn(bullet.x, bullet.y, bullet.vx, bullet.vy,
+                          bullet.speed, bullet.damage, bullet.attacker)
+
+    def release(self, slot):
+        """Return a slot to the free list."""
+        if self.alive[slot]:
+            self.alive[slot] = False
+            self._free.append(slot)
+
+    def clear(self):
+        """Remove all bullets."""
+        self.alive[:] = False
+        self._free = list(range(self.capacity - 1, -1, -1))
+        self.owners = []
+        self._owner_ids = {}
+
+    def get_attacker(self, slot):
+        return self.owners[self.owner[slot]]
+
+    def _obstacles(self, game_map):
+        """Prefix-sum table of walls and units, rebuilt only when the map changed."""
+        key = (game_map, game_map.grid_version, game_map.occupancy_version)
+        if self._table_key != key:
+            obstacles = (game_map.grid != FLOOR_TILE) | (game_map.occupancy > 0)
+            table = np.zeros((game_map.height + 1, game_map.width + 1), dtype=np.int32)
+            table[1:, 1:] = obstacles.cumsum(axis=0).cumsum(axis=1)
+            self._obstacle_table = table
+            self._table_key = key
+        return self._obstacle_table
+
+    def step(self, game_map):
+        """
+        Advance all live bullets by one tick.
+        Возвращает список (slot, result, attacker, damage) для пуль, завершивших полёт;
+        их слоты сразу освобождаются. Летящие дальше пули в список не попадают.
+        """
+        slots = np.flatnonzero(self.alive)
+        if slots.size == 0:
+            return []
+
+        prev_x = self.x[slots]
+        prev_y = self.y[slots]
+        step = np.minimum(self.speed[slots], self.max_range - self.traveled[slots])
+        new_x = prev_x + self.vx[slots] * step
+        new_y = prev_y + self.vy[slots] * step
+        traveled = self.traveled[slots] + step
+        self.x[slots] = new_x
+        self.y[slots] = new_y
+        self.traveled[slots] = traveled
+
+        if slots.size < self.VECTOR_MIN_BULLETS:
+            # Векторный отбор окупается только на многих пулях: малую очередь обходим целиком
+            trace = range(slots.size)
+        else:
+            trace = np.flatnonzero(self._near_obstacles(game_map, prev_x, prev_y, new_x, new_y)).tolist()
+        traced = set(trace)
+
+        # Дальше работаем с числами Python: поштучный доступ к массивам NumPy дорог
+        slot_list = slots.tolist()
+        prev_x, prev_y = prev_x.tolist(), prev_y.tolist()
+        new_x, new_y = new_x.tolist(), new_y.tolist()
+        traveled = traveled.tolist()
+        finished = []
+        for i in trace:
+            slot = slot_list[i]
+            hit = trace_segment(game_map, prev_x[i], prev_y[i], new_x[i], new_y[i],
+                                self.collision_radius, self.get_attacker(slot))
+            if hit:
+                result, value, t = hit
+                self.x[slot] = prev_x[i] + (new_x[i] - prev_x[i]) * t
+                self.y[slot] = prev_y[i] + (new_y[i] - prev_y[i]) * t
+                finished.append((slot, (result, value)))
+            elif traveled[i] >= self.max_range:
+                finished.append((slot, ('miss', (int(new_x[i]), int(new_y[i])))))
+        for i, distance in enumerate(traveled):
+            if distance >= self.max_range and i not in traced:
+                finished.append((slot_list[i], ('miss', (int(new_x[i]), int(new_y[i])))))
+
+        results = []
+        for slot, result in sorted(finished):
+            results.append((slot, result, self.get_attacker(slot), int(self.damage[slot])))
+            self.release(slot)
+        return results
+
+    def _near_obstacles(self, game_map, prev_x, prev_y, new_x, new_y):
+        """
+        Mask of segments whose bounding box touches a wall, a unit or the map edge.
+        Обход клеток нужен только таким пулям; число препятствий в прямоугольнике
+        берём из кэшированной таблицы префиксных сумм за O(1) на пулю.
+        """
+        width, height = game_map.width, game_map.height
+        min_x = np.floor(np.minimum(prev_x, new_x)).astype(np.intp)
+        max_x = np.floor(np.maximum(prev_x, new_x)).astype(np.intp)
+        min_y = np.floor(np.minimum(prev_y, new_y)).astype(np.intp)
+        max_y = np.floor(np.maximum(prev_y, new_y)).astype(np.intp)
+        outside = (min_x < 0) | (min_y < 0) | (max_x >= width) | (max_y >= height)
+        min_x, max_x = np.maximum(min_x, 0), np.minimum(max_x, width - 1)
+        min_y, max_y = np.maximum(min_y, 0), np.minimum(max_y, height - 1)
+
+        table = self._obstacles(game_map)
+        count = (table[max_y + 1, max_x + 1] - table[min_y, max_x + 1]
+                 - table[max_y + 1, min_x] + table[min_y, min_x])
+        return outside | (count > 0)
+
+    def draw(self, screen, camera, tile_size):
+        """Draw all live bullets."""
+        import pygame  # Только для отрисовки: симуляция работает без pygame
+        color = (255, 255, 0)
+        radius = int(3 * camera.zoom)
+        for slot in np.flatnonzero(self.alive):
+            screen_x = (self.x[slot] * tile_size - camera.x) * camera.zoom
+            screen_y = (self.y[slot] * tile_size - camera.y) * camera.zoom
+            pygame.draw.circle(screen, color, (int(screen_x), int(screen_y)), radius)
+            # Трассер длиной в последний шаг пули
+            tail = min(self.speed[slot], self.traveled[slot]) * tile_size * camera.zoom
+            tail_x = screen_x - self.vx[slot] * tail
+            tail_y = screen_y - self.vy[slot] * tail
+            pygame.draw.line(screen, (255, 200, 0), (int(tail_x), int(tail_y)),
+                             (int(screen_x), int(screen_y)), 1)
@@ -1,8 +1,26 @@
+import argparse
 from core.game import Game
+from core.log import setup_logging, parse_levels
 
 def main():
+    parser = argparse.ArgumentParser(description="Rebel Star")
+    parser.add_argument('--replay', help="Просмотреть реплей (.rrp) вместо новой игры")
+    parser.add_argument('--speed', type=float, default=1.0, help="Скорость просмотра реплея")
+    parser.add_argument('--events', help="Писать игровые события в файл JSON-lines")
+    parser.add_argument('--debug', action='store_true', help="Подробный журнал в консоль")
+    parser.add_argument('--log', default='', help="Уровни подсистем, например combat=DEBUG,los=INFO")
+    parser.add_argument('--profile', action='store_true', help="Профилировать кадры с запуска (F4 - экспорт)")
+    args = parser.parse_args()
+    setup_logging(debug=args.debug, levels=parse_levels(args.log))
+
     game = Game()
+    if args.profile:
+        game.profiler.enabled = True
+    if args.events:
+        game.open_event_log(args.events)
+    if args.replay:
+        game.start_replay(args.replay, args.speed)
     game.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,19 +3,49 @@ from units.unit import Unit
 from game_objects.weapon_definitions import create_test_weapons, create_test_ammo
 from game_objects.weapon import Weapon
 from game_objects.ammo import Ammo
+from core.constants import FLOOR_TILE, WALL_TILE, TILE_SPRITES, TILE_CHANGE_LOG_LIMIT
+from core.events import UnitMoved, ItemPicked
+from core.log import get_logger
+import bisect
 import random
+import weakref
+import numpy as np
+
+log = get_logger('map')
 
 class TestMap:
-    def __init__(self, width=15, height=15):
+    def __init__(self, width=15, height=15, rng=None, loot_rng=None):
+        """
+        Args:
+            rng: Поток случайных чисел для расстановки на карте (core.rng: 'map')
+            loot_rng: Поток для выбора оружия и магазинов (core.rng: 'loot')
+        По умолчанию оба - глобальный модуль random.
+        """
+        self.rng = rng if rng is not None else random
+        self.loot_rng = loot_rng if loot_rng is not None else random
+        self.events = None  # core.events.EventBus; назначается GameManager при смене карты
         self.width = width
         self.height = height
-        self.grid = [[0 for _ in range(width)] for _ in range(height)]  # 0 = floor, 1 = wall
+        # Местность: непрерывный массив uint8 [y, x] (0 = floor, 1 = wall)
+        self.grid = np.zeros((height, width), dtype=np.uint8)
+        # Занятость клеток: число живых юнитов в клетке [y, x]
+        self.occupancy = np.zeros((height, width), dtype=np.uint8)
+        self.occupancy_version = 0  # Растёт при каждом изменении занятости (для кэшей путей)
         self.units = []
         self.items = []  # Will store weapons and other items (остаётся для совместимости, но не используется)
         # --- НОВОЕ: Хранилище трупов ---
         self.corpses = [] # Список словарей {'x': x, 'y': y, 'inventory': [items], 'sprite': 'dead.png'}
         # --- КОНЕЦ НОВОГО ---
+        # Пространственные индексы: (x, y) -> список объектов в клетке
+        self._units_by_cell = {}
+        self._items_by_cell = {}
+        self._corpses_by_cell = {}
         self.sprite_loader = None
+        # Версия сетки и журнал изменённых клеток (для кэшей, зависящих от местности)
+        self.grid_version = 0
+        self._tile_changes = []  # Список (версия, x, y)
+        self._tile_log_start = 0  # Версия, с которой журнал полон
+        self._tile_readers = weakref.WeakKeyDictionary()  # Потребитель журнала -> прочитанная версия
         
         self._create_walls()
         self._create_center_wall()
@@ -24,13 +54,10 @@ class TestMap:
     
     def _create_walls(self):
         """Create walls around the perimeter"""
-        for x in range(self.width):
-            self.grid[0][x] = 1  # Top wall
-            self.grid[self.height-1][x] = 1  # Bottom wall
-        
-        for y in range(self.height):
-            self.grid[y][0] = 1  # Left wall
-            self.grid[y][self.width-1] = 1  # Right wall
+        self.grid[0, :] = WALL_TILE  # Top wall
+        self.grid[-1, :] = WALL_TILE  # Bottom wall
+        self.grid[:, 0] = WALL_TILE  # Left wall
+        self.grid[:, -1] = WALL_TILE  # Right wall
     
     def _create_center_wall(self):
         """Create a vertical wall in the center of the map."""
@@ -39,8 +66,7 @@ class TestMap:
         wall_height = 5
         start_y = (self.height - wall_height) // 2
         
-        for y in range(start_y, start_y + wall_height):
-            self.grid[y][center_x] = 1
+        self.grid[start_y:start_y + wall_height, center_x] = WALL_TILE
 
     def _create_units_and_equip(self):
         """Create units and equip them with weapons and ammo."""
@@ -64,17 +90,17 @@ class TestMap:
         # Give some ammo magazines (copies)
         if ammo_types:
             for _ in range(2): # Два магазина
-                ammo_template = random.choice(ammo_types) # Выбираем шаблон
+                ammo_template = self.loot_rng.choice(ammo_types) # Выбираем шаблон
                 ammo_copy = ammo_template.clone() # Создаём копию
                 player_unit.add_item(ammo_copy) # Добавляем копию
         
-        self.units.append(player_unit)
+        self.add_unit(player_unit)
         
         # Additional friendly units on the left
         # Easy unit near top-left
         friendly1 = Unit('easy', 3, 3, faction="player")
         if weapons:
-            weapon_template = random.choice(weapons)
+            weapon_template = self.loot_rng.choice(weapons)
             weapon_copy = weapon_template.clone()
             
             # ДОБАВЛЯЕМ ПАТРОНЫ В ОРУЖИЕ
@@ -85,16 +111,16 @@ class TestMap:
         
         if ammo_types:
             for _ in range(2):
-                ammo_template = random.choice(ammo_types)
+                ammo_template = self.loot_rng.choice(ammo_types)
                 ammo_copy = ammo_template.clone()
                 friendly1.add_item(ammo_copy)
         
-        self.units.append(friendly1)
+        self.add_unit(friendly1)
         
         # Average unit near bottom-left
         friendly2 = Unit('average', 4, self.height - 4, faction="player")
         if weapons:
-            weapon_template = random.choice(weapons)
+            weapon_template = self.loot_rng.choice(weapons)
             weapon_copy = weapon_template.clone()
             
             # ДОБАВЛЯЕМ ПАТРОНЫ В ОРУЖИЕ
@@ -105,17 +131,17 @@ class TestMap:
         
         if ammo_types:
             for _ in range(2):
-                ammo_template = random.choice(ammo_types)
+                ammo_template = self.loot_rng.choice(ammo_types)
                 ammo_copy = ammo_template.clone()
                 friendly2.add_item(ammo_copy)
         
-        self.units.append(friendly2)
+        self.add_unit(friendly2)
         
         # Enemy units (right side) - фракция "enemy"
         # Heavy enemy unit
         enemy_heavy = Unit('enemy_heavy', self.width - 3, self.height // 2, faction="enemy")
         if weapons:
-            weapon_template = random.choice(weapons)
+            weapon_template = self.loot_rng.choice(weapons)
             weapon_copy = weapon_template.clone()
             
             # ДОБАВЛЯЕМ ПАТРОНЫ В ОРУЖИЕ
@@ -126,16 +152,16 @@ class TestMap:
         
         if ammo_types:
             for _ in range(2):
-                ammo_template = random.choice(ammo_types)
+                ammo_template = self.loot_rng.choice(ammo_types)
                 ammo_copy = ammo_template.clone()
                 enemy_heavy.add_item(ammo_copy)
         
-        self.units.append(enemy_heavy)
+        self.add_unit(enemy_heavy)
         
         # Easy enemy near top-right
         enemy_easy = Unit('enemy_easy', self.width - 4, 3, faction="enemy")
         if weapons:
-            weapon_template = random.choice(weapons)
+            weapon_template = self.loot_rng.choice(weapons)
             weapon_copy = weapon_template.clone()
             
             # ДОБАВЛЯЕМ ПАТРОНЫ В ОРУЖИЕ
@@ -146,16 +172,16 @@ class TestMap:
         
         if ammo_types:
             for _ in range(2):
-                ammo_template = random.choice(ammo_types)
+                ammo_template = self.loot_rng.choice(ammo_types)
                 ammo_copy = ammo_template.clone()
                 enemy_easy.add_item(ammo_copy)
         
-        self.units.append(enemy_easy)
+        self.add_unit(enemy_easy)
         
         # Average enemy near bottom-right
         enemy_average = Unit('enemy_average', self.width - 5, self.height - 4, faction="enemy")
         if weapons:
-            weapon_template = random.choice(weapons)
+            weapon_template = self.loot_rng.choice(weapons)
             weapon_copy = weapon_template.clone()
             
             # ДОБАВЛЯЕМ ПАТРОНЫ В ОРУЖИЕ
@@ -166,11 +192,11 @@ class TestMap:
         
         if ammo_types:
             for _ in range(2):
-                ammo_template = random.choice(ammo_types)
+                ammo_template = self.loot_rng.choice(ammo_types)
                 ammo_copy = ammo_template.clone()
                 enemy_average.add_item(ammo_copy)
         
-        self.units.append(enemy_average)
+        self.add_unit(enemy_average)
 
 
     
@@ -178,7 +204,7 @@ class TestMap:
         """Create initial units"""
         # Create player unit at center-left
         player_unit = Unit('heavy', 2, self.height // 2)  # Heavy unit at left center
-        self.units.append(player_unit)
+        self.add_unit(player_unit)
         
         # Create some enemy units
         enemy1 = Unit('easy', 10, 5)
@@ -194,14 +220,14 @@ class TestMap:
         # Place weapons randomly on the map (not on walls or units)
         placed_weapons = 0
         while placed_weapons < 3: # Уменьшим количество оружия
-            x = random.randint(1, self.width - 2)
-            y = random.randint(1, self.height - 2)
+            x = self.rng.randint(1, self.width - 2)
+            y = self.rng.randint(1, self.height - 2)
             
             # Check if position is walkable and no unit is there
-            if self.is_walkable(x, y) and not any(unit.x == x and unit.y == y for unit in self.units):
-                weapon = random.choice(weapons)
+            if self.is_walkable(x, y) and not self.is_occupied(x, y):
+                weapon = self.loot_rng.choice(weapons)
                 # Добавляем оружие
-                self.items.append({
+                self.add_item({
                     'type': 'weapon',
                     'object': weapon,
                     'x': x,
@@ -221,11 +247,11 @@ class TestMap:
                             nx, ny = x + dx, y + dy
                             if (0 <= nx < self.width and 0 <= ny < self.height and
                                 self.is_walkable(nx, ny) and
-                                not any(unit.x == nx and unit.y == ny for unit in self.units) and
-                                not any(item['x'] == nx and item['y'] == ny for item in self.items)):
+                                not self.is_occupied(nx, ny) and
+                                not self.get_items_at(nx, ny)):
                                 # Нашли подходящую клетку
-                                ammo_item = random.choice(matching_ammo)
-                                self.items.append({
+                                ammo_item = self.loot_rng.choice(matching_ammo)
+                                self.add_item({
                                     'type': 'ammo',
                                     'object': ammo_item,
                                     'x': nx,
@@ -238,13 +264,13 @@ class TestMap:
                         if not found_spot:
                             placed_ammo = 0
                             while placed_ammo < 1: # Попробуем найти место ещё раз
-                                ax = random.randint(1, self.width - 2)
-                                ay = random.randint(1, self.height - 2)
+                                ax = self.rng.randint(1, self.width - 2)
+                                ay = self.rng.randint(1, self.height - 2)
                                 if (self.is_walkable(ax, ay) and
-                                    not any(unit.x == ax and unit.y == ay for unit in self.units) and
-                                    not any(item['x'] == ax and item['y'] == ay for item in self.items)):
-                                    ammo_item = random.choice(matching_ammo)
-                                    self.items.append({
+                                    not self.is_occupied(ax, ay) and
+                                    not self.get_items_at(ax, ay)):
+                                    ammo_item = self.loot_rng.choice(matching_ammo)
+                                    self.add_item({
                                         'type': 'ammo',
                                         'object': ammo_item,
                                         'x': ax,
@@ -259,15 +285,15 @@ class TestMap:
         # Также добавим немного "свободных" магазинов, не связанных с оружием
         placed_ammo_alone = 0
         while placed_ammo_alone < 2:
-            x = random.randint(1, self.width - 2)
-            y = random.randint(1, self.height - 2)
+            x = self.rng.randint(1, self.width - 2)
+            y = self.rng.randint(1, self.height - 2)
 
             # Check if position is walkable and no unit/item is there
             if (self.is_walkable(x, y) and
-                not any(unit.x == x and unit.y == y for unit in self.units) and
-                not any(item['x'] == x and item['y'] == y for item in self.items)):
-                ammo = random.choice(ammo_types)
-                self.items.append({
+                not self.is_occupied(x, y) and
+                not self.get_items_at(x, y)):
+                ammo = self.loot_rng.choice(ammo_types)
+                self.add_item({
                     'type': 'ammo',
                     'object': ammo,
                     'x': x,
@@ -276,23 +302,227 @@ class TestMap:
                 placed_ammo_alone += 1
     # --- КОНЕЦ ИЗМЕНЕНИЯ ---
 
+    def set_grid(self, grid):
+        """
+        Заменяет местность целиком. Принимает массив NumPy, список списков
+        (старые сохранения) или сырые байты uint8 размером width*height.
+        """
+        if isinstance(grid, (bytes, bytearray, memoryview)):
+            grid = np.frombuffer(grid, dtype=np.uint8).reshape(self.height, self.width)
+        self.grid = np.array(grid, dtype=np.uint8).reshape(self.height, self.width)
+        self.grid_version += 1
+        self._tile_changes.clear()
+        self._tile_log_start = self.grid_version
+    
+    def set_tile(self, x, y, value):
+        """Change a map tile and record the change for dependent caches."""
+        if self.grid[y, x] == value:
+            return
+        self.grid[y, x] = value
+        self.grid_version += 1
+        self._tile_changes.append((self.grid_version, x, y))
+        if len(self._tile_changes) > TILE_CHANGE_LOG_LIMIT:
+            # Отставший потребитель получит None и пересчитает всё - зато журнал не растёт бесконечно
+            self._trim_tile_changes(self._tile_changes[len(self._tile_changes) // 2][0])
+    
+    def get_tile_changes(self, since_version, reader=None):
+        """
+        Возвращает клетки, изменённые после версии since_version,
+        или None, если сетка с тех пор заменена целиком (нужен полный пересчёт).
+        reader - кэш, который читает журнал: записи хранятся, пока их не прочитали
+        все такие читатели.
+        """
+        if since_version >= self.grid_version:
+            changes = []
+        elif since_version < self._tile_log_start:
+            changes = None
+        else:
+            start = bisect.bisect_left(self._tile_changes, (since_version + 1,))
+            changes = [(x, y) for _, x, y in self._tile_changes[start:]]
+        if reader is not None:
+            self._tile_readers[reader] = self.grid_version
+            self._trim_tile_changes(min(self._tile_readers.values()))
+        return changes
+    
+    def _trim_tile_changes(self, version):
+        """Forget tile changes up to and including version."""
+        if version <= self._tile_log_start:
+            return
+        del self._tile_changes[:bisect.bisect_left(self._tile_changes, (version + 1,))]
+        self._tile_log_start = version
+
     def is_walkable(self, x, y):
         """Check if position is walkable"""
         if 0 <= x < self.width and 0 <= y < self.height:
-            return self.grid[y][x] == 0
+            return bool(self.grid[y, x] == FLOOR_TILE)
+        return False
+    
+    def is_occupied(self, x, y):
+        """Check if a living unit stands on position"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return bool(self.occupancy[y, x] > 0)
         return False
     
+    # --- Векторные запросы к сетке ---
+    def walkable_mask(self):
+        """Boolean [y, x] mask of floor tiles."""
+        return self.grid == FLOOR_TILE
+    
+    def occupied_mask(self):
+        """Boolean [y, x] mask of tiles with units."""
+        return self.occupancy > 0
+    
+    def free_mask(self):
+        """Boolean [y, x] mask of floor tiles without units."""
+        return (self.grid == FLOOR_TILE) & (self.occupancy == 0)
+    
+    def get_region(self, x1, y1, x2, y2):
+        """
+        Возвращает копию участка местности [y1:y2, x1:x2] (правая/нижняя граница не включается).
+        Координаты обрезаются по границам карты.
+        """
+        x1, x2 = max(0, x1), min(self.width, x2)
+        y1, y2 = max(0, y1), min(self.height, y2)
+        return self.grid[y1:y2, x1:x2].copy()
+    
+    # --- Юниты и занятость клеток ---
+    def add_unit(self, unit):
+        """Place a unit on the map."""
+        self.units.append(unit)
+        self.occupancy[unit.y, unit.x] += 1
+        self.occupancy_version += 1
+        self._index_add(self._units_by_cell, (unit.x, unit.y), unit)
+    
+    def remove_unit(self, unit):
+        """Remove a unit from the map (e.g. on death)."""
+        self.units.remove(unit)
+        self.occupancy[unit.y, unit.x] -= 1
+        self.occupancy_version += 1
+        self._index_remove(self._units_by_cell, (unit.x, unit.y), unit)
+    
+    def set_units(self, units):
+        """Replace all units (e.g. when loading a save)."""
+        self.units = list(units)
+        self.rebuild_occupancy()
+    
+    def on_unit_moved(self, unit, old_x, old_y):
+        """Keep occupancy and the spatial index in sync after a unit changed position."""
+        self.occupancy[old_y, old_x] -= 1
+        self.occupancy[unit.y, unit.x] += 1
+        self.occupancy_version += 1
+        self._index_remove(self._units_by_cell, (old_x, old_y), unit)
+        self._index_add(self._units_by_cell, (unit.x, unit.y), unit)
+        if self.events is not None and self.events.wants(UnitMoved):
+            self.events.publish(UnitMoved(unit, old_x, old_y, unit.x, unit.y))
+    
+    def on_item_picked(self, unit, item, x, y):
+        """Report that unit picked item up from the cell (x, y) (из меню подбора)."""
+        if self.events is not None and self.events.wants(ItemPicked):
+            self.events.publish(ItemPicked(unit, item, x, y))
+    
+    def rebuild_occupancy(self):
+        """Recompute occupancy and the unit index from the unit list."""
+        self._units_by_cell = {}
+        for unit in self.units:
+            self._index_add(self._units_by_cell, (unit.x, unit.y), unit)
+        self.occupancy = np.zeros((self.height, self.width), dtype=np.uint8)
+        if self.units:
+            xs = np.fromiter((unit.x for unit in self.units), dtype=np.intp, count=len(self.units))
+            ys = np.fromiter((unit.y for unit in self.units), dtype=np.intp, count=len(self.units))
+            np.add.at(self.occupancy, (ys, xs), 1)
+        self.occupancy_version += 1
+    
+    # --- Пространственный индекс ---
+    @staticmethod
+    def _index_add(index, cell, obj):
+        index.setdefault(cell, []).append(obj)
+    
+    @staticmethod
+    def _index_remove(index, cell, obj):
+        bucket = index.get(cell)
+        if bucket and obj in bucket:
+            bucket.remove(obj)
+            if not bucket:
+                del index[cell]
+    
+    @staticmethod
+    def _query_rect(index, objects, x1, y1, x2, y2, get_pos):
+        """Объекты в прямоугольнике [x1..x2] x [y1..y2] (включительно)."""
+        area = (x2 - x1 + 1) * (y2 - y1 + 1)
+        if area <= 0:
+            return []
+        result = []
+        # Для больших прямоугольников дешевле пройти по самим объектам
+        if area > len(objects):
+            for obj in objects:
+                x, y = get_pos(obj)
+                if x1 <= x <= x2 and y1 <= y <= y2:
+                    result.append(obj)
+            return result
+        for y in range(y1, y2 + 1):
+            for x in range(x1, x2 + 1):
+                bucket = index.get((x, y))
+                if bucket:
+                    result.extend(bucket)
+        return result
+    
     def get_units_at(self, x, y):
         """Get units at specific position"""
-        return [unit for unit in self.units if unit.x == x and unit.y == y]
+        return list(self._units_by_cell.get((x, y), ()))
+    
+    def get_units_in_rect(self, x1, y1, x2, y2):
+        """Get units inside rectangle (inclusive bounds)"""
+        return self._query_rect(self._units_by_cell, self.units, x1, y1, x2, y2, lambda u: (u.x, u.y))
     
     def get_items_at(self, x, y):
-        """Get items at specific position (empty list now, as items are on units)"""
-        return []
+        """Get items lying at specific position"""
+        return list(self._items_by_cell.get((x, y), ()))
+    
+    def get_items_in_rect(self, x1, y1, x2, y2):
+        """Get items inside rectangle (inclusive bounds)"""
+        return self._query_rect(self._items_by_cell, self.items, x1, y1, x2, y2, lambda i: (i['x'], i['y']))
+    
+    def add_item(self, item):
+        """Put an item dict {'type', 'object', 'x', 'y'} on the map."""
+        self.items.append(item)
+        self._index_add(self._items_by_cell, (item['x'], item['y']), item)
+    
+    def remove_item(self, item):
+        """Remove an item dict from the map (e.g. on pickup)."""
+        self.items.remove(item)
+        self._index_remove(self._items_by_cell, (item['x'], item['y']), item)
+    
+    def set_items(self, items):
+        """Replace all map items (e.g. when loading a save)."""
+        self.items = []
+        self._items_by_cell = {}
+        for item in items:
+            self.add_item(item)
 
     def get_corpses_at(self, x, y):
         """Get corpses at specific position"""
-        return [corpse for corpse in self.corpses if corpse['x'] == x and corpse['y'] == y]
+        return list(self._corpses_by_cell.get((x, y), ()))
+    
+    def get_corpses_in_rect(self, x1, y1, x2, y2):
+        """Get corpses inside rectangle (inclusive bounds)"""
+        return self._query_rect(self._corpses_by_cell, self.corpses, x1, y1, x2, y2, lambda c: (c['x'], c['y']))
+    
+    def add_corpse(self, corpse):
+        """Put a corpse dict on the map."""
+        self.corpses.append(corpse)
+        self._index_add(self._corpses_by_cell, (corpse['x'], corpse['y']), corpse)
+    
+    def remove_corpse(self, corpse):
+        """Remove a corpse dict from the map (e.g. when it has been looted)."""
+        self.corpses.remove(corpse)
+        self._index_remove(self._corpses_by_cell, (corpse['x'], corpse['y']), corpse)
+    
+    def set_corpses(self, corpses):
+        """Replace all corpses (e.g. when loading a save)."""
+        self.corpses = []
+        self._corpses_by_cell = {}
+        for corpse in corpses:
+            self.add_corpse(corpse)
 
     # --- НОВАЯ ФУНКЦИЯ: Создание трупа ---
     def create_corpse(self, unit):
@@ -302,19 +532,16 @@ class TestMap:
             corpse_sprite = 'enemy_dead.png'
         
         # Проверяем, есть ли уже труп на этой клетке
-        existing_corpse = None
-        for corpse in self.corpses:
-            if corpse['x'] == unit.x and corpse['y'] == unit.y:
-                existing_corpse = corpse
-                break
+        existing = self._corpses_by_cell.get((unit.x, unit.y))
+        existing_corpse = existing[0] if existing else None
         
         if existing_corpse:
             # Объединяем инвентари
-            print(f"Объединяем инвентарь с существующим трупом на ({unit.x}, {unit.y})")
+            log.debug("Объединяем инвентарь с существующим трупом на (%d, %d)", unit.x, unit.y)
             existing_corpse['inventory'].extend(unit.inventory.copy())
             if unit.equipped_weapon:
                 existing_corpse['inventory'].append(unit.equipped_weapon)
-            print(f"Теперь в трупе {len(existing_corpse['inventory'])} предметов")
+            log.debug("Теперь в трупе %d предметов", len(existing_corpse['inventory']))
         else:
             # Создаем новый труп
             corpse = {
@@ -326,12 +553,9 @@ class TestMap:
             }
             if corpse['equipped_weapon']:
                 corpse['inventory'].append(corpse['equipped_weapon'])
-            self.corpses.append(corpse)
-            print(f"Создан труп на ({corpse['x']}, {corpse['y']}) с {len(corpse['inventory'])} предметами.")
+            self.add_corpse(corpse)
+            log.debug("Создан труп на (%d, %d) с %d предметами.", corpse['x'], corpse['y'], len(corpse['inventory']))
     
     def get_sprite(self, x, y):
         """Get sprite for map tile"""
-        if self.grid[y][x] == 1:  # Wall
-            return self.sprite_loader.get_scaled_sprite('wall.png', (40, 40))
-        else:  # Floor
-            return self.sprite_loader.get_scaled_sprite('floor.png', (40, 40))
+        return self.sprite_loader.get_scaled_sprite(TILE_SPRITES.get(int(self.grid[y, x]), TILE_SPRITES[FLOOR_TILE]), (40, 40))
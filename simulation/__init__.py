@@ -0,0 +1,4 @@
+# simulation/__init__.py
+from .match import Match
+
+__all__ = ['Match']
@@ -0,0 +1,127 @@
+# simulation/batch.py
+"""
+Пакетный прогон матчей между двумя контроллерами на всех ядрах.
+
+Пример:
+    python -m simulation.batch --matches 200 --player aggressive --enemy defensive --output stats.json
+
+Каждый матч играется в отдельном процессе (ProcessPoolExecutor) со своим
+зерном, ответвлённым от зерна серии (RNGService.fork), результаты сводятся в JSON: доли побед,
+число ходов и статистика урона по оружию из weapon_definitions.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from core.log import setup_logging
+from core.rng import RNGService
+from simulation.match import Match
+from simulation.controllers import CONTROLLERS
+
+FACTIONS = ("player", "enemy")
+
+def play_match(seed: int, player_ai: str, enemy_ai: str, map_name: str = "test",
+               max_turns: int = 200, verbose: bool = False) -> Dict:
+    """Play one match to the end (or max_turns) and return its summary."""
+    controllers = {"player": CONTROLLERS[player_ai](), "enemy": CONTROLLERS[enemy_ai]()}
+    if verbose:
+        setup_logging(debug=True)  # В процессе-воркере своя настройка журнала
+    match = Match(map_name, seed=seed)
+    while not match.is_over and match.turn <= max_turns:
+        controllers[match.turn_faction].take_turn(match, match.turn_faction)
+        if not match.is_over:
+            match.end_turn()
+    return {
+        'seed': seed,
+        'winner': match.winner,
+        'turns': match.turn,
+        'weapons': match.weapon_stats,
+    }
+
+def _play_match_args(args):
+    return play_match(*args)
+
+def aggregate(results: List[Dict]) -> Dict:
+    """Combine match summaries into win rates, turn counts and weapon stats."""
+    count = len(results)
+    wins = {faction: 0 for faction in FACTIONS}
+    draws = 0
+    weapons = {}
+    for result in results:
+        if result['winner'] is None:
+            draws += 1
+        else:
+            wins[result['winner']] = wins.get(result['winner'], 0) + 1
+        for name, stats in result['weapons'].items():
+            total = weapons.setdefault(name, {'shots': 0, 'hits': 0, 'damage': 0, 'kills': 0})
+            for key, value in stats.items():
+                total[key] += value
+
+    for stats in weapons.values():
+        stats['hit_rate'] = stats['hits'] / stats['shots'] if stats['shots'] else 0.0
+        stats['damage_per_shot'] = stats['damage'] / stats['shots'] if stats['shots'] else 0.0
+
+    turns = [result['turns'] for result in results]
+    return {
+        'matches': count,
+        'wins': wins,
+        'draws': draws,
+        'win_rates': {faction: (n / count if count else 0.0) for faction, n in wins.items()},
+        'turns': {
+            'mean': sum(turns) / count if count else 0.0,
+            'min': min(turns, default=0),
+            'max': max(turns, default=0),
+        },
+        'weapons': weapons,
+    }
+
+def run_batch(matches: int, player_ai: str, enemy_ai: str, seed: int = 0, workers: Optional[int] = None,
+              map_name: str = "test", max_turns: int = 200) -> Dict:
+    """Play matches in parallel and return aggregated stats (workers=1 plays in this process)."""
+    series = RNGService(seed)
+    jobs = [(series.fork(i).seed, player_ai, enemy_ai, map_name, max_turns) for i in range(matches)]
+    if workers == 1:
+        results = [_play_match_args(job) for job in jobs]
+    else:
+        workers = workers or os.cpu_count() or 1
+        # Несколько чанков на процесс: меньше накладных расходов на пересылку и ровнее загрузка
+        chunksize = max(1, matches // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_play_match_args, jobs, chunksize=chunksize))
+
+    summary = aggregate(results)
+    summary['config'] = {
+        'player': player_ai,
+        'enemy': enemy_ai,
+        'seed': seed,
+        'map': map_name,
+        'max_turns': max_turns,
+    }
+    return summary
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Пакетный прогон headless-матчей")
+    parser.add_argument('--matches', type=int, default=100, help="Число матчей")
+    parser.add_argument('--player', choices=sorted(CONTROLLERS), default='aggressive', help="Контроллер игрока")
+    parser.add_argument('--enemy', choices=sorted(CONTROLLERS), default='aggressive', help="Контроллер врага")
+    parser.add_argument('--seed', type=int, default=0, help="Зерно первого матча")
+    parser.add_argument('--workers', type=int, default=None, help="Число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--map', default="test", help="Карта")
+    parser.add_argument('--max-turns', type=int, default=200, help="Лимит ходов (после него - ничья)")
+    parser.add_argument('--output', default=None, help="Файл для JSON (по умолчанию - stdout)")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.matches, args.player, args.enemy, seed=args.seed, workers=args.workers,
+                        map_name=args.map, max_turns=args.max_turns)
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# simulation/controllers.py
+"""
+Простые контроллеры для headless-матчей.
+Контроллер получает Match и играет за фракцию весь её ход.
+"""
+from typing import Optional
+from ai.basic_ai import BasicAI
+from units.unit import Unit
+
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+def distance(a: Unit, b: Unit) -> int:
+    """Manhattan distance between two units (как в GameManager.can_attack_target)."""
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+class Controller:
+    """Base controller: every unit shoots visible enemies until it runs out of energy."""
+    name = 'base'
+
+    def take_turn(self, match, faction: str) -> None:
+        """Play all units of faction for one turn."""
+        for unit in match.get_units(faction):
+            # Каждое действие тратит энергию, так что цикл конечен; выходим, когда действий нет
+            while unit.hp > 0 and unit.energy > 0 and not match.is_over:
+                if not self.act(match, unit):
+                    break
+
+    def act(self, match, unit: Unit) -> bool:
+        """Perform one action with unit. Returns False if the unit is done for this turn."""
+        return self.shoot_nearest(match, unit)
+
+    def shoot_nearest(self, match, unit: Unit) -> bool:
+        """Shoot the nearest visible enemy, reloading an empty weapon first."""
+        weapon = unit.equipped_weapon
+        if weapon is None:
+            return False
+        if weapon.ammo <= 0:
+            return match.reload(unit)
+        targets = sorted(match.get_visible_enemies(unit), key=lambda enemy: distance(unit, enemy))
+        for target in targets:
+            if match.shoot(unit, target):
+                return True
+        return False
+
+    def step_towards(self, match, unit: Unit, target: Unit) -> bool:
+        """Make one step that brings unit closer to target (or any step if blocked)."""
+        moves = sorted(DIRECTIONS, key=lambda d: abs(unit.x + d[0] - target.x) + abs(unit.y + d[1] - target.y))
+        for dx, dy in moves:
+            if abs(unit.x + dx - target.x) + abs(unit.y + dy - target.y) >= distance(unit, target):
+                break
+            if match.game_map.is_walkable(unit.x + dx, unit.y + dy) and \
+                    not match.game_map.is_occupied(unit.x + dx, unit.y + dy):
+                return match.move(unit, dx, dy)
+        return False
+
+class DefensiveController(Controller):
+    """Holds position and shoots whatever it sees."""
+    name = 'defensive'
+
+class AggressiveController(Controller):
+    """Shoots visible enemies, otherwise advances towards the nearest enemy."""
+    name = 'aggressive'
+
+    def act(self, match, unit: Unit) -> bool:
+        if self.shoot_nearest(match, unit):
+            return True
+        target = self._nearest_enemy(match, unit)
+        return target is not None and self.step_towards(match, unit, target)
+
+    def _nearest_enemy(self, match, unit: Unit) -> Optional[Unit]:
+        enemies = [enemy for enemy in match.get_units() if enemy.faction != unit.faction]
+        return min(enemies, key=lambda enemy: distance(unit, enemy), default=None)
+
+class BasicAIController(Controller):
+    """Plays the turn planned by ai.BasicAI, executing it through Match (shots resolve instantly)."""
+    name = 'basic'
+
+    def __init__(self, time_budget=0.05):
+        self.time_budget = time_budget
+
+    def take_turn(self, match, faction: str) -> None:
+        ai = BasicAI(faction, time_budget=self.time_budget)
+        game_map = match.game_map
+        for action in ai.resolve_actions(list(game_map.units), ai.plan_turn(game_map)):
+            if match.is_over:
+                break
+            kind, unit = action[0], action[1]
+            if unit.hp <= 0:
+                continue
+            if kind == 'move':
+                match.move(unit, action[2], action[3])
+            elif kind == 'reload':
+                match.reload(unit)
+            elif action[2].hp > 0:
+                match.shoot(unit, action[2])
+
+# Имя контроллера для командной строки -> класс
+CONTROLLERS = {
+    DefensiveController.name: DefensiveController,
+    AggressiveController.name: AggressiveController,
+    BasicAIController.name: BasicAIController,
+}
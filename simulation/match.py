@@ -0,0 +1,107 @@
+# simulation/match.py
+"""
+Headless-матч: ходы, перемещения, выстрелы и смерти без дисплея и без pygame.
+Тонкая обёртка над GameManager; выстрелы считаются мгновенно
+(CombatSystem.resolve_shot_immediately), без анимации пуль.
+"""
+from typing import Dict, List, Optional
+from core.game_manager import GameManager
+from core.exceptions import GameException
+from units.unit import Unit
+
+class Match:
+    def __init__(self, map_name: str = "test", seed: Optional[int] = None):
+        """
+        Args:
+            map_name: Имя карты для GameManager.start_game
+            seed: Зерно матча для core.rng (карта и разброс выстрелов); None - случайное
+        """
+        self.game_manager = GameManager()
+        # Ходами всех фракций управляют внешние контроллеры
+        self.game_manager.ai_controllers = {}
+        self.game_manager.start_game(map_name, seed=seed)
+        self.seed = self.game_manager.rng.seed
+        self.turn = 1  # Номер хода (увеличивается при каждой смене фракции)
+        # Статистика по оружию: имя -> {'shots', 'hits', 'damage', 'kills'}
+        self.weapon_stats: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def game_map(self):
+        return self.game_manager.current_map
+
+    @property
+    def turn_faction(self) -> str:
+        return self.game_manager.game_state.turn_faction
+
+    def get_units(self, faction: Optional[str] = None) -> List[Unit]:
+        """Get living units, optionally only of one faction."""
+        return [unit for unit in self.game_map.units
+                if unit.hp > 0 and (faction is None or unit.faction == faction)]
+
+    def get_factions(self) -> List[str]:
+        """Get factions that still have living units."""
+        return sorted({unit.faction for unit in self.get_units()})
+
+    @property
+    def winner(self) -> Optional[str]:
+        """The only faction left alive, or None while the match goes on."""
+        factions = self.get_factions()
+        return factions[0] if len(factions) == 1 else None
+
+    @property
+    def is_over(self) -> bool:
+        return len(self.get_factions()) <= 1
+
+    def move(self, unit: Unit, dx: int, dy: int) -> bool:
+        """Move unit by (dx, dy). Returns False if the move is not possible."""
+        if not self.game_manager.select_unit(unit):
+            return False
+        return self.game_manager.move_unit(dx, dy)
+
+    def shoot(self, attacker: Unit, target: Unit):
+        """
+        Shoot at target and resolve the shot immediately.
+        Возвращает (result, value, path) или None, если выстрел невозможен
+        (не виден, вне досягаемости, нет патронов или энергии).
+        """
+        if attacker.faction != self.turn_faction:
+            return None
+        try:
+            self.game_manager.can_attack_target(attacker, target)
+        except (GameException, ValueError):
+            return None
+        weapon = attacker.equipped_weapon
+        hp_before = {unit: unit.hp for unit in self.get_units()}
+        result = self.game_manager.combat_system.resolve_shot_immediately(
+            attacker, target, weapon, self.game_map)
+        if result is None:
+            return None
+        self._record_shot(weapon.name, result, hp_before)
+        self.game_manager.update_line_of_sight()
+        return result
+
+    def reload(self, unit: Unit) -> bool:
+        """Reload unit's weapon from its inventory. Returns False if not possible."""
+        try:
+            return unit.reload_weapon()
+        except (GameException, ValueError):
+            return False
+
+    def _record_shot(self, weapon_name, result, hp_before):
+        stats = self.weapon_stats.setdefault(weapon_name, {'shots': 0, 'hits': 0, 'damage': 0, 'kills': 0})
+        stats['shots'] += 1
+        if result[0] == 'hit_unit':
+            hit_unit = result[1]
+            stats['hits'] += 1
+            stats['damage'] += hp_before.get(hit_unit, hit_unit.hp) - hit_unit.hp
+            if hit_unit.hp <= 0:
+                stats['kills'] += 1
+
+    def get_visible_enemies(self, unit: Unit) -> List[Unit]:
+        """Get enemies visible to unit."""
+        return self.game_manager.get_visible_enemies_for_unit(unit)
+
+    def end_turn(self) -> None:
+        """Pass the turn to the next faction."""
+        self.game_manager.end_turn()
+        self.turn += 1
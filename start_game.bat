@@ -23,13 +23,13 @@ echo.
 
 REM Устанавливаем зависимости если нужно (тихо)
 echo Проверка зависимостей...
-python -c "import pygame" 2>nul >nul
+python -c "import pygame, numpy" 2>nul >nul
 if errorlevel 1 (
-    echo Pygame не найден. Устанавливаем...
-    pip install pygame --quiet
+    echo Pygame или NumPy не найден. Устанавливаем...
+    pip install pygame numpy --quiet
     if errorlevel 1 (
-        echo Не удалось установить pygame!
-        echo Пожалуйста, установите вручную: pip install pygame
+        echo Не удалось установить pygame/numpy!
+        echo Пожалуйста, установите вручную: pip install pygame numpy
         pause
         exit /b 1
     )
@@ -1,4 +1,3 @@
-import pygame
 from core.constants import SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE, MIN_ZOOM, MAX_ZOOM, ZOOM_FACTOR
 
 class Camera:
@@ -18,6 +17,7 @@ class Camera:
     
     def apply_rect(self, rect):
         """Apply camera transformation to rectangle"""
+        import pygame  # Камера нужна и headless-симуляции, pygame - только здесь
         x, y = self.apply((rect.x, rect.y))
         w = rect.width * self.zoom
         h = rect.height * self.zoom
@@ -26,10 +26,14 @@ class Camera:
     def update(self, target_x=None, target_y=None):
         """Update camera position and zoom"""
         # Smooth zoom interpolation
-        if abs(self.target_zoom - self.smooth_zoom) > 0.01:
+        if self.is_zooming():
             self.smooth_zoom += (self.target_zoom - self.smooth_zoom) * 0.1
             self.zoom = max(MIN_ZOOM, min(MAX_ZOOM, self.smooth_zoom))
     
+    def is_zooming(self):
+        """Check if smooth zoom is still moving towards target_zoom"""
+        return abs(self.target_zoom - self.smooth_zoom) > 0.01
+    
     def move(self, dx, dy):
         """Move camera"""
         self.x += dx / self.zoom
@@ -0,0 +1,153 @@
+# systems/terrain_layer.py
+"""
+Слой местности: статическая сетка карты запекается в поверхности-чанки
+один раз на уровень зума, а рисуются только чанки, попадающие в камеру.
+Пока идёт плавный зум, рисуются чанки последнего запечённого зума,
+растянутые под текущий; перезапекание - один раз, когда зум установился.
+"""
+import math
+import pygame
+from core.constants import TILE_SIZE, TILE_SPRITES, FLOOR_TILE, TERRAIN_CHUNK_SIZE
+
+class TerrainLayer:
+    def __init__(self, sprite_loader, chunk_size=TERRAIN_CHUNK_SIZE, max_chunks=256):
+        """
+        Args:
+            sprite_loader: Загрузчик спрайтов тайлов
+            chunk_size: Сторона чанка в тайлах
+            max_chunks: Сколько запечённых чанков держать в памяти
+        """
+        self.sprite_loader = sprite_loader
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunks = {}  # (chunk_x, chunk_y) -> pygame.Surface
+        self._map = None
+        self._grid = None
+        self._grid_version = 0
+        self._zoom = None
+        self._tile_sprites = {}  # Спрайты тайлов, отмасштабированные под текущий зум
+
+    def invalidate(self):
+        """Drop all baked chunks (they will be re-baked on next draw)."""
+        self.chunks.clear()
+        self._tile_sprites.clear()
+
+    def invalidate_tile(self, x, y):
+        """Drop the chunk containing tile (x, y)."""
+        self.chunks.pop((x // self.chunk_size, y // self.chunk_size), None)
+
+    def _sync(self, game_map, zoom):
+        """Сбрасывает устаревшие чанки после смены карты, сетки или зума."""
+        if game_map is not self._map or game_map.grid is not self._grid:
+            self._map = game_map
+            self._grid = game_map.grid
+            self._grid_version = game_map.grid_version
+            self.invalidate()
+        elif game_map.grid_version != self._grid_version:
+            # Перезапекаем только чанки с изменёнными клетками
+            changes = game_map.get_tile_changes(self._grid_version, reader=self)
+            if changes is None:
+                self.invalidate()
+            for x, y in changes or ():
+                self.invalidate_tile(x, y)
+            self._grid_version = game_map.grid_version
+
+        if zoom != self._zoom:
+            self._zoom = zoom
+            self.invalidate()
+
+    def _get_tile_sprite(self, tile, size):
+        """Get tile sprite scaled for the current zoom."""
+        if tile not in self._tile_sprites:
+            filename = TILE_SPRITES.get(tile, TILE_SPRITES[FLOOR_TILE])
+            self._tile_sprites[tile] = self.sprite_loader.get_scaled_sprite(filename, (size, size), exact=True)
+        return self._tile_sprites[tile]
+
+    def _bake_chunk(self, game_map, chunk_x, chunk_y, zoom):
+        """Render all tiles of a chunk into a single surface."""
+        start_x = chunk_x * self.chunk_size
+        start_y = chunk_y * self.chunk_size
+        end_x = min(start_x + self.chunk_size, game_map.width)
+        end_y = min(start_y + self.chunk_size, game_map.height)
+
+        scale = TILE_SIZE * zoom
+        # +1 пиксель перекрытия, чтобы между тайлами не было щелей при дробном зуме
+        tile_px = int(scale) + 1
+        surface = pygame.Surface((int((end_x - start_x) * scale) + 1,
+                                  int((end_y - start_y) * scale) + 1))
+
+        grid = game_map.grid
+        for y in range(start_y, end_y):
+            row = grid[y].tolist()
+            offset_y = int((y - start_y) * scale)
+            for x in range(start_x, end_x):
+                sprite = self._get_tile_sprite(row[x], tile_px)
+                if sprite:
+                    surface.blit(sprite, (int((x - start_x) * scale), offset_y))
+        return surface
+
+    def get_visible_tile_range(self, screen, game_map, camera):
+        """
+        Возвращает (first_x, first_y, last_x, last_y) - тайлы, попадающие в камеру,
+        или None, если карта целиком за пределами экрана.
+        """
+        view_width = screen.get_width() / camera.zoom
+        view_height = screen.get_height() / camera.zoom
+        first_x = max(0, int(camera.x // TILE_SIZE))
+        first_y = max(0, int(camera.y // TILE_SIZE))
+        last_x = min(game_map.width - 1, int((camera.x + view_width) // TILE_SIZE))
+        last_y = min(game_map.height - 1, int((camera.y + view_height) // TILE_SIZE))
+        if first_x > last_x or first_y > last_y:
+            return None
+        return first_x, first_y, last_x, last_y
+
+    def _blit_scaled(self, screen, surface, screen_x, screen_y, ratio):
+        """Blit surface stretched by ratio, scaling only the part that lands on screen."""
+        width = math.ceil(surface.get_width() * ratio)
+        height = math.ceil(surface.get_height() * ratio)
+        clip = pygame.Rect(int(screen_x), int(screen_y), width, height).clip(screen.get_rect())
+        if not clip.width or not clip.height:
+            return
+        src_x = max(0, int((clip.x - screen_x) / ratio))
+        src_y = max(0, int((clip.y - screen_y) / ratio))
+        src = pygame.Rect(src_x, src_y, math.ceil(clip.width / ratio) + 1,
+                          math.ceil(clip.height / ratio) + 1).clip(surface.get_rect())
+        part = pygame.transform.scale(surface.subsurface(src),
+                                      (math.ceil(src.width * ratio), math.ceil(src.height * ratio)))
+        screen.blit(part, (screen_x + src.x * ratio, screen_y + src.y * ratio))
+
+    def draw(self, screen, game_map, camera):
+        """Draw the chunks intersecting the camera rectangle."""
+        zoom = camera.zoom
+        # Во время плавного зума не перезапекаем: растягиваем чанки прежнего зума
+        bake_zoom = self._zoom if camera.is_zooming() and game_map is self._map else zoom
+        self._sync(game_map, bake_zoom)
+        ratio = zoom / bake_zoom
+
+        tile_range = self.get_visible_tile_range(screen, game_map, camera)
+        if tile_range is None:
+            return
+        first_x, first_y, last_x, last_y = tile_range
+
+        visible = []
+        for chunk_y in range(first_y // self.chunk_size, last_y // self.chunk_size + 1):
+            for chunk_x in range(first_x // self.chunk_size, last_x // self.chunk_size + 1):
+                key = (chunk_x, chunk_y)
+                surface = self.chunks.get(key)
+                if surface is None:
+                    surface = self._bake_chunk(game_map, chunk_x, chunk_y, bake_zoom)
+                    self.chunks[key] = surface
+                visible.append(key)
+
+                screen_x = (chunk_x * self.chunk_size * TILE_SIZE - camera.x) * zoom
+                screen_y = (chunk_y * self.chunk_size * TILE_SIZE - camera.y) * zoom
+                if ratio != 1.0:
+                    self._blit_scaled(screen, surface, screen_x, screen_y, ratio)
+                else:
+                    screen.blit(surface, (screen_x, screen_y))
+
+        # Ограничиваем память: выбрасываем чанки за пределами экрана
+        if len(self.chunks) > self.max_chunks:
+            keep = set(visible)
+            for key in [k for k in self.chunks if k not in keep]:
+                del self.chunks[key]
@@ -0,0 +1,41 @@
+"""
+Общие помощники тестов: игра без окна и ИИ, сравнение состояния мира.
+Обычный модуль, а не conftest.py: тесты импортируют его явно.
+"""
+from core.game_manager import GameManager
+
+def make_game(seed=None):
+    """Игра на тестовой карте без ИИ; выбран первый юнит."""
+    game_manager = GameManager()
+    game_manager.ai_controllers = {}
+    game_manager.start_game("test", seed=seed)
+    game_manager.selected_unit = game_manager.current_map.units[0]
+    return game_manager
+
+def free_step(game_manager):
+    """Первое направление, в котором выбранный юнит может шагнуть."""
+    unit = game_manager.selected_unit
+    game_map = game_manager.current_map
+    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        if game_map.is_walkable(unit.x + dx, unit.y + dy) and not game_map.is_occupied(unit.x + dx, unit.y + dy):
+            return dx, dy
+
+def world_state(game_manager):
+    """Полное изменяемое состояние мира для сравнения."""
+    game_map = game_manager.current_map
+    carried = []
+    units = []
+    for unit in game_map.units:
+        units.append((id(unit), unit.x, unit.y, unit.hp, unit.energy,
+                      id(unit.equipped_weapon), [id(item) for item in unit.inventory]))
+        carried.extend(unit.inventory + [unit.equipped_weapon])
+    for corpse in game_map.corpses:
+        carried.extend(corpse['inventory'])
+    carried.extend(item['object'] for item in game_map.items)
+    ammo = [(id(item), getattr(item, 'ammo', None), getattr(item, 'ammo_count', None))
+            for item in carried if item is not None]
+    return (units, ammo, game_map.grid.tolist(), game_map.occupancy.tolist(),
+            [id(item) for item in game_map.items],
+            [(id(c), [id(i) for i in c['inventory']]) for c in game_map.corpses],
+            game_manager.game_state.turn_faction,
+            sorted((u.x, u.y) for u in game_map.get_units_in_rect(0, 0, game_map.width, game_map.height)))
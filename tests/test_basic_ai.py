@@ -0,0 +1,80 @@
+"""
+Тесты ИИ противника
+"""
+from ai.basic_ai import BasicAI
+from core.game_manager import GameManager
+
+def test_plan_respects_zero_budget():
+    """Тест: при нулевом бюджете ИИ всё равно возвращает план (без поиска ходов)."""
+    manager = GameManager()
+    manager.start_game()
+    ai = BasicAI("enemy", time_budget=0.0)
+    actions = ai.plan_turn(manager.current_map)
+    assert ai.last_stats['timed_out']
+    assert all(action[0] != 'move' for action in actions)
+
+def test_enemy_turn_is_played_by_game_manager():
+    """Тест: после конца хода игрока ИИ доигрывает ход врага и возвращает ход игроку."""
+    manager = GameManager()
+    manager.start_game()
+    manager.game_state.state = 'game'
+    enemies = [unit for unit in manager.current_map.units if unit.faction == "enemy"]
+    start = {unit: (unit.x, unit.y) for unit in enemies}
+
+    manager.end_turn()
+    assert manager.is_ai_turn()
+    for _ in range(1000):
+        manager.update()
+        if not manager.is_ai_turn():
+            break
+    assert manager.game_state.turn_faction == "player"
+    assert any((unit.x, unit.y) != start[unit] for unit in enemies)
+
+def test_threaded_turn_and_cancellation():
+    """Тест: план из фонового потока применяется в update(), отменённый план выбрасывается."""
+    import threading
+    import time
+    from ai.turn_executor import AITurnExecutor
+    manager = GameManager()
+    manager.start_game()
+    manager.game_state.state = 'game'
+    manager.ai_executor = AITurnExecutor()
+
+    # Планировщик ждёт разрешения, чтобы отмена гарантированно пришлась на идущий расчёт
+    ai = manager.ai_controllers["enemy"]
+    started, release = threading.Event(), threading.Event()
+    plan_turn = ai.plan_turn
+    def gated_plan_turn(view):
+        started.set()
+        release.wait(5)
+        return plan_turn(view)
+    ai.plan_turn = gated_plan_turn
+
+    # Замечаем момент, когда результат попал в очередь
+    results = manager.ai_executor._results
+    delivered = threading.Event()
+    put = results.put
+    def put_and_signal(item, *args, **kwargs):
+        put(item, *args, **kwargs)
+        delivered.set()
+    results.put = put_and_signal
+    try:
+        manager.end_turn()
+        assert manager.ai_planning
+        assert started.wait(5)
+        manager.cancel_ai_turn()
+        release.set()
+        assert delivered.wait(5)
+        assert results.qsize() == 1  # Устаревший план дошёл до очереди...
+        assert manager.ai_executor.poll() is None
+        assert results.empty()  # ...и был выброшен poll()
+
+        manager.begin_turn()
+        for _ in range(2000):
+            manager.update()
+            if not manager.is_ai_turn():
+                break
+            time.sleep(0.001)
+        assert manager.game_state.turn_faction == "player"
+    finally:
+        manager.shutdown()
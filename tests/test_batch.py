@@ -0,0 +1,12 @@
+"""
+Тесты пакетного прогона матчей
+"""
+from simulation.batch import run_batch
+
+def test_batch_is_reproducible_across_processes():
+    """Тест: результаты с пулом процессов совпадают с последовательным прогоном."""
+    serial = run_batch(6, 'aggressive', 'defensive', seed=10, workers=1, max_turns=30)
+    parallel = run_batch(6, 'aggressive', 'defensive', seed=10, workers=2, max_turns=30)
+    assert serial == parallel
+    assert sum(serial['wins'].values()) + serial['draws'] == 6
+    assert all(stats['hits'] <= stats['shots'] for stats in serial['weapons'].values())
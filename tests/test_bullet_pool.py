@@ -0,0 +1,134 @@
+"""
+Тесты пула пуль (структура массивов)
+"""
+import random
+from core.combat_system import CombatSystem
+from core.constants import FLOOR_TILE, WALL_TILE
+from game_objects.bullet import Bullet, BulletPool, trace_segment
+from maps.test_map import TestMap as GameMap  # псевдоним, чтобы pytest не собирал класс
+
+def test_pool_matches_individual_bullets():
+    """Тест: пул даёт те же результаты и на тех же тиках, что и отдельные пули."""
+    rng = random.Random(3)
+    game_map = GameMap()
+    pool = BulletPool(capacity=4)  # Маленькая ёмкость, чтобы проверить рост
+    bullets = {}
+    for _ in range(60):
+        attacker, target = rng.sample(game_map.units, 2)
+        bullet = Bullet(attacker.x + 0.5, attacker.y + 0.5, target.x + 0.5, target.y + 0.5,
+                        rng.choice([0.3, 0.5, 1.7]), 10, attacker, rng.randint(40, 100))
+        bullets[pool.spawn_bullet(bullet)] = bullet
+    assert len(pool) == 60
+
+    expected = []
+    for tick in range(200):
+        for slot, bullet in list(bullets.items()):
+            result = bullet.update(game_map)
+            if result[1] is not None:
+                expected.append((tick, slot, result))
+                del bullets[slot]
+    actual = []
+    tables = set()
+    for tick in range(200):
+        if len(pool) >= BulletPool.VECTOR_MIN_BULLETS:
+            tables.add(id(pool._obstacle_table))
+        for slot, result, attacker, damage in pool.step(game_map):
+            actual.append((tick, slot, result))
+            assert damage == 10
+            if result[0] == 'hit_wall':
+                x, y = result[1]
+                inside = 0 <= x < game_map.width and 0 <= y < game_map.height
+                assert not inside or game_map.grid[y, x] != FLOOR_TILE
+    assert actual == sorted(expected)
+    assert len(pool) == 0
+    assert len(tables - {id(None)}) == 1  # Карта не менялась - таблица препятствий построена один раз
+
+def test_combat_with_pool_matches_bullet_list():
+    """Тест: CombatSystem с пулом и со списком пуль даёт одинаковый исход тех же выстрелов."""
+    outcomes = []
+    for pool in (None, BulletPool()):
+        game_map = GameMap(rng=random.Random(4), loot_rng=random.Random(4))
+        combat = CombatSystem(bullet_pool=pool, rng=random.Random(9))
+        for _ in range(3):
+            for attacker, target in zip(list(game_map.units), reversed(game_map.units)):
+                if attacker in game_map.units and attacker is not target and attacker.equipped_weapon:
+                    combat.create_bullet(attacker, target, attacker.equipped_weapon)
+            ticks = 0
+            while combat.has_active_bullets():
+                combat.update_bullets(game_map)
+                ticks += 1
+            outcomes.append(ticks)
+        outcomes.append([(unit.unit_type, unit.x, unit.y, unit.hp) for unit in game_map.units])
+    half = len(outcomes) // 2
+    assert outcomes[:half] == outcomes[half:]
+
+def test_pool_recycles_slots():
+    """Тест повторного использования освободившихся слотов."""
+    game_map = GameMap()
+    pool = BulletPool(capacity=2)
+    attacker = game_map.units[0]
+    first = pool.spawn(attacker.x + 0.5, attacker.y + 0.5, 1.0, 0.0, 100.0, 5, attacker)
+    pool.step(game_map)  # Улетает за максимальную дальность
+    assert len(pool) == 0
+    assert pool.spawn(attacker.x + 0.5, attacker.y + 0.5, 1.0, 0.0, 0.5, 5, attacker) == first
+    pool.clear()
+    assert len(pool) == 0 and not pool.alive.any()
+
+def test_fast_bullet_does_not_tunnel():
+    """Тест: пуля со скоростью больше клетки не пролетает сквозь тонкую стену и юнита."""
+    game_map = GameMap()
+    attacker, target = game_map.units[0], game_map.units[1]
+    grid = game_map.grid.copy()
+    grid[:, :] = FLOOR_TILE
+    grid[:, 10] = WALL_TILE
+    game_map.set_grid(grid)
+    game_map.set_units([attacker, target])
+    attacker.x, attacker.y = 2, 3
+    target.x, target.y = 6, 3
+    game_map.rebuild_occupancy()
+
+    bullet = Bullet(2.5, 3.5, 6.5, 3.5, 40.0, 10, attacker, 100)
+    assert bullet.update(game_map) == ('hit_unit', target)
+
+    game_map.set_units([attacker])
+    bullet = Bullet(2.5, 3.5, 6.5, 3.5, 40.0, 10, attacker, 100)
+    assert bullet.update(game_map) == ('hit_wall', (10, 3))
+    assert 9.9 < bullet.x <= 10.0
+
+def test_pool_hits_on_unit_killed_this_tick():
+    """Тест: несколько пуль одного тика по юниту, убитому первой, дают один труп и одно удаление."""
+    game_map = GameMap()
+    attacker, target = game_map.units[0], game_map.units[1]
+    grid = game_map.grid.copy()
+    grid[:, :] = FLOOR_TILE
+    game_map.set_grid(grid)
+    game_map.set_units([attacker, target])
+    attacker.x, attacker.y = 2, 3
+    target.x, target.y = 3, 3
+    target.hp = 1
+    target.armor = 0
+    game_map.rebuild_occupancy()
+    corpses = len(game_map.corpses)
+
+    combat = CombatSystem(bullet_pool=BulletPool())
+    for _ in range(3):
+        combat.bullet_pool.spawn_bullet(Bullet(2.5, 3.5, 3.5, 3.5, 2.0, 10, attacker, 100))
+    combat.update_bullets(game_map)
+
+    assert game_map.units == [attacker]
+    assert len(game_map.corpses) == corpses + 1
+    assert not combat.has_active_bullets()
+
+def test_segment_ending_on_wall_boundary():
+    """Тест: отрезок, кончающийся ровно на границе стены, не попадает в неё за пределами t = 1."""
+    game_map = GameMap()
+    grid = game_map.grid.copy()
+    grid[:, :] = FLOOR_TILE
+    grid[:, 10] = WALL_TILE
+    game_map.set_grid(grid)
+    game_map.set_units([])
+    game_map.rebuild_occupancy()
+
+    # Накопленная погрешность даёт t входа в клетку стены чуть больше 1
+    assert trace_segment(game_map, 2.9, 2.0, 10.0, 2.0, 0.3, None) is None
+    assert trace_segment(game_map, 10.0, 2.0, 11.0, 2.0, 0.3, None) == ('hit_wall', (10, 2), 0.0)
@@ -0,0 +1,40 @@
+"""
+Тесты мгновенного расчёта выстрела
+"""
+from core.constants import FLOOR_TILE
+from core.combat_system import CombatSystem
+from maps.test_map import TestMap as GameMap  # псевдоним, чтобы pytest не собирал класс
+
+def test_resolve_shot_immediately():
+    """Тест: мгновенный выстрел тратит патрон и энергию, наносит урон и записывает путь."""
+    game_map = GameMap()
+    attacker, target = game_map.units[0], game_map.units[1]
+    grid = game_map.grid.copy()
+    grid[:, :] = FLOOR_TILE
+    game_map.set_grid(grid)
+    game_map.set_units([attacker, target])
+    attacker.x, attacker.y = 1, 1
+    target.x, target.y = 12, 1
+    game_map.rebuild_occupancy()
+
+    weapon = attacker.equipped_weapon
+    attacker.accuracy = weapon.accuracy = 100
+    attacker.energy = attacker.max_energy
+    weapon.ammo = weapon.max_ammo
+    target.hp = hp = 1000
+    target.armor = 0
+
+    combat = CombatSystem()
+    result, value, path = combat.resolve_shot_immediately(attacker, target, weapon, game_map, record_path=True)
+    assert (result, value) == ('hit_unit', target)
+    assert target.hp == hp - weapon.damage
+    assert weapon.ammo == weapon.max_ammo - 1
+    assert attacker.energy == attacker.max_energy - 1
+    assert path[0] == (1.5, 1.5) and len(path) == 4
+
+    combat.play_shot_path(path)
+    ticks = 0
+    while combat.has_active_bullets():
+        combat.update_bullets(game_map)
+        ticks += 1
+    assert ticks == len(path)
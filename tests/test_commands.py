@@ -0,0 +1,55 @@
+"""
+Тесты журнала отмены/повтора
+"""
+from core.commands import CommandLog, MoveCommand, ShootCommand
+from tests.helpers import world_state, make_game, free_step
+
+def test_undo_redo_moves():
+    """Тест: отмена возвращает состояние до команды, повтор - после."""
+    game_manager = make_game()
+    states = [world_state(game_manager)]
+    for _ in range(3):
+        assert game_manager.execute_command(MoveCommand(*free_step(game_manager)))
+        states.append(world_state(game_manager))
+
+    for expected in reversed(states[:-1]):
+        assert game_manager.undo()
+        assert world_state(game_manager) == expected
+    assert game_manager.undo() is None
+    for expected in states[1:]:
+        assert game_manager.redo()
+        assert world_state(game_manager) == expected
+    assert game_manager.redo() is None
+
+def test_redo_shot_keeps_outcome():
+    """Тест: повтор выстрела воспроизводит тот же исход, а не бросает кости заново."""
+    game_manager = make_game()
+    game_map = game_manager.current_map
+    shooter = game_manager.selected_unit
+    target = next(unit for unit in game_map.units if unit.faction != shooter.faction)
+    dx, dy = free_step(game_manager)
+    target.x, target.y = shooter.x + dx, shooter.y + dy  # Вплотную, чтобы цель была видна
+    game_map.rebuild_occupancy()
+    game_manager.update_line_of_sight()
+    before = world_state(game_manager)
+    rng_before = game_manager.rng.get_state()
+
+    assert game_manager.execute_command(ShootCommand(shooter, target))
+    while game_manager.combat_system.has_active_bullets():
+        game_manager.combat_system.update_bullets(game_map)
+    after = world_state(game_manager)
+    game_manager.undo()
+    assert world_state(game_manager) == before
+    assert game_manager.rng.get_state() == rng_before  # Отмена промаха не даёт перебросить выстрел
+    game_manager.redo()
+    assert world_state(game_manager) == after
+
+def test_memory_limit_drops_oldest():
+    """Тест: журнал не превышает лимит памяти и выбрасывает старые записи."""
+    game_manager = make_game()
+    game_manager.command_log = CommandLog(memory_limit=1)
+    for _ in range(3):
+        game_manager.execute_command(MoveCommand(*free_step(game_manager)))
+    assert len(game_manager.command_log) == 1
+    game_manager.end_turn()
+    assert not game_manager.command_log.can_undo()
@@ -0,0 +1,71 @@
+"""
+Тесты шины игровых событий
+"""
+import json
+import os
+import pytest
+from core.events import (EventBus, JsonLinesSink, UnitMoved, ShotFired, BulletHit, UnitDied,
+                         TurnEnded, ItemPicked)
+from game_objects.weapon_definitions import create_test_ammo
+from tests.helpers import make_game, free_step
+
+def pick_up_with_menu(monkeypatch, game_map, unit, item):
+    """Кладёт предмет под юнита и подбирает его кликом в PickupMenu."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame = pytest.importorskip("pygame")
+    from ui.pickup_menu import PickupMenu
+    pygame.font.init()
+    game_map.add_item({'type': 'ammo', 'object': item, 'x': unit.x, 'y': unit.y})
+    menu = PickupMenu(game_map.get_items_at(unit.x, unit.y), unit, game_map)
+    monkeypatch.setattr(pygame.mouse, 'get_pos', lambda: menu.buttons[0]['pickup_rect'].center)
+    return menu.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1))
+
+def test_events_published_and_written(tmp_path, monkeypatch):
+    """Тест: шаг, выстрел, смерть, подбор через меню и конец хода доходят до стока строками JSON."""
+    game_manager = make_game()
+    events = game_manager.events
+    assert not events.wants(UnitMoved)  # Без подписчиков события не создаются
+
+    deaths = []
+    events.subscribe(UnitDied, deaths.append)
+    sink = JsonLinesSink(str(tmp_path / "events.jsonl"), buffer_size=2)
+    events.add_sink(sink)
+
+    game_map = game_manager.current_map
+    unit = game_manager.selected_unit
+    game_manager.move_unit(*free_step(game_manager))
+
+    # Враг вплотную с 1 HP: выстрел гарантированно попадает и убивает
+    enemy = next(u for u in game_map.units if u.faction != unit.faction)
+    dx, dy = free_step(game_manager)
+    enemy.x, enemy.y = unit.x + dx, unit.y + dy
+    enemy.armor, enemy.hp = 0, 1
+    game_map.rebuild_occupancy()
+    assert game_manager.combat_system.create_bullet(unit, enemy, unit.equipped_weapon)
+    while game_manager.combat_system.has_active_bullets():
+        game_manager.combat_system.update_bullets(game_map)
+
+    ammo = create_test_ammo()[0]
+    assert pick_up_with_menu(monkeypatch, game_map, unit, ammo) == "close"
+    assert ammo in unit.inventory
+    game_manager.end_turn()
+    sink.close()
+
+    assert [type(e) for e in deaths] == [UnitDied] and deaths[0].killer is unit
+    lines = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text(encoding='utf-8').splitlines()]
+    assert [line['type'] for line in lines] == [UnitMoved.type, ShotFired.type, BulletHit.type,
+                                               UnitDied.type, ItemPicked.type, TurnEnded.type]
+    assert lines[0]['unit']['faction'] == "player"
+    assert lines[1]['attacker']['faction'] == "player" and lines[1]['weapon'] == unit.equipped_weapon.name
+    assert lines[2]['damage'] > 0 and lines[4]['item'] == ammo.name
+    assert lines[-1]['faction'] == "player" and lines[-1]['next_faction'] == "enemy"
+
+def test_unsubscribe():
+    """Тест: отписанный обработчик больше не вызывается."""
+    bus, received = EventBus(), []
+    bus.subscribe(TurnEnded, received.append)
+    bus.publish(TurnEnded("player", "enemy"))
+    bus.unsubscribe(TurnEnded, received.append)
+    assert not bus.wants(TurnEnded)
+    bus.publish(TurnEnded("enemy", "player"))
+    assert len(received) == 1
@@ -0,0 +1,64 @@
+"""
+Тесты сетки занятости и пространственного индекса карты
+"""
+import random
+from core.exceptions import GameException
+from maps.test_map import TestMap as GameMap  # псевдоним, чтобы pytest не собирал класс
+
+def test_index_and_occupancy_follow_moves_and_deaths():
+    """Тест согласованности индекса и занятости после ходов и смертей."""
+    rng = random.Random(7)
+    game_map = GameMap()
+    for _ in range(300):
+        unit = rng.choice(game_map.units)
+        unit.energy = unit.max_energy
+        try:
+            unit.move(*rng.choice([(0, 1), (0, -1), (1, 0), (-1, 0)]), game_map)
+        except GameException:
+            pass
+    
+    dead = game_map.units[0]
+    game_map.create_corpse(dead)
+    game_map.remove_unit(dead)
+    
+    assert game_map.occupancy.sum() == len(game_map.units)
+    for y in range(game_map.height):
+        for x in range(game_map.width):
+            expected = [u for u in game_map.units if u.x == x and u.y == y]
+            assert game_map.get_units_at(x, y) == expected
+            assert game_map.is_occupied(x, y) == bool(expected)
+    assert game_map.get_corpses_at(dead.x, dead.y)[0]['inventory'] is not None
+    
+    rect = game_map.get_units_in_rect(0, 0, game_map.width // 2, game_map.height - 1)
+    assert set(rect) == {u for u in game_map.units if u.x <= game_map.width // 2}
+
+def test_vectorized_masks():
+    """Тест векторных масок проходимости и занятости."""
+    game_map = GameMap()
+    free = game_map.free_mask()
+    for unit in game_map.units:
+        assert not free[unit.y, unit.x]
+    assert not game_map.walkable_mask()[0].any()
+    assert game_map.get_region(-5, -5, 3, 3).shape == (3, 3)
+
+def test_tile_change_log_is_trimmed():
+    """Тест: журнал изменённых клеток хранит только то, что ещё не прочитали все читатели."""
+    class Reader:
+        pass
+    game_map = GameMap()
+    fast, slow = Reader(), Reader()
+    game_map.get_tile_changes(game_map.grid_version, reader=slow)
+    start = game_map.grid_version
+    for x in range(1, 6):
+        game_map.set_tile(x, 1, 1)
+    assert game_map.get_tile_changes(start + 2, reader=fast) == [(3, 1), (4, 1), (5, 1)]
+    assert len(game_map._tile_changes) == 5  # slow ещё не прочитал
+
+    assert game_map.get_tile_changes(start, reader=slow) == [(x, 1) for x in range(1, 6)]
+    assert game_map._tile_changes == []
+    assert game_map.get_tile_changes(start) is None  # Прочитанное забыто - нужен полный пересчёт
+
+    del fast, slow  # Исчезнувшие читатели не держат журнал
+    assert len(game_map._tile_readers) == 0
+    game_map.set_tile(1, 2, 1)
+    assert game_map.get_tile_changes(game_map.grid_version - 1) == [(1, 2)]
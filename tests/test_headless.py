@@ -0,0 +1,32 @@
+"""
+Тест headless-симуляции без pygame
+"""
+import os
+import subprocess
+import sys
+
+SCRIPT = """
+import sys
+sys.modules['pygame'] = None  # Любой импорт pygame завершится ошибкой
+from simulation import Match
+
+match = Match(seed=5)
+for _ in range(40):
+    for unit in match.get_units(match.turn_faction):
+        for target in match.get_visible_enemies(unit):
+            while target.hp > 0 and match.shoot(unit, target):
+                pass
+        match.move(unit, -1 if unit.faction == 'enemy' else 1, 0)
+    if match.is_over:
+        break
+    match.end_turn()
+print('TURNS', match.turn)
+"""
+
+def test_match_runs_without_pygame():
+    """Тест: матч играется без импорта pygame."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=root,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert 'TURNS' in result.stdout
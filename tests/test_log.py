@@ -0,0 +1,55 @@
+"""
+Тесты журналирования
+"""
+import io
+import logging
+import pytest
+from core.constants import LOG_LEVELS
+from core.log import ROOT_LOGGER, get_logger, setup_logging
+
+@pytest.fixture
+def console():
+    """Консоль журнала в памяти; после теста настройка сбрасывается."""
+    stream = io.StringIO()
+    yield stream
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.propagate = True
+    root.setLevel(logging.NOTSET)
+    for name in LOG_LEVELS:
+        get_logger(name).setLevel(logging.NOTSET)
+
+class Counted:
+    """Аргумент сообщения, считающий свои форматирования."""
+    calls = 0
+
+    def __str__(self):
+        Counted.calls += 1
+        return "counted"
+
+def test_release_mode_is_quiet_until_error(console):
+    """Тест: в релизе горячие пути не форматируют, буфер выгружается только при ошибке."""
+    setup_logging(stream=console)
+    Counted.calls = 0
+    get_logger('los').debug("видит %s", Counted())
+    assert Counted.calls == 0
+
+    get_logger('game').info("ход %s", 1)
+    assert console.getvalue() == ""
+    get_logger('save').error("сбой")
+    output = console.getvalue().splitlines()
+    assert "ход 1" in output[0] and "сбой" in output[1]
+
+def test_levels_override_and_rate_limit(console):
+    """Тест: уровень подсистемы переопределяется, повторы в консоли ограничены."""
+    setup_logging(levels={'combat': 'WARNING'}, stream=console)
+    setup_logging(debug=True, levels={'combat': 'ERROR'}, stream=console)  # Повторная настройка заменяет прежнюю
+    get_logger('combat').warning("промах")
+    get_logger('los').debug("луч %d", 1)
+    assert console.getvalue().count("промах") == 0 and "луч 1" in console.getvalue()
+
+    setup_logging(levels={'combat': 'WARNING'}, stream=console)
+    for _ in range(100):
+        get_logger('combat').warning("нет патронов")
+    assert 0 < console.getvalue().count("нет патронов") < 100
@@ -0,0 +1,70 @@
+"""
+Тесты поиска путей
+"""
+import random
+from collections import deque
+from core.pathfinding import PathFinder, UNREACHABLE
+from maps.test_map import TestMap as GameMap  # псевдоним, чтобы pytest не собирал класс
+
+def bfs_distances(game_map, start):
+    """Эталон: обход в ширину по free_mask."""
+    free = game_map.free_mask()
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < game_map.width and 0 <= ny < game_map.height and free[ny, nx] \
+                    and (nx, ny) not in distances:
+                distances[(nx, ny)] = distances[(x, y)] + 1
+                queue.append((nx, ny))
+    return distances
+
+def test_paths_and_fields_match_bfs():
+    """Тест: A*, поле расстояний и достижимые клетки совпадают с эталонным BFS."""
+    game_map = GameMap()
+    finder = PathFinder()
+    rng = random.Random(1)
+    for unit in game_map.units:
+        start = (unit.x, unit.y)
+        expected = bfs_distances(game_map, start)
+        field = finder.distance_field(game_map, start)
+        for y in range(game_map.height):
+            for x in range(game_map.width):
+                assert field[y, x] == expected.get((x, y), UNREACHABLE)
+        assert finder.reachable_tiles(game_map, start, 4) == \
+            {pos: d for pos, d in expected.items() if 0 < d <= 4}
+        for goal in rng.sample(sorted(expected), 5):
+            finder.invalidate()  # Чтобы путь искал A*, а не поле расстояний
+            path = finder.find_path(game_map, start, goal)
+            assert len(path) == expected[goal]
+
+def test_cache_invalidated_by_moves():
+    """Тест: кэш сбрасывается, когда юнит сдвигается."""
+    game_map = GameMap()
+    finder = PathFinder()
+    unit = game_map.units[0]
+    before = finder.reachable_tiles(game_map, (unit.x, unit.y), unit.energy)
+    assert finder.reachable_tiles(game_map, (unit.x, unit.y), unit.energy) is before
+
+    target = min(before, key=before.get)
+    old_x, old_y = unit.x, unit.y
+    unit.x, unit.y = target
+    game_map.on_unit_moved(unit, old_x, old_y)
+    assert finder.find_path(game_map, (unit.x, unit.y), target) == []
+    assert (old_x, old_y) in finder.reachable_tiles(game_map, (unit.x, unit.y), unit.energy)
+
+def test_move_unit_to_charges_energy():
+    """Тест: перемещение по клику тратит энергию по числу шагов."""
+    from core.game_manager import GameManager
+    manager = GameManager()
+    manager.start_game()
+    unit = next(u for u in manager.current_map.units if u.faction == "player")
+    manager.select_unit(unit)
+    reachable = manager.get_reachable_tiles()
+    goal = max(reachable, key=reachable.get)
+    energy = unit.energy
+    assert manager.move_unit_to(*goal)
+    assert (unit.x, unit.y) == goal
+    assert unit.energy == energy - reachable[goal]
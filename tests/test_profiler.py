@@ -0,0 +1,43 @@
+"""
+Тесты профилировщика кадра
+"""
+import csv
+import json
+from core.profiler import Profiler, percentile, FRAME
+
+class Worker:
+    def step(self, value):
+        return value * 2
+
+def test_sections_stats_and_export(tmp_path):
+    """Тест: секции и обёрнутые методы замеряются, выгрузка в CSV и Chrome trace."""
+    profiler = Profiler(window=10)
+    worker = Worker()
+    profiler.instrument(worker, 'step', 'worker.step')
+
+    assert worker.step(1) == 2 and not profiler.samples  # Выключен - ничего не пишет
+    profiler.enabled = True
+    for _ in range(20):
+        profiler.begin_frame()
+        with profiler.section('update'):
+            worker.step(2)
+        profiler.end_frame()
+
+    stats = profiler.stats()
+    assert set(stats) == {FRAME, 'update', 'worker.step'}
+    assert stats[FRAME]['count'] == 10  # Скользящее окно
+    assert stats['update']['p50'] <= stats['update']['p99'] <= stats['update']['max']
+
+    with open(profiler.export_csv(str(tmp_path / "p.csv")), encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 60 and rows[-1]['section'] == FRAME and rows[-1]['frame'] == '19'
+    with open(profiler.export_chrome_trace(str(tmp_path / "p.json")), encoding='utf-8') as f:
+        trace = json.load(f)
+    assert len(trace['traceEvents']) == 60 and trace['traceEvents'][0]['ph'] == 'X'
+
+def test_percentile():
+    """Тест: перцентиль по ближайшему рангу."""
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50 and percentile(values, 0.95) == 95 and percentile(values, 0.99) == 99
+    assert percentile(values, 0.0) == 1 and percentile(values, 1.0) == 100
+    assert percentile([7], 0.99) == 7 and percentile([], 0.5) == 0.0
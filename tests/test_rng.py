@@ -0,0 +1,47 @@
+"""
+Тесты сервиса случайных чисел
+"""
+from core.rng import RNGService
+from core.game_manager import GameManager
+from core.save_system import SaveSystem
+from core.load_system import LoadSystem
+
+def loadout(game_manager):
+    """Снаряжение юнитов - результат потока 'loot'."""
+    return [(unit.equipped_weapon and unit.equipped_weapon.name,
+             [getattr(item, 'name', None) for item in unit.inventory])
+            for unit in game_manager.current_map.units]
+
+def shots(game_manager, count=20):
+    """Направления выстрелов из потока 'combat'."""
+    combat = game_manager.combat_system
+    attacker, target = game_manager.current_map.units[0], game_manager.current_map.units[-1]
+    return [combat._create_bullet_object(attacker, target, attacker.equipped_weapon).vx
+            for _ in range(count)]
+
+def test_same_seed_same_match():
+    """Тест: одинаковый сид даёт одинаковую карту и разброс, потоки независимы."""
+    first, second = GameManager(), GameManager()
+    for manager in (first, second):
+        manager.ai_controllers = {}
+    first.start_game("test", seed=42)
+    second.start_game("test", seed=42)
+    assert loadout(first) == loadout(second)
+    second.rng.stream('ai').random()  # Лишний вызов в другом потоке ничего не сдвигает
+    assert shots(first) == shots(second)
+
+    service = RNGService(42)
+    assert service.fork(1).seed == RNGService(42).fork(1).seed != service.fork(2).seed
+
+def test_rng_state_survives_save(tmp_path):
+    """Тест: после загрузки сохранения выстрелы продолжаются той же последовательностью."""
+    manager = GameManager()
+    manager.ai_controllers = {}
+    manager.start_game("test", seed=7)
+    shots(manager, 5)
+    save_system = SaveSystem(save_dir=str(tmp_path))
+    path = save_system.save_game(manager, "rng.rsg")
+    expected = shots(manager)
+
+    LoadSystem().restore_game(save_system.load_game(path), manager)
+    assert shots(manager) == expected
@@ -0,0 +1,66 @@
+"""
+Тесты двоичного формата сохранений
+"""
+import base64
+import json
+import os
+import pickle
+import zlib
+import pytest
+from core.exceptions import SaveFormatException
+from core.save_format import FORMAT_VERSION, HEADER, MAGIC, decode_save, encode_save
+from core.save_system import SaveSystem
+from tests.helpers import make_game
+
+def make_save_data():
+    game_manager = make_game(seed=11)
+    game_map = game_manager.current_map
+    unit = game_map.units[-1]
+    game_map.create_corpse(unit)  # Труп с инвентарём
+    game_map.remove_unit(unit)
+    return SaveSystem(save_dir=None).build_save_data(game_manager)
+
+def normalized(save_data):
+    """Состояние ГСЧ и видимые враги - кортежи; после JSON и двоичного формата сравниваем списками."""
+    return json.loads(json.dumps(save_data, default=lambda value: list(value)))
+
+def test_binary_round_trip():
+    """Тест: двоичный формат возвращает ровно тот же словарь сохранения."""
+    save_data = make_save_data()
+    data = encode_save(save_data, {'name': "a.rsg", 'created': "now", 'map_name': "test"})
+    assert data[:4] == MAGIC
+
+    metadata, loaded = decode_save(data)
+    assert metadata == {'name': "a.rsg", 'created': "now", 'map_name': "test"}
+    assert loaded['map_state']['grid'] == save_data['map_state']['grid']
+    assert normalized(loaded) == normalized(save_data)
+
+def test_legacy_save_loads_without_code(tmp_path):
+    """Тест: старое сохранение читается, а pickle с вызовом функции отвергается."""
+    save_data = make_save_data()
+    def legacy_file(payload):
+        encoded = base64.b64encode(zlib.compress(payload, 9)).decode('utf-8')
+        return json.dumps({'metadata': {'version': '1.0', 'name': "old.rsg", 'created': "2024-01-15T10:30:00",
+                                        'map_name': 'test'}, 'data': encoded}, indent=2)
+
+    save_system = SaveSystem(save_dir=str(tmp_path))
+    (tmp_path / "old.rsg").write_text(legacy_file(pickle.dumps(save_data)))
+    assert normalized(save_system.load_game(str(tmp_path / "old.rsg"))) == normalized(save_data)
+    assert [save['name'] for save in save_system.list_saves()] == ["old.rsg"]
+
+    class Evil:
+        def __reduce__(self):
+            return (os.remove, (str(tmp_path / "old.rsg"),))
+    (tmp_path / "evil.rsg").write_text(legacy_file(pickle.dumps(Evil())))
+    with pytest.raises(RuntimeError, match="запрещённый тип"):
+        save_system.load_game(str(tmp_path / "evil.rsg"))
+    assert (tmp_path / "old.rsg").exists()
+
+def test_damaged_and_future_files_rejected():
+    """Тест: обрезанный файл и файл новой версии формата не загружаются."""
+    data = encode_save(make_save_data(), {'name': "a.rsg", 'created': "now", 'map_name': "test"})
+    with pytest.raises(SaveFormatException):
+        decode_save(data[:len(data) // 2])
+    future = HEADER.pack(MAGIC, FORMAT_VERSION + 1, 0) + data[HEADER.size:]
+    with pytest.raises(SaveFormatException, match="новее"):
+        decode_save(future)
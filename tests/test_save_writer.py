@@ -0,0 +1,50 @@
+"""
+Тесты фоновой записи сохранений
+"""
+import os
+import pytest
+from core import save_writer
+from core.save_system import SaveSystem
+from tests.helpers import make_game
+
+def test_async_save_snapshots_state_and_reports_on_poll(tmp_path):
+    """Тест: снимок берётся в момент вызова, а колбэк срабатывает только в главном потоке."""
+    game_manager = make_game(seed=5)
+    save_system = SaveSystem(str(tmp_path))
+    expected = save_system.build_save_data(game_manager)
+    results = []
+
+    path = save_system.save_game_async(game_manager, "async.rsg",
+                                       callback=lambda *result: results.append(result))
+    game_manager.current_map.units[0].hp = 1  # Изменения после вызова в файл не попадают
+    assert results == []  # Без poll колбэк не вызывается, даже если файл уже записан
+    assert save_system.wait_saves(timeout=5)
+    assert results == [(path, None)]
+
+    loaded = save_system.load_game(path)
+    assert loaded['units'][0]['hp'] == expected['units'][0]['hp']
+    assert loaded['map_state']['grid'] == expected['map_state']['grid']
+
+def test_failed_write_keeps_previous_save(tmp_path, monkeypatch):
+    """Тест: сбой посреди записи не портит прежний файл и не оставляет временных."""
+    game_manager = make_game(seed=5)
+    save_system = SaveSystem(str(tmp_path))
+    path = save_system.save_game(game_manager, "slot.rsg")
+    with open(path, 'rb') as f:
+        previous = f.read()
+
+    def crash(src, dst):
+        raise OSError("диск отключён")
+    monkeypatch.setattr(save_writer.os, 'replace', crash)
+
+    results = []
+    save_system.save_game_async(game_manager, "slot.rsg", callback=lambda *result: results.append(result))
+    assert save_system.wait_saves(timeout=5)
+    assert isinstance(results[0][1], OSError)
+
+    with open(path, 'rb') as f:
+        assert f.read() == previous
+    assert os.listdir(tmp_path) == ["slot.rsg"]
+    with pytest.raises(RuntimeError):
+        save_system.save_game(game_manager, "slot.rsg")
+    assert os.listdir(tmp_path) == ["slot.rsg"]
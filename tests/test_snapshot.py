@@ -0,0 +1,50 @@
+"""
+Тесты снимков игрового состояния
+"""
+from core.constants import WALL_TILE
+from tests.helpers import make_game, world_state
+
+def test_snapshot_round_trip():
+    """Тест: после ходов, выстрелов, смерти и перезарядки снимок возвращает мир в точности."""
+    game_manager = make_game(seed=3)
+    game_map = game_manager.current_map
+    snapshot = game_manager.capture_snapshot()
+    expected = world_state(game_manager)
+    rng_state = game_manager.rng.get_state()
+
+    player, enemy = game_map.units[0], game_map.units[-1]
+    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        if player.move(dx, dy, game_map):
+            break
+    weapon = player.equipped_weapon
+    weapon.ammo = 0
+    player.inventory[0].ammo_type = weapon.ammo_type  # Гарантируем подходящий магазин
+    player.reload_weapon()
+    dropped = player.drop_item(player.inventory[-1])
+    game_map.add_item({'type': 'item', 'object': dropped, 'x': player.x, 'y': player.y})
+    enemy.take_damage(enemy.hp + enemy.armor)
+    game_map.create_corpse(enemy)
+    game_map.remove_unit(enemy)
+    game_map.set_tile(0, 0, WALL_TILE if game_map.grid[0, 0] != WALL_TILE else 0)
+    game_manager.end_turn()
+    roll = game_manager.combat_system.rng.random()  # Бросок, который отмена должна вернуть
+    assert world_state(game_manager) != expected
+    assert game_manager.rng.get_state() != rng_state
+
+    game_manager.restore_snapshot(snapshot)
+    assert world_state(game_manager) == expected
+    assert game_manager.rng.get_state() == rng_state
+    assert game_manager.combat_system.rng is game_manager.rng.stream('combat')
+    assert game_manager.combat_system.rng.random() == roll
+    assert game_manager.pathfinder.find_path(game_map, (player.x, player.y), (player.x, player.y)) == []
+
+def test_snapshot_shares_unchanged_parts():
+    """Тест: неизменённые части снимка переиспользуются."""
+    game_manager = make_game()
+    first = game_manager.capture_snapshot()
+    game_manager.current_map.units[0].energy -= 1
+    second = game_manager.capture_snapshot(first)
+    assert second.grid is first.grid
+    assert second.items is first.items
+    assert second.unit_states[1] is first.unit_states[1]
+    assert second.unit_states[0] is not first.unit_states[0]
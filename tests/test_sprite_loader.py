@@ -0,0 +1,82 @@
+"""
+Тесты кэша отмасштабированных спрайтов
+"""
+import os
+import pytest
+from core.constants import SPRITE_CACHE_MAX_BYTES, SPRITE_SIZE_STEP
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+pygame = pytest.importorskip("pygame")
+from core.sprite_loader import SpriteLoader
+
+def make_loader(tmp_path, **kwargs):
+    """Загрузчик без файлов на диске: спрайты кладём в словарь напрямую."""
+    loader = SpriteLoader(sprite_dir=str(tmp_path), **kwargs)
+    for name in ("a.png", "b.png"):
+        loader.sprites[name] = pygame.Surface((32, 32), pygame.SRCALPHA)
+    return loader
+
+def test_size_is_quantized(tmp_path):
+    """Тест: близкие размеры при плавном зуме дают одну и ту же поверхность."""
+    loader = make_loader(tmp_path)
+    assert loader.size_step == SPRITE_SIZE_STEP == 2
+    assert loader._normalize_size((36.9, 30.2), exact=False) == (36, 30)
+    assert loader._normalize_size((36.9, 31.2), exact=True) == (36, 31)
+    assert loader._normalize_size((0.4, 0), exact=False) == (1, 1)
+
+    first = loader.get_scaled_sprite("a.png", (34, 32))
+    assert first.get_size() == (34, 32)
+    assert loader.get_scaled_sprite("a.png", (34.9, 32.5)) is first
+    assert loader.get_scaled_sprite("a.png", (35, 32), exact=True).get_size() == (35, 32)
+    assert loader.get_scaled_sprite("missing.png", (32, 32)) is None
+
+def test_hit_and_miss_counters(tmp_path):
+    """Тест: промахи считаются при масштабировании, попадания - при повторном запросе."""
+    loader = make_loader(tmp_path)
+    loader.get_scaled_sprite("a.png", (16, 16))
+    loader.get_scaled_sprite("a.png", (16, 16))
+    loader.get_scaled_sprite("b.png", (16, 16))
+    stats = loader.get_cache_stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 2)
+    assert stats['max_bytes'] == SPRITE_CACHE_MAX_BYTES
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
+
+    loader.reset_cache_stats()
+    assert loader.get_cache_stats()['hit_rate'] == 0.0
+    assert loader.get_cache_stats()['entries'] == 2
+
+def test_eviction_by_memory(tmp_path):
+    """Тест: при превышении лимита байт выбрасываются давно не использованные спрайты."""
+    surface_bytes = 16 * 16 * 4
+    loader = make_loader(tmp_path, cache_max_bytes=2 * surface_bytes)
+    a_small = loader.get_scaled_sprite("a.png", (16, 16))
+    loader.get_scaled_sprite("b.png", (16, 16))
+    assert loader.get_scaled_sprite("a.png", (16, 16)) is a_small  # a.png теперь свежее b.png
+    loader.get_scaled_sprite("a.png", (8, 32))
+
+    assert list(loader.scaled_cache) == [("a.png", (16, 16)), ("a.png", (8, 32))]
+    assert loader.cache_bytes == 2 * surface_bytes
+
+    # Спрайт больше всего лимита остаётся в кэше один
+    loader.get_scaled_sprite("b.png", (64, 64))
+    assert list(loader.scaled_cache) == [("b.png", (64, 64))]
+    assert loader.cache_bytes == 64 * 64 * 4
+
+def test_invalidate_drops_entries(tmp_path):
+    """Тест: invalidate убирает спрайты одного файла или весь кэш и пересчитывает память."""
+    loader = make_loader(tmp_path)
+    loader.get_scaled_sprite("a.png", (16, 16))
+    loader.get_scaled_sprite("a.png", (32, 32))
+    b_small = loader.get_scaled_sprite("b.png", (16, 16))
+
+    loader.invalidate("a.png")
+    assert list(loader.scaled_cache) == [("b.png", (16, 16))]
+    assert loader.cache_bytes == 16 * 16 * 4
+    misses = loader.cache_misses
+    assert loader.get_scaled_sprite("a.png", (16, 16)) is not None
+    assert loader.cache_misses == misses + 1
+    assert loader.get_scaled_sprite("b.png", (16, 16)) is b_small
+
+    loader.invalidate()
+    assert not loader.scaled_cache
+    assert loader.cache_bytes == 0
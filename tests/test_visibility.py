@@ -0,0 +1,81 @@
+"""
+Тесты инкрементального движка видимости
+"""
+import random
+from core.constants import MAX_VISION_RANGE
+from core.field_of_view import compute_fov
+from core.visibility import VisibilityEngine
+from maps.test_map import TestMap as GameMap  # псевдоним, чтобы pytest не собирал класс
+
+def brute_force_visible(game_map, faction):
+    """Полный пересчёт: поле зрения каждого своего юнита с нуля."""
+    visible = set()
+    enemies = [u for u in game_map.units if u.faction != faction and u.hp > 0]
+    for friendly in game_map.units:
+        if friendly.faction == faction and friendly.hp > 0:
+            cells = compute_fov(game_map, friendly.x, friendly.y, MAX_VISION_RANGE)
+            visible.update((e.x, e.y) for e in enemies if (e.x, e.y) in cells)
+    return visible
+
+def test_incremental_matches_full_recompute():
+    """Тест совпадения инкрементального пересчёта с полным после ходов и смены стен."""
+    rng = random.Random(42)
+    game_map = GameMap()
+    engine = VisibilityEngine()
+    engine.reset(game_map)
+    
+    for step in range(200):
+        unit = rng.choice(game_map.units)
+        dx, dy = rng.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
+        if game_map.is_walkable(unit.x + dx, unit.y + dy) and not game_map.get_units_at(unit.x + dx, unit.y + dy):
+            unit.x += dx
+            unit.y += dy
+        if step % 25 == 0:
+            x, y = rng.randint(1, game_map.width - 2), rng.randint(1, game_map.height - 2)
+            if not game_map.get_units_at(x, y):
+                game_map.set_tile(x, y, 1 - game_map.grid[y, x])
+        
+        engine.refresh(game_map)
+        for faction in ("player", "enemy"):
+            assert engine.visible_enemies(faction) == brute_force_visible(game_map, faction)
+
+def test_snapshot_version_changes_only_on_change():
+    """Тест версии снимка: без изменений версия не растёт."""
+    game_map = GameMap()
+    engine = VisibilityEngine()
+    engine.reset(game_map)
+    version, _ = engine.get_snapshot("player")
+    engine.refresh(game_map)
+    assert engine.get_snapshot("player")[0] == version
+    
+    enemy = next(u for u in game_map.units if u.faction == "enemy")
+    game_map.remove_unit(enemy)
+    engine.refresh(game_map)
+    assert (enemy.x, enemy.y) not in engine.visible_enemies("player")
+
+def test_fov_is_symmetric_and_blocked_by_walls():
+    """Тест симметричности поля зрения и блокировки стеной."""
+    game_map = GameMap()
+    floors = [(x, y) for y in range(game_map.height) for x in range(game_map.width)
+              if game_map.is_walkable(x, y)]
+    fov = {cell: compute_fov(game_map, cell[0], cell[1], MAX_VISION_RANGE) for cell in floors}
+    for a in floors:
+        for b in floors:
+            assert (b in fov[a]) == (a in fov[b])
+    
+    # Клетка прямо за центральной стеной не видна
+    center_x, center_y = game_map.width // 2, game_map.height // 2
+    assert (center_x + 1, center_y) not in fov[(center_x - 1, center_y)]
+
+def test_faction_bitmap_matches_union_of_fov():
+    """Тест объединённой карты видимости фракции."""
+    game_map = GameMap()
+    engine = VisibilityEngine()
+    engine.reset(game_map)
+    union = set()
+    for unit in game_map.units:
+        if unit.faction == "player":
+            union |= compute_fov(game_map, unit.x, unit.y, MAX_VISION_RANGE)
+    for y in range(game_map.height):
+        for x in range(game_map.width):
+            assert engine.is_tile_visible(x, y, "player") == ((x, y) in union)
@@ -3,15 +3,18 @@ import pygame
 from core.constants import WHITE, BLACK, LIGHT_GRAY, DARK_GRAY, SCREEN_WIDTH, SCREEN_HEIGHT
 from game_objects.weapon import Weapon
 from game_objects.ammo import Ammo
+from core.log import get_logger
+
+log = get_logger('ui')
 
 class CorpsePickupMenu:
-    def __init__(self, items_on_corpse, unit, corpse, all_corpses_list, main_font, small_font):
+    def __init__(self, items_on_corpse, unit, corpse, game_map, main_font, small_font):
         self.font = main_font
         self.small_font = small_font
         self.items_on_corpse = items_on_corpse
         self.unit = unit
         self.corpse = corpse
-        self.all_corpses_list = all_corpses_list
+        self.game_map = game_map
         self.active = True
         self.selected_item_index = -1
         self.scroll_offset = 0  # Смещение для прокрутки
@@ -189,15 +192,17 @@ class CorpsePickupMenu:
                         if self.unit.add_item(item_obj):
                             if item_obj in self.corpse['inventory']:
                                 self.corpse['inventory'].remove(item_obj)
-                                print(f"Item {item_obj.name} picked up from corpse.")
+                                log.debug("Item %s picked up from corpse.", item_obj.name)
+                                self.game_map.on_item_picked(self.unit, item_obj,
+                                                             self.corpse['x'], self.corpse['y'])
                                 
                                 # Обновляем список предметов
                                 self.items_on_corpse = [item for item in self.items_on_corpse if item != item_obj]
                                 
                                 # Если труп опустел, удаляем его
                                 if not self.corpse['inventory']:
-                                    self.all_corpses_list.remove(self.corpse)
-                                    print("Corpse removed (no items left).")
+                                    self.game_map.remove_corpse(self.corpse)
+                                    log.debug("Corpse removed (no items left).")
                                     return "close"
                                 
                                 # Пересоздаем кнопки
@@ -215,7 +220,9 @@ class CorpsePickupMenu:
                         if self.unit.add_item(item_obj):
                             if item_obj in self.corpse['inventory']:
                                 self.corpse['inventory'].remove(item_obj)
-                                print(f"Item {item_obj.name} equipped from corpse.")
+                                log.debug("Item %s equipped from corpse.", item_obj.name)
+                                self.game_map.on_item_picked(self.unit, item_obj,
+                                                             self.corpse['x'], self.corpse['y'])
                                 self.unit.equip_weapon(item_obj)
                                 
                                 # Обновляем список предметов
@@ -223,8 +230,8 @@ class CorpsePickupMenu:
                                 
                                 # Если труп опустел, удаляем его
                                 if not self.corpse['inventory']:
-                                    self.all_corpses_list.remove(self.corpse)
-                                    print("Corpse removed (no items left).")
+                                    self.game_map.remove_corpse(self.corpse)
+                                    log.debug("Corpse removed (no items left).")
                                     return "close"
                                 
                                 # Пересоздаем кнопки
@@ -1,5 +1,8 @@
 import pygame
 from core.constants import WHITE, BLACK, LIGHT_GRAY, DARK_GRAY, SCREEN_WIDTH, SCREEN_HEIGHT
+from core.log import get_logger
+
+log = get_logger('ui')
 
 class InGameMenu:
     def __init__(self):
@@ -12,7 +15,7 @@ class InGameMenu:
             self.small_font = pygame.font.Font(pygame.font.match_font('freesansbold'), 20)  # Уменьшили с 24
             self.large_font = pygame.font.Font(pygame.font.match_font('freesansbold'), 42)  # Уменьшили с 48
         except:
-            print("Could not load freesansbold in InGameMenu, using default.")
+            log.warning("Could not load freesansbold in InGameMenu, using default.")
             self.font = pygame.font.Font(None, 32)
             self.small_font = pygame.font.Font(None, 20)
             self.large_font = pygame.font.Font(None, 42)
@@ -3,6 +3,9 @@ import pygame
 from core.constants import WHITE, BLACK, LIGHT_GRAY, DARK_GRAY, SCREEN_WIDTH, SCREEN_HEIGHT
 from game_objects.weapon import Weapon
 from game_objects.ammo import Ammo
+from core.log import get_logger
+
+log = get_logger('ui')
 
 class InventoryMenu:
     def __init__(self, unit, game_map):
@@ -11,7 +14,7 @@ class InventoryMenu:
             self.font = pygame.font.Font(pygame.font.match_font('freesansbold'), 36)
             self.small_font = pygame.font.Font(pygame.font.match_font('freesansbold'), 24)
         except:
-            print("Could not load freesansbold in InventoryMenu, using default.")
+            log.warning("Could not load freesansbold in InventoryMenu, using default.")
             self.font = pygame.font.Font(None, 36)
             self.small_font = pygame.font.Font(None, 24)
             
@@ -233,7 +236,7 @@ class InventoryMenu:
                         elif button_info['drop_rect'].collidepoint(mouse_pos):
                             dropped_item = self.unit.drop_item(button_info['item'])
                             if dropped_item:
-                                self.game_map.items.append({
+                                self.game_map.add_item({
                                     'type': 'weapon',
                                     'object': dropped_item,
                                     'x': self.unit.x,
@@ -245,7 +248,7 @@ class InventoryMenu:
                         if button_info['drop_rect'].collidepoint(mouse_pos):
                             dropped_item = self.unit.drop_item(button_info['item'])
                             if dropped_item:
-                                self.game_map.items.append({
+                                self.game_map.add_item({
                                     'type': 'ammo',
                                     'object': dropped_item,
                                     'x': self.unit.x,
@@ -266,7 +269,7 @@ class InventoryMenu:
                             equipped_item = self.unit.equipped_weapon
                             if equipped_item:
                                 self.unit.equipped_weapon = None
-                                self.game_map.items.append({
+                                self.game_map.add_item({
                                     'type': 'weapon',
                                     'object': equipped_item,
                                     'x': self.unit.x,
@@ -282,7 +285,7 @@ class InventoryMenu:
                         if button_info['drop_rect'].collidepoint(mouse_pos):
                             dropped_item = self.unit.drop_item(button_info['item'])
                             if dropped_item:
-                                self.game_map.items.append({
+                                self.game_map.add_item({
                                     'type': 'other',
                                     'object': dropped_item,
                                     'x': self.unit.x,
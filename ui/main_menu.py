@@ -1,5 +1,8 @@
 import pygame
 from core.constants import WHITE, BLACK, LIGHT_GRAY, DARK_GRAY, SCREEN_WIDTH, SCREEN_HEIGHT
+from core.log import get_logger
+
+log = get_logger('ui')
 
 class MainMenu:
     def __init__(self):
@@ -11,7 +14,7 @@ class MainMenu:
             self.font = pygame.font.Font(pygame.font.match_font('freesansbold'), 36)
             self.small_font = pygame.font.Font(pygame.font.match_font('freesansbold'), 24)
         except:
-            print("Could not load freesansbold in MainMenu, using default.")
+            log.warning("Could not load freesansbold in MainMenu, using default.")
             self.font = pygame.font.Font(None, 36)
             self.small_font = pygame.font.Font(None, 24)
         
@@ -47,7 +50,7 @@ class MainMenu:
                 pygame.draw.line(self.background, (color_value, color_value, color_value), 
                                (0, y), (SCREEN_WIDTH, y))
         except Exception as e:
-            print(f"Не удалось создать фон меню: {e}")
+            log.warning("Не удалось создать фон меню: %s", e)
             self.background = None
     
     def handle_event(self, event):
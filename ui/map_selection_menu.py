@@ -1,5 +1,8 @@
 import pygame
 from core.constants import WHITE, BLACK, LIGHT_GRAY, DARK_GRAY, SCREEN_WIDTH, SCREEN_HEIGHT
+from core.log import get_logger
+
+log = get_logger('ui')
 
 class MapSelectionMenu:
     def __init__(self):
@@ -12,7 +15,7 @@ class MapSelectionMenu:
             self.small_font = pygame.font.Font(pygame.font.match_font('freesansbold'), 24)
             self.large_font = pygame.font.Font(pygame.font.match_font('freesansbold'), 48)
         except:
-            print("Could not load freesansbold in MapSelectionMenu, using default.")
+            log.warning("Could not load freesansbold in MapSelectionMenu, using default.")
             self.font = pygame.font.Font(None, 36)
             self.small_font = pygame.font.Font(None, 24)
             self.large_font = pygame.font.Font(None, 48)
@@ -71,7 +74,7 @@ class MapSelectionMenu:
                 pygame.draw.line(self.background, (color_value, color_value, color_value + 10), 
                                (0, y), (SCREEN_WIDTH, y))
         except Exception as e:
-            print(f"Не удалось создать фон: {e}")
+            log.warning("Не удалось создать фон: %s", e)
             self.background = None
     
     def handle_event(self, event):
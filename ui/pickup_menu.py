@@ -3,21 +3,24 @@ import pygame
 from core.constants import WHITE, BLACK, LIGHT_GRAY, DARK_GRAY, SCREEN_WIDTH, SCREEN_HEIGHT
 from game_objects.weapon import Weapon
 from game_objects.ammo import Ammo
+from core.log import get_logger
+
+log = get_logger('ui')
 
 class PickupMenu:
-    def __init__(self, items, unit, all_map_items):
+    def __init__(self, items, unit, game_map):
         # --- Загрузка шрифтов ---
         try:
             self.font = pygame.font.Font(pygame.font.match_font('freesansbold'), 36)
             self.small_font = pygame.font.Font(pygame.font.match_font('freesansbold'), 24)
         except:
-            print("Could not load freesansbold in PickupMenu, using default.")
+            log.warning("Could not load freesansbold in PickupMenu, using default.")
             self.font = pygame.font.Font(None, 36)
             self.small_font = pygame.font.Font(None, 24)
         
         self.items = items  # Список предметов на клетке
         self.unit = unit    # Ссылка на юнита
-        self.all_map_items = all_map_items # Ссылка на исходный список предметов карты
+        self.game_map = game_map # Карта, с которой подбираются предметы
         self.active = True
         self.selected_item_index = -1
         self.scroll_offset = 0  # Смещение для прокрутки
@@ -184,10 +187,7 @@ class PickupMenu:
                         item_to_add = item_dict['object']
                         
                         if self.unit.add_item(item_to_add):
-                            original_items_on_tile = [
-                                orig_item for orig_item in self.all_map_items 
-                                if orig_item['x'] == item_dict['x'] and orig_item['y'] == item_dict['y']
-                            ]
+                            original_items_on_tile = self.game_map.get_items_at(item_dict['x'], item_dict['y'])
                             
                             for orig_item in original_items_on_tile:
                                 if (orig_item['type'] == item_dict['type'] and 
@@ -195,7 +195,9 @@ class PickupMenu:
                                     hasattr(item_dict['object'], 'name') and
                                     orig_item['object'].name == item_dict['object'].name):
                                     
-                                    self.all_map_items.remove(orig_item)
+                                    self.game_map.remove_item(orig_item)
+                                    self.game_map.on_item_picked(self.unit, item_dict['object'],
+                                                                 item_dict['x'], item_dict['y'])
                                     self.items = [it for it in self.items if it != item_dict]
                                     
                                     if not self.items:
@@ -213,10 +215,7 @@ class PickupMenu:
                         item_to_equip = item_dict['object']
                         
                         if self.unit.add_item(item_to_equip):
-                            original_items_on_tile = [
-                                orig_item for orig_item in self.all_map_items 
-                                if orig_item['x'] == item_dict['x'] and orig_item['y'] == item_dict['y']
-                            ]
+                            original_items_on_tile = self.game_map.get_items_at(item_dict['x'], item_dict['y'])
                             
                             for orig_item in original_items_on_tile:
                                 if (orig_item['type'] == item_dict['type'] and 
@@ -224,7 +223,9 @@ class PickupMenu:
                                     hasattr(item_dict['object'], 'name') and
                                     orig_item['object'].name == item_dict['object'].name):
                                     
-                                    self.all_map_items.remove(orig_item)
+                                    self.game_map.remove_item(orig_item)
+                                    self.game_map.on_item_picked(self.unit, item_dict['object'],
+                                                                 item_dict['x'], item_dict['y'])
                                     self.items = [it for it in self.items if it != item_dict]
                                     self.unit.equip_weapon(item_to_equip)
                                     
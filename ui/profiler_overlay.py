@@ -0,0 +1,61 @@
+# ui/profiler_overlay.py
+"""
+Оверлей профилировщика (F3): p50/p95/p99 и максимум по секциям кадра.
+"""
+import pygame
+from core.constants import WHITE, LIGHT_GRAY, PROFILER_OVERLAY_REFRESH
+from core.profiler import FRAME
+
+class ProfilerOverlay:
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.visible = False
+        self.font = pygame.font.SysFont("consolas,couriernew,monospace", 14)  # Моноширинный - для колонок
+        self._surface = None
+        self._timer = 0.0
+    
+    def toggle(self) -> bool:
+        """Show or hide the overlay. Первый показ включает профилировщик, скрытие его не выключает."""
+        self.visible = not self.visible
+        if self.visible:
+            self.profiler.enabled = True
+        self._surface = None
+        return self.visible
+    
+    def update(self, dt: float):
+        """Rebuild the panel a few times per second (сортировка окон не каждый кадр)."""
+        if not self.visible:
+            return
+        self._timer += dt
+        if self._surface is None or self._timer >= PROFILER_OVERLAY_REFRESH:
+            self._timer = 0.0
+            self._surface = self._render()
+    
+    def _render(self):
+        stats = self.profiler.stats()
+        # Кадр первым, остальные секции - по убыванию p95
+        names = sorted((name for name in stats if name != FRAME), key=lambda name: -stats[name]['p95'])
+        if FRAME in stats:
+            names.insert(0, FRAME)
+        
+        lines = [(f"{'секция':<22}{'p50':>7}{'p95':>7}{'p99':>7}{'max':>7}  мс", LIGHT_GRAY)]
+        for name in names:
+            s = stats[name]
+            color = (255, 120, 120) if s['p95'] > 16.7 else WHITE  # Дольше кадра при 60 FPS
+            lines.append((f"{name:<22}{s['p50']:7.2f}{s['p95']:7.2f}{s['p99']:7.2f}{s['max']:7.2f}", color))
+        lines.append(("F3 - скрыть | F4 - экспорт CSV и trace", LIGHT_GRAY))
+        
+        rendered = [self.font.render(text, True, color) for text, color in lines]
+        width = max(surface.get_width() for surface in rendered) + 16
+        height = sum(surface.get_height() + 2 for surface in rendered) + 12
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        y = 6
+        for surface in rendered:
+            panel.blit(surface, (8, y))
+            y += surface.get_height() + 2
+        return panel
+    
+    def draw(self, screen):
+        if self.visible and self._surface is not None:
+            screen.blit(self._surface, (10, 60))
@@ -1,7 +1,9 @@
 # units/unit.py
-import pygame
 from core.constants import UNIT_TYPES
 from core.exceptions import *  # Добавляем импорт
+from core.log import get_logger
+
+log = get_logger('game')
 
 class Unit:
     def __init__(self, unit_type, x, y, faction="neutral"):
@@ -89,13 +91,15 @@ class Unit:
             raise PathBlockedException(new_x, new_y)
         
         # Проверяем, нет ли другого юнита на клетке
-        if any(unit.x == new_x and unit.y == new_y for unit in game_map.units):
+        if game_map.is_occupied(new_x, new_y):
             raise PathBlockedException(new_x, new_y)
         
         # Выполняем движение
+        old_x, old_y = self.x, self.y
         self.x = new_x
         self.y = new_y
         self.energy -= 1
+        game_map.on_unit_moved(self, old_x, old_y)
         return True
     
     def can_move(self):
@@ -215,7 +219,7 @@ class Unit:
                 return True
             else:
                 # Не влезает, не снимаем
-                print(f"Cannot unequip {self.equipped_weapon.name}, inventory full!")
+                log.debug("Cannot unequip %s, inventory full!", self.equipped_weapon.name)
                 return False
         return False
     